@@ -0,0 +1,18 @@
+"""
+F1 Telemetry Lab - Analysis Service
+Author: Sergio Gonzalez
+Description: Serves the analyses over HTTP with columnar binary responses
+             (see modules/service.py).
+
+Usage: python analysis_service.py [--host 127.0.0.1] [--port 8050] [-j WORKERS]
+
+Example:
+    curl "http://127.0.0.1:8050/sessions/2024/Spain/Q/aligned?drivers=NOR,VER&channels=Speed" -o aligned.arrow
+"""
+
+import sys
+
+from modules.service import main
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,106 +1,146 @@
-import os
+import functools
+import time
 import streamlit as st
 import fastf1
 import fastf1.plotting
 import matplotlib.pyplot as plt
 import numpy as np
-from matplotlib.collections import LineCollection
-from modules.f1_utils import get_session_data
+import pandas as pd
+from modules.f1_utils import (GRID_POINTS, get_session_data, axes_width_px, downsample, plot_telemetry,
+                              session_key)
+from modules import perf
+from modules.circuit import get_circuit_geometry
+from modules.delta_engine import get_lap_batch
+from modules.degradation import CLIFF_LOSS_S, DEG_MODELS, get_degradation_table
+from modules.f1_cache import cache_usage, enable_cache
+from modules.figure_cache import figure_key, get_figure_cache
+from modules.lod import lod_budget
+from modules.minisectors import MINI_SECTORS, SEGMENT_MODES, minisector_table
+from modules.multi_session import align_across_sessions, load_sessions, session_label
+from modules.replay import REPLAY_CHUNK_S, StreamingDelta, replay_feed
+from modules.report_plots import (minisector_options, render_consistency, render_delta_map, render_heatmap,
+                                  render_minisectors, report_figure_key)
+from modules.sectors import get_sector_table
+from modules.session_cache import SessionCache
+from modules.track_heatmap import HEATMAP_LAPS, HEATMAP_METRICS
 
 # --- GLOBAL CONFIGURATION ---
-# Set the directory for storing F1 data to avoid redundant downloads
-cache_dir = 'f1_cache'
-if not os.path.exists(cache_dir):
-    os.makedirs(cache_dir)
-
-# Enable FastF1 caching and setup Matplotlib styling for F1 data
-fastf1.Cache.enable_cache(cache_dir)
+# FastF1 disk cache (bounded, see modules/f1_cache.py) and Matplotlib styling for F1 data
+enable_cache()
 fastf1.plotting.setup_mpl(mpl_timedelta_support=False, color_scheme='fastf1', misc_mpl_mods=False)
 
 # Configure Streamlit page for a professional wide-screen view
 st.set_page_config(page_title="F1 Telemetry Lab", layout="wide")
 
-# --- CIRCUIT CORNER DATA (Example: Spain/Barcelona) ---
-# Approximate distance in meters for labeling corner markers on charts
-CIRCUIT_CORNERS = {
-    "Spain": {
-        "T1": 650, "T3": 1200, "T4": 1550, "T5": 1850, "T7": 2500, 
-        "T9": 2950, "T10": 3300, "T12": 3900, "T14": 4550
-    }
-}
-
-# --- DATA LOADING (Streamlit Caching) ---
-@st.cache_data
-def load_analysis_data(y, g, s):
-    """Fetches and loads session data from the FastF1 API."""
-    session = get_session_data(y, g, s)
-    session.load()
-    return session
+# --- DATA LOADING (Shared Session Cache) ---
+# Memory budget for loaded sessions shared by all users of this server
+SESSION_CACHE_BYTES = 4 * 1024 ** 3
 
-# --- HELPER FUNCTIONS ---
-def get_laps_to_analyze(session, d1, d2, session_type, lap_num):
-    """Logic to decide between fastest laps (Qualifying) or specific laps (Race)."""
-    if session_type == "Q" or lap_num is None:
-        l1 = session.laps.pick_driver(d1).pick_fastest()
-        l2 = session.laps.pick_driver(d2).pick_fastest()
-        label = "Fastest Laps"
-    else:
-        l1 = session.laps.pick_driver(d1).pick_lap(lap_num)
-        l2 = session.laps.pick_driver(d2).pick_lap(lap_num)
-        label = f"Lap {lap_num}"
-    return l1, l2, label
+@st.cache_resource
+def get_session_cache():
+    """One process-wide cache: sessions are shared by reference, never copied."""
+    return SessionCache(max_bytes=SESSION_CACHE_BYTES)
 
-# --- DYNAMIC PLOTTING FUNCTIONS ---
+@st.cache_data(ttl=60)
+def disk_cache_usage():
+    """FastF1 disk cache footprint, rescanned at most once a minute."""
+    return cache_usage()
 
-def plot_master_dashboard(session, d1, d2, session_type, lap_num, gp_name, zoom_range=None):
-    """Generates a 5-panel dashboard: Gap, Speed, Throttle, Brake, and Gear."""
-    l1, l2, lap_label = get_laps_to_analyze(session, d1, d2, session_type, lap_num)
-    color1 = fastf1.plotting.get_driver_color(d1, session=session)
-    color2 = fastf1.plotting.get_driver_color(d2, session=session)
+def session_loader(lap_store=False):
+    """(year, gp, session_type) -> shared session, callable from worker threads."""
+    cache = get_session_cache()
+    # Lap timing first: telemetry is loaded when a telemetry view is first opened
+    return lambda y, g, s: cache.get((y, g, s, lap_store),
+                                     lambda: get_session_data(y, g, s, lap_store=lap_store, profile='timing'))
+
+def load_analysis_data(y, g, s, lap_store=False):
+    """Fetches and loads session data from the FastF1 API (or the local lap store)."""
+    with perf.stage('session_cache.get'):
+        return session_loader(lap_store)(y, g, s)
+
+# --- HELPER FUNCTIONS ---
+def get_laps_to_analyze(session, drivers, session_type, lap_num):
+    """
+    Logic to decide between fastest laps (Qualifying) or specific laps (Race).
+    Drivers without such a lap are left out.
+    """
+    kept, laps = [], []
+    for driver in drivers:
+        if session_type == "Q" or lap_num is None:
+            lap = session.laps.pick_drivers(driver).pick_fastest()
+        else:
+            lap = session.laps.pick_drivers(driver).pick_laps(lap_num)
+        if lap is not None and len(lap):
+            kept.append(driver)
+            laps.append(lap)
+    label = "Fastest Laps" if session_type == "Q" or lap_num is None else f"Lap {lap_num}"
+    return kept, laps, label
+
+def driver_styles(session, drivers):
+    """Team colour of every driver; a teammate drawn after the first gets a dashed line."""
+    styles, used = [], set()
+    for driver in drivers:
+        color = fastf1.plotting.get_driver_color(driver, session=session)
+        styles.append({'color': color, 'linestyle': '--' if color in used else '-'})
+        used.add(color)
+    return styles
 
-    # Extract telemetry and add distance coordinate
-    t1 = l1.get_telemetry().add_distance()
-    t2 = l2.get_telemetry().add_distance()
+# --- DYNAMIC PLOTTING FUNCTIONS ---
 
-    # Time Delta Calculation (Interpolation to sync different sampling rates)
-    dist_common = np.linspace(0, max(t1['Distance'].max(), t2['Distance'].max()), 2000)
-    t1_i = np.interp(dist_common, t1['Distance'], t1['Time'].dt.total_seconds())
-    t2_i = np.interp(dist_common, t2['Distance'], t2['Time'].dt.total_seconds())
-    delta = t1_i - t2_i
+def plot_master_dashboard(session, drivers, session_type, lap_num, gp_name, zoom_range=None, reference=None):
+    """Generates a 5-panel dashboard for 2-6 drivers: Gap (to the reference), Speed, Throttle, Brake, and Gear."""
+    drivers, laps, lap_label = get_laps_to_analyze(session, drivers, session_type, lap_num)
+    ref = drivers.index(reference) if reference in drivers else 0
+    styles = driver_styles(session, drivers)
 
     # Initialize subplots with specific height ratios
     fig, ax = plt.subplots(5, 1, figsize=(14, 12), sharex=True, 
                            gridspec_kw={'height_ratios': [1.5, 2, 1, 1, 1]})
     plt.style.use('dark_background')
 
-    # Panel 0: Time Gap
-    ax[0].plot(dist_common, delta, color='white')
-    ax[0].fill_between(dist_common, delta, 0, where=(delta < 0), color=color1, alpha=0.3)
-    ax[0].fill_between(dist_common, delta, 0, where=(delta > 0), color=color2, alpha=0.3)
-    ax[0].set_ylabel("Gap (s)", color='gray')
+    # Every lap is aligned in one batched pass; telemetry and level-of-detail
+    # pyramids are cached per lap and shared between the full lap view, the
+    # zoom view and any other driver selection containing the lap. Every
+    # panel draws at most lod_budget(panel width) points per driver: the
+    # whole lap from a coarse level, a narrow zoom window at raw-sample
+    # resolution.
+    width_px = axes_width_px(ax[0])
+    budget = lod_budget(width_px)
+    batch = get_lap_batch(laps, reference=ref)
+    dist_common, deltas = batch.delta_window(zoom_range, budget)
+
+    # Panel 0: Time Gap to the reference (downsampled once per driver, shared by the line and the fills)
+    others = [i for i in range(len(drivers)) if i != ref]
+    for i in others:
+        x, delta = downsample(dist_common, deltas[i], width_px)
+        if len(others) == 1:
+            ax[0].plot(x, delta, color='white')
+            ax[0].fill_between(x, delta, 0, where=(delta < 0), color=styles[ref]['color'], alpha=0.3)
+            ax[0].fill_between(x, delta, 0, where=(delta > 0), color=styles[i]['color'], alpha=0.3)
+        else:
+            ax[0].plot(x, delta, **styles[i])
+    if len(others) > 1:
+        ax[0].axhline(0, **styles[ref], linewidth=1)
+    ax[0].set_ylabel(f"Gap to {drivers[ref]} (s)", color='gray')
     
     # Panel 1: Speed + Corner Labels
-    ax[1].plot(t1['Distance'], t1['Speed'], color=color1, label=d1)
-    ax[1].plot(t2['Distance'], t2['Speed'], color=color2, label=d2)
+    for (x, v), driver, style in zip(batch.window('Speed', zoom_range, budget), drivers, styles):
+        plot_telemetry(ax[1], x, v, 'Speed', label=driver, **style)
     ax[1].set_ylabel("Speed (km/h)", color='gray')
-    ax[1].legend(loc='upper right', frameon=False)
+    ax[1].legend(loc='upper right', frameon=False, ncol=min(len(drivers), 3))
 
-    # Dynamic Corner Marker placement
-    if gp_name in CIRCUIT_CORNERS:
-        for corner, dist in CIRCUIT_CORNERS[gp_name].items():
-            if zoom_range is None or (zoom_range[0] <= dist <= zoom_range[1]):
-                ax[1].text(dist, ax[1].get_ylim()[1]*0.95, corner, color='gray', fontsize=10, ha='center', weight='bold')
+    # Dynamic Corner Marker placement (from the circuit geometry index, any circuit)
+    start, end = zoom_range if zoom_range else (None, None)
+    lap_length = batch.tels[ref].distance[-1]
+    for dist, corner in get_circuit_geometry(session).corner_labels(start, end, lap_length=lap_length):
+        ax[1].text(dist, ax[1].get_ylim()[1]*0.95, corner, color='gray', fontsize=10, ha='center', weight='bold')
 
     # Panels 2-4: Inputs (Throttle, Brake, Gear)
-    ax[2].plot(t1['Distance'], t1['Throttle'], color=color1)
-    ax[2].plot(t2['Distance'], t2['Throttle'], color=color2)
-    ax[2].set_ylabel("Throttle %", color='gray')
-    ax[3].plot(t1['Distance'], t1['Brake'], color=color1)
-    ax[3].plot(t2['Distance'], t2['Brake'], color=color2)
-    ax[3].set_ylabel("Brake", color='gray')
-    ax[4].plot(t1['Distance'], t1['nGear'], color=color1, drawstyle='steps-post')
-    ax[4].plot(t2['Distance'], t2['nGear'], color=color2, drawstyle='steps-post')
-    ax[4].set_ylabel("Gear", color='gray')
+    for a, name, label in [(ax[2], 'Throttle', "Throttle %"), (ax[3], 'Brake', "Brake"), (ax[4], 'nGear', "Gear")]:
+        drawstyle = 'steps-post' if name == 'nGear' else 'default'
+        for (x, v), style in zip(batch.window(name, zoom_range, budget), styles):
+            plot_telemetry(a, x, v, name, drawstyle=drawstyle, **style)
+        a.set_ylabel(label, color='gray')
     ax[4].set_xlabel("Distance (m)")
 
     # Apply X-axis limits for technical zoom
@@ -111,41 +151,6 @@ def plot_master_dashboard(session, d1, d2, session_type, lap_num, gp_name, zoom_
     plt.tight_layout()
     return fig
 
-def plot_speed_delta_map(session, d1, d2, session_type, lap_num):
-    """Generates a track heatmap visualizing the speed differential between drivers."""
-    l1, l2, _ = get_laps_to_analyze(session, d1, d2, session_type, lap_num)
-    t1 = l1.get_telemetry().add_distance()
-    t2 = l2.get_telemetry().add_distance()
-    
-    dist_common = np.linspace(0, max(t1['Distance'].max(), t2['Distance'].max()), 2000)
-    v1 = np.interp(dist_common, t1['Distance'], t1['Speed'])
-    v2 = np.interp(dist_common, t2['Distance'], t2['Speed'])
-    x = np.interp(dist_common, t1['Distance'], t1['X'])
-    y = np.interp(dist_common, t1['Distance'], t1['Y'])
-    
-    speed_delta = v1 - v2
-    
-    fig, ax = plt.subplots(figsize=(10, 10))
-    plt.style.use('dark_background')
-    
-    points = np.array([x, y]).T.reshape(-1, 1, 2)
-    segments = np.concatenate([points[:-1], points[1:]], axis=1)
-    
-    # Divergent colormap (Red for D1 faster, Blue for D2 faster)
-    norm = plt.Normalize(-5, 5) 
-    lc = LineCollection(segments, cmap='RdBu_r', norm=norm, linewidth=6)
-    lc.set_array(speed_delta)
-    
-    ax.add_collection(lc)
-    ax.set_aspect('equal')
-    ax.autoscale_view()
-    ax.axis('off')
-    
-    cbar = plt.colorbar(plt.cm.ScalarMappable(norm=norm, cmap='RdBu_r'), ax=ax, shrink=0.5)
-    cbar.set_label('Difference (km/h)')
-    
-    return fig
-
 def plot_tyre_strategy(session, d1, d2):
     """Analyzes race pace trends and tire degradation over lap numbers."""
     laps_d1 = session.laps.pick_driver(d1).pick_quicklaps()
@@ -164,14 +169,46 @@ def plot_tyre_strategy(session, d1, d2):
     ax.grid(alpha=0.2)
     return fig
 
+def plot_cross_session(sessions, labels, driver):
+    """Fastest laps of one driver in several sessions on one circuit grid: Speed and gap to the first."""
+    laps = [s.laps.pick_drivers(driver).pick_fastest() for s in sessions]
+    batch = align_across_sessions(laps)
+
+    fig, ax = plt.subplots(2, 1, figsize=(14, 8), sharex=True, gridspec_kw={'height_ratios': [2, 1.2]})
+    plt.style.use('dark_background')
+    for i, label in enumerate(labels):
+        lap_time = laps[i]['LapTime'].total_seconds()
+        width = 2.0 if i == 0 else 1.2
+        ax[0].plot(batch.distance, batch.channels['Speed'][i], linewidth=width, label=f"{label} ({lap_time:.3f} s)")
+        if i:
+            ax[1].plot(batch.distance, -batch.delta[i], linewidth=width, color=ax[0].lines[i].get_color())
+    ax[0].set_ylabel("Speed (km/h)", color='gray')
+    ax[0].legend(loc='lower right', frameon=False)
+    for dist, corner in batch.geometry.corner_labels():
+        ax[0].text(dist, ax[0].get_ylim()[1] * 0.95, corner, color='gray', fontsize=10, ha='center', weight='bold')
+
+    # Positive: slower than the reference session at that point of the lap
+    ax[1].axhline(0, color='white', linewidth=0.8)
+    ax[1].set_ylabel(f"Gap to {labels[0]} (s)", color='gray')
+    ax[1].set_xlabel("Distance (m)")
+    for a in ax: a.grid(alpha=0.1)
+    plt.tight_layout()
+    return fig
+
 # --- APP LAYOUT ---
 st.title("🏎️ F1 Interactive Telemetry Lab")
 
 # Sidebar for session and driver configuration
 st.sidebar.header("1. Session & Drivers")
-year = st.sidebar.selectbox("Year", [2024, 2023], index=0)
+YEARS = [2024, 2023]
+# Drivers overlaid on the telemetry dashboard (Driver 1, Driver 2 and the extra ones)
+MAX_DASHBOARD_DRIVERS = 6
+SESSION_TYPES = ["Q", "R", "FP3"]
+year = st.sidebar.selectbox("Year", YEARS, index=0)
 gp = st.sidebar.text_input("Grand Prix", "Spain")
-session_type = st.sidebar.selectbox("Session", ["Q", "R", "FP3"])
+session_type = st.sidebar.selectbox("Session", SESSION_TYPES)
+use_lap_store = st.sidebar.checkbox("Lap-store mode", value=False,
+                                    help="Read telemetry from the memory-mapped lap store (built on first use)")
 
 lap_to_plot = None
 if session_type == "R":
@@ -179,39 +216,303 @@ if session_type == "R":
 
 d1 = st.sidebar.text_input("Driver 1", "VER")
 d2 = st.sidebar.text_input("Driver 2", "NOR")
+more_drivers = st.sidebar.text_input("More drivers", "",
+                                     help=f"Comma-separated codes overlaid on the telemetry dashboard "
+                                          f"(up to {MAX_DASHBOARD_DRIVERS} drivers in total)")
+dashboard_drivers = list(dict.fromkeys([d1, d2] + [c.strip().upper() for c in more_drivers.split(',')
+                                                   if c.strip()]))[:MAX_DASHBOARD_DRIVERS]
+
+with st.sidebar.expander("Session Cache"):
+    cache_stats = get_session_cache().stats()
+    st.caption(f"{cache_stats['entries']} sessions · "
+               f"{cache_stats['size_bytes'] / 1024 ** 2:.0f} / {cache_stats['max_bytes'] / 1024 ** 2:.0f} MB")
+    st.caption(f"Hits {cache_stats['hits']} · Misses {cache_stats['misses']} · Evictions {cache_stats['evictions']}")
+    disk = disk_cache_usage()
+    st.caption(f"FastF1 disk cache: {disk['entries']} sessions · "
+               f"{disk['session_bytes'] / 1024 ** 3:.1f} / {disk['max_bytes'] / 1024 ** 3:.0f} GB "
+               f"(+ {disk['http_bytes'] / 1024 ** 2:.0f} MB HTTP cache)")
+
+# --- PERFORMANCE PANEL (optional per-stage timings) ---
+with st.sidebar.expander("Performance"):
+    profile_stages = st.checkbox("Record stage timings", key="perf_on",
+                                 help="Time loading, telemetry, interpolation, drawing and encoding on every rerun")
+    perf_panel = st.empty()
+if profile_stages:
+    perf.start_run()
+    run_start = time.perf_counter()
 
-st.sidebar.header("2. Zoom Settings")
-dist_min, dist_max = st.sidebar.slider("Distance Range (m)", 0, 7000, (1500, 3500), step=100)
+def perf_table(records):
+    """Per-stage totals of one rerun as rows for st.dataframe (nested stages indented)."""
+    return [{'Stage': '\u2003' * row['depth'] + row['stage'], 'Calls': row['calls'],
+             'ms': round(row['ms'], 1),
+             'Mem Δ (MB)': None if row['mem_delta_mb'] is None else round(row['mem_delta_mb'], 1)}
+            for row in perf.summarize(records)]
+
+def profiled_fragment(func):
+    """
+    Records the stages of a fragment's own reruns. The sidebar belongs to the
+    full script run, so a partial rerun reports its timings inline instead.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        partial = st.session_state.get('perf_on') and not perf.recording()
+        if not partial:
+            return func(*args, **kwargs)
+        perf.start_run()
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            rows = perf.summarize(perf.collect())
+            st.caption(f"⏱ Partial rerun {(time.perf_counter() - start) * 1e3:.0f} ms · " +
+                       " · ".join(f"{row['stage']} {row['ms']:.0f} ms" for row in rows if row['depth'] == 0))
+    return wrapper
+
+# --- FRAGMENTS (Partial Reruns) ---
+# Each fragment reruns on its own when one of its widgets changes, so moving
+# the zoom slider or switching views does not re-execute the whole script.
+VIEWS = ["📊 Telemetry", "📍 Track Map", "📈 Race Strategy", "🎯 Lap Consistency", "📡 Live Replay",
+         "🔀 Cross-Session"]
+
+def show_figure(key, render, style='app'):
+    """
+    Sends a figure to the page from the figure cache, rendering it on a miss.
+
+    Args:
+        key (str): figure_key() of the figure.
+        render (callable): Zero-argument function returning the figure.
+        style (str): Encoding style used on a miss.
+    """
+    data = get_figure_cache().get_or_render(key, render, style=style)
+    with perf.stage('st.image'):
+        st.image(data, width='stretch')
+
+def dashboard_key(session, drivers, reference, lap_num, gp_name, zoom_range=None):
+    return figure_key(session_key(session), 'dashboard', drivers, lap=lap_num,
+                      zoom_range=zoom_range, gp=gp_name, reference=reference)
+
+@st.fragment
+@profiled_fragment
+def zoom_panel(session, drivers, reference, session_type, lap_num, gp_name):
+    """Technical zoom: only this panel reruns when the slider moves (laps are already aligned)."""
+    st.subheader("Technical Zoom Analysis")
+    dist_min, dist_max = st.slider("Distance Range (m)", 0, 7000, (1500, 3500), step=100)
+    zoom = (dist_min, dist_max)
+    show_figure(dashboard_key(session, drivers, reference, lap_num, gp_name, zoom),
+                lambda: plot_master_dashboard(session, drivers, session_type, lap_num, gp_name,
+                                              zoom_range=zoom, reference=reference))
+
+# Replay pace -> seconds of telemetry per second of wall time (None: as fast as possible)
+REPLAY_SPEEDS = {"1x": 1.0, "4x": 4.0, "16x": 16.0, "Max": None}
+
+def replay_panel(session, d1, d2, session_type, lap_num):
+    """
+    Streams two laps from the cached session as if they were live. Each chunk
+    only aligns the grid points it newly covers, and only those rows are
+    appended to the charts (drawn once, then extended with add_rows).
+    """
+    st.subheader("Live Replay")
+    if session_type == "R" and lap_num is not None:
+        # Race: the same lap of both drivers on the session clock (the on-track gap)
+        laps, clock = session.laps.pick_drivers([d1, d2]).pick_laps(lap_num), 'session'
+        st.caption(f"Lap {lap_num} at race time")
+    else:
+        # Otherwise the fastest laps, both started at 0 (ghost comparison)
+        laps, clock = [session.laps.pick_drivers(d).pick_fastest() for d in (d1, d2)], 'lap'
+        st.caption("Fastest laps, ghost start")
+    speed = REPLAY_SPEEDS[st.radio("Pace", list(REPLAY_SPEEDS), horizontal=True, key="replay_speed")]
+    if not st.button("▶ Start replay", key="replay_start"):
+        return
+
+    # The grid spans the circuit (a live lap's length is not known in advance)
+    grid = np.linspace(0, get_circuit_geometry(session).length, GRID_POINTS)
+    delta = StreamingDelta(grid, [d1, d2])
+    gap_column, speed_columns = f"Gap {d1}-{d2} (s)", [f"Speed {d}" for d in (d1, d2)]
+
+    def frames(aligned):
+        """(gap, speed) chart rows of an aligned segment."""
+        index = pd.Index(aligned['Distance'], name="Distance (m)")
+        return (pd.DataFrame({gap_column: aligned['Delta']}, index=index),
+                pd.DataFrame({c: aligned[c] for c in speed_columns}, index=index))
+
+    # Empty charts with the final columns, extended segment by segment
+    status = st.empty()
+    empty = dict.fromkeys(['Distance', 'Delta'] + speed_columns, grid[:0])
+    gap_chart, speed_chart = (st.line_chart(rows) for rows in frames(empty))
+
+    def publish(updates):
+        # Only the newly aligned grid ranges are sent to the browser
+        for lap_number, start, end in updates:
+            if end <= start:
+                continue
+            aligned = delta.segment(lap_number, start, end)
+            gap_rows, speed_rows = frames(aligned)
+            gap_chart.add_rows(gap_rows)
+            speed_chart.add_rows(speed_rows)
+            status.caption(f"{aligned['Distance'][-1]:.0f} m · gap {aligned['Delta'][-1]:+.3f} s")
+
+    for _, chunks in replay_feed(laps, clock=clock):
+        updates = []
+        for driver, lap_number, distance, seconds, values in chunks:
+            # Ghost laps have different lap numbers but share one comparison
+            updates += delta.push(driver, lap_number if clock == 'session' else 0, distance, seconds, values)
+        publish(updates)
+        if speed:
+            time.sleep(REPLAY_CHUNK_S / speed)
+    publish([update for driver in (d1, d2) for update in delta.finish(driver)])
+
+def sector_panel(session, session_type, gp_name):
+    """Whole-field sector table: best sectors, theoretical best, ranks and speed traps (lap timing only)."""
+    with st.expander("Sector Times & Theoretical Best (Whole Field)"):
+        # One grouped pass per session, then served from memory
+        table = get_sector_table(session)
+        st.dataframe(table.round(3), hide_index=True)  # Click a column header to sort
+        st.caption(f"Ideal lap {table.attrs['ideal_lap']:.3f} s: " +
+                   " · ".join(f"S{i + 1} {driver} {seconds:.3f} s"
+                              for i, (driver, seconds) in enumerate(table.attrs['ideal_sectors'])))
+        st.download_button("Download sector table (CSV)", table.to_csv(index=False).encode(),
+                           file_name=f"{session.event['EventDate'].year}_{gp_name}_{session_type}_sectors.csv",
+                           mime='text/csv', key="sector_csv")
+
+def cross_session_panel(session, driver_codes, session_type, gp_name):
+    """One driver's fastest lap across sessions (same event, other seasons), loaded concurrently."""
+    st.subheader("Cross-Session Comparison")
+    current = (session.event['EventDate'].year, gp_name, session_type)
+    choices = [(y, gp_name, s) for y in YEARS for s in SESSION_TYPES if (y, gp_name, s) != current]
+    default = [(current[0], gp_name, "R" if session_type != "R" else "Q")]
+    others = st.multiselect("Compare with", choices, default=default, format_func=session_label, key="xs_sessions")
+    driver = st.radio("Driver", driver_codes, horizontal=True, key="xs_driver")
+    if not others:
+        st.info("Select at least one session to compare with.")
+        return
+
+    # Every session (and its telemetry) loads on the pool; the bar moves as each one is ready
+    progress = st.progress(0.0, text=f"Loading {len(others)} sessions...")
+    loaded = {}
+    for done, (spec, other, error) in enumerate(
+            load_sessions(others, loader=session_loader(use_lap_store), telemetry=True), start=1):
+        progress.progress(done / len(others), text=f"{session_label(spec)} ready ({done}/{len(others)})")
+        if error is None:
+            loaded[spec] = other
+        else:
+            st.warning(f"{session_label(spec)} could not be loaded: {error}")
+    progress.empty()
+
+    specs = [current] + [spec for spec in others if spec in loaded]
+    sessions = [session] + [loaded[spec] for spec in specs[1:]]
+    labels = [session_label(spec) for spec in specs]
+    show_figure(figure_key(session_key(session), 'cross_session', [driver], sessions=labels),
+                lambda: plot_cross_session(sessions, labels, driver))
+
+@st.fragment
+@profiled_fragment
+def analysis_views(session, d1, d2, session_type, lap_num, gp_name, drivers):
+    """Renders only the selected view, on demand."""
+    view = st.segmented_control("View", VIEWS, default=VIEWS[0], key="view") or VIEWS[0]
+
+    if view == VIEWS[0]:
+        st.subheader("Master Telemetry Analysis")
+        reference = st.radio("Gap reference", drivers, horizontal=True, key="gap_reference")
+        # Render full lap overview
+        show_figure(dashboard_key(session, drivers, reference, lap_num, gp_name),
+                    lambda: plot_master_dashboard(session, drivers, session_type, lap_num, gp_name,
+                                                  reference=reference))
+        sector_panel(session, session_type, gp_name)
+        st.markdown("---")
+        # Focused technical zoom with its own slider
+        zoom_panel(session, drivers, reference, session_type, lap_num, gp_name)
+
+    elif view == VIEWS[1]:
+        track_map = st.radio("Map", ["Speed delta", "Mini-sector dominance", "Heatmap"], horizontal=True,
+                             key="track_map")
+        if track_map == "Speed delta":
+            st.subheader("Speed Delta Track Map")
+            # Same figure (and cache entry) as speed_delta_map.py and the batch reports
+            show_figure(report_figure_key(session, 'delta_map', [d1, d2], lap=lap_num),
+                        lambda: render_delta_map(session, [d1, d2], None, None, lap=lap_num),
+                        style='report')
+        elif track_map == "Heatmap":
+            st.subheader("Track Heatmap")
+            col_metric, col_laps, col_who = st.columns(3)
+            metric = col_metric.selectbox("Metric", list(HEATMAP_METRICS), key="hm_metric",
+                                          format_func=lambda m: HEATMAP_METRICS[m][2])
+            laps = col_laps.radio("Laps", HEATMAP_LAPS, horizontal=True, key="hm_laps")
+            who = col_who.radio("Drivers", [d1, d2, "Field"], horizontal=True, key="hm_drivers")
+            drivers = [] if who == "Field" else [who]
+            # One raster image whatever the number of laps; binned laps stay in memory per selection
+            show_figure(report_figure_key(session, 'heatmap', drivers, metric=metric, laps=laps),
+                        lambda: render_heatmap(session, drivers, None, None, metric=metric, laps=laps),
+                        style='report')
+        else:
+            st.subheader("Mini-Sector Dominance (Fastest Laps)")
+            col_mode, col_n, col_field = st.columns(3)
+            mode = col_mode.radio("Segments", SEGMENT_MODES, horizontal=True, key="ms_mode")
+            n_sectors = col_n.number_input("Mini-sectors", 5, 100, MINI_SECTORS, step=5, key="ms_count",
+                                           disabled=mode != 'equal')
+            field = col_field.checkbox("Whole field", value=True, key="ms_field")
+            # Same cache entry as minisector_map.py and the batch reports for the default map
+            options = minisector_options(mode, n_sectors, field)
+            show_figure(report_figure_key(session, 'minisectors', [] if field else [d1, d2], **options),
+                        lambda: render_minisectors(session, [d1, d2], None, None, **options),
+                        style='report')
+
+            # Segment-time table (already computed by the render, telemetry is cached)
+            table = minisector_table(session, None if field else [d1, d2], mode, int(n_sectors))
+            st.dataframe(table.round(3))
+            st.download_button("Download segment times (CSV)", table.to_csv().encode(),
+                               file_name=f"{session.event['EventDate'].year}_{gp_name}_{session_type}_minisectors.csv",
+                               mime='text/csv')
+
+    elif view == VIEWS[2]:
+        if session_type == "R":
+            st.subheader("Race Pace & Tyre Degradation")
+            # Dynamic race pace trend chart (lap timing only, no telemetry needed)
+            show_figure(figure_key(session_key(session), 'race_pace', [d1, d2]),
+                        lambda: plot_tyre_strategy(session, d1, d2))
+
+            # Whole-field degradation models, fitted once per session and model
+            st.subheader("Stint Degradation Models")
+            model = st.radio("Pace model", list(DEG_MODELS), horizontal=True, key="deg_model")
+            deg_table = get_degradation_table(session, model)
+            whole_field = st.checkbox("Whole field", value=False, key="deg_whole_field")
+            if not whole_field:
+                deg_table = deg_table[deg_table['Driver'].isin([d1, d2])]
+            st.dataframe(deg_table.round(3), hide_index=True)
+            st.caption(f"Fuel-corrected to an empty car. Cliff: tyre age at which the fitted pace "
+                       f"is {CLIFF_LOSS_S:.1f} s slower than on fresh tyres.")
+        else:
+            st.warning("Strategy analysis is designed for Race ('R') sessions.")
+
+    elif view == VIEWS[3]:
+        st.subheader("Telemetry Consistency (Quick Laps)")
+        driver = st.radio("Driver", [d1, d2], horizontal=True, key="consistency_driver")
+        # The lap set is part of the key: new quick laps give a new figure, and
+        # the cached tensor only interpolates those laps
+        quick_laps = session.laps.pick_drivers(driver).pick_quicklaps()
+        if quick_laps.empty:
+            st.warning(f"No quick laps with telemetry for {driver}.")
+        else:
+            show_figure(figure_key(session_key(session), 'consistency', [driver],
+                                   laps=[int(n) for n in quick_laps['LapNumber']]),
+                        lambda: render_consistency(session, [driver], session.event['EventDate'].year, gp_name))
+
+    elif view == VIEWS[4]:
+        replay_panel(session, d1, d2, session_type, lap_num)
+
+    else:
+        cross_session_panel(session, [d1, d2], session_type, gp_name)
 
 # --- AUTOMATIC EXECUTION (Reactive Logic) ---
 try:
     with st.spinner("Processing data..."):
-        session = load_analysis_data(year, gp, session_type)
-        
-        tab1, tab2, tab3 = st.tabs(["📊 Telemetry", "📍 Track Map", "📈 Race Strategy"])
-        
-        with tab1:
-            st.subheader("Master Telemetry Analysis")
-            # Render full lap overview
-            st.pyplot(plot_master_dashboard(session, d1, d2, session_type, lap_to_plot, gp))
-            st.markdown("---")
-            # Render focused technical zoom based on sidebar slider
-            st.subheader("Technical Zoom Analysis")
-            st.pyplot(plot_master_dashboard(session, d1, d2, session_type, lap_to_plot, gp, zoom_range=(dist_min, dist_max)))
-            
-        with tab2:
-            st.subheader("Speed Delta Track Map")
-            # Dynamic track heatmap generation
-            st.pyplot(plot_speed_delta_map(session, d1, d2, session_type, lap_to_plot))
-            
-        with tab3:
-            if session_type == "R":
-                st.subheader("Race Pace & Tyre Degradation")
-                # Dynamic race pace trend chart
-                st.pyplot(plot_tyre_strategy(session, d1, d2))
-            else:
-                st.warning("Strategy analysis is designed for Race ('R') sessions.")
+        session = load_analysis_data(year, gp, session_type, use_lap_store)
+    analysis_views(session, d1, d2, session_type, lap_to_plot, gp, dashboard_drivers)
 
 except Exception as e:
     st.sidebar.info("Waiting for valid input...")
-    # st.error(f"Error details: {e}") # Uncomment for debugging
\ No newline at end of file
+    # st.error(f"Error details: {e}") # Uncomment for debugging
+
+if profile_stages:
+    with perf_panel.container():
+        st.caption(f"Full rerun: {(time.perf_counter() - run_start) * 1e3:.0f} ms")
+        st.dataframe(perf_table(perf.collect()), hide_index=True)
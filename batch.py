@@ -0,0 +1,14 @@
+"""
+F1 Telemetry Lab - Batch Report CLI
+Author: Sergio Gonzalez
+Description: Renders all figures of a report manifest in parallel.
+
+Usage: python batch.py batch_manifest.json [-j WORKERS] [-o OUT_DIR] [--force]
+"""
+
+import sys
+
+from modules.batch import main
+
+if __name__ == '__main__':
+    sys.exit(main())
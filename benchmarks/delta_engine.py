@@ -0,0 +1,57 @@
+"""
+F1 Telemetry Lab - Delta Engine Benchmark
+Author: Sergio Gonzalez
+Description: Compares the batched delta engine against a Python loop of
+             pairwise np.interp alignments for growing numbers of laps.
+             Both do O(laps x channels x grid) work: the batch brackets each
+             grid point once for every channel and evaluates the float
+             channels in float32, a constant-factor gain (~1.1-1.9x on one
+             core) rather than one that grows with the lap count. Runs
+             offline on synthetic telemetry.
+
+Usage: python -m benchmarks.delta_engine
+"""
+
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import synthetic_telemetry
+from modules.delta_engine import AlignedLapBatch
+from modules.f1_utils import ALIGNED_CHANNELS, GRID_POINTS, LapTelemetry, _interp_channels
+
+LAP_COUNTS = [2, 5, 10, 20, 40, 80]
+REPEATS = 5
+
+EXACT_CHANNELS = ['Time', 'nGear']
+
+def pairwise_loop(tels):
+    """Baseline: one np.interp per lap and channel, like N delta_calculator calls."""
+    grid = np.linspace(0, tels[0].distance.max(), GRID_POINTS)
+    channels = [_interp_channels(grid, tel) for tel in tels]
+    return {ch: np.stack([c[ch] for c in channels]) for ch in ALIGNED_CHANNELS}
+
+def best_of(func, *args):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+if __name__ == '__main__':
+    print(f"{'laps':>5} | {'loop (ms)':>10} | {'batched (ms)':>12} | speed-up")
+    for n_laps in LAP_COUNTS:
+        tels = [LapTelemetry.from_telemetry(synthetic_telemetry(seed).add_distance()) for seed in range(n_laps)]
+
+        # Time (hence every delta) and gears match the pairwise result exactly,
+        # the float32 channels to float32 rounding
+        loop_result = pairwise_loop(tels)
+        batch_result = AlignedLapBatch(tels).channels
+        assert all(np.array_equal(loop_result[ch], batch_result[ch]) for ch in EXACT_CHANNELS)
+        assert all(np.allclose(loop_result[ch], batch_result[ch], rtol=1e-6, atol=1e-2)
+                   for ch in ALIGNED_CHANNELS if ch not in EXACT_CHANNELS)
+
+        t_loop = best_of(pairwise_loop, tels)
+        t_batch = best_of(AlignedLapBatch, tels)
+        print(f"{n_laps:>5} | {t_loop * 1e3:>10.2f} | {t_batch * 1e3:>12.2f} | {t_loop / t_batch:.2f}x")
@@ -0,0 +1,268 @@
+"""
+F1 Telemetry Lab - Benchmark Suite
+Author: Sergio Gonzalez
+Description: Times the analysis hot paths (telemetry extraction, lap
+             alignment and delta, level-of-detail windows, downsampling,
+             track-map segment building, figure rendering and encoding) on
+             a synthetic session, fully offline. Results are written as JSON
+             so runs from different commits can be compared.
+
+Usage:
+    python -m benchmarks.suite                       # run, save benchmarks/results/<commit>.json
+    python -m benchmarks.suite --circuit long -o run.json
+    python -m benchmarks.suite --compare base.json new.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import matplotlib
+matplotlib.use('Agg')  # Rendering is timed off-screen
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from matplotlib.collections import LineCollection
+
+from benchmarks.synthetic import CIRCUITS, SyntheticSession
+from modules import delta_engine, f1_utils
+from modules.circuit import get_circuit_geometry
+from modules.delta_engine import align_lap_batch, get_lap_batch
+from modules.f1_utils import (GRID_POINTS, LOD_CHANNELS, _interp_channels, align_laps,
+                              delta_calculator, downsample, get_lap_telemetry,
+                              get_laps_telemetry)
+from modules.figure_cache import encode_figure
+from modules.lod import build_pyramid
+from modules.minisectors import minisector_table
+from modules.multi_session import align_across_sessions
+from modules.replay import StreamingDelta, replay_feed
+from modules.report_plots import render_delta_map, render_heatmap, render_minisectors
+from modules.sectors import sector_table
+from modules.track_heatmap import bin_samples, track_profile
+
+RESULTS_DIR = os.path.join('benchmarks', 'results')
+REPEATS = 7
+
+# A run slower than the base by more than this fraction is reported as a regression
+REGRESSION_THRESHOLD = 0.10
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _cold(func):
+    """Wraps a benchmark so every call starts with empty telemetry and aligned-lap caches."""
+    def run():
+        f1_utils._telemetry_cache.clear()
+        f1_utils._aligned_cache.clear()
+        return func()
+    return run
+
+def _render_and_close(render):
+    def run():
+        plt.close(render())
+    return run
+
+def build_cases(session):
+    """
+    Benchmark cases on one synthetic session.
+
+    Returns:
+        dict: Case name -> zero-argument callable.
+    """
+    drivers = ['VER', 'NOR']
+    lap1 = session.laps.pick_drivers(drivers[0]).pick_fastest()
+    lap2 = session.laps.pick_drivers(drivers[1]).pick_fastest()
+    tel1, tel2 = get_lap_telemetry(lap1), get_lap_telemetry(lap2)
+    pair = align_laps(lap1, lap2)
+    pair.pyramids  # Built once here; 'lod_build' times the construction
+    grid = np.linspace(0, tel1['Distance'].max(), GRID_POINTS)
+
+    # A race stint of one driver, back to back: the long series the plots downsample
+    stint = pd.concat([session.lap_telemetry('VER', n) for n in sorted(set(session.laps['LapNumber'].astype(int)))])
+    stint_x = np.arange(len(stint), dtype=float)
+    stint_speed, stint_gear = stint['Speed'].to_numpy(), stint['nGear'].to_numpy()
+
+    fastest = [session.laps.pick_drivers(d).pick_fastest() for d in session.laps['Driver'].unique()]
+
+    # The same driver in another session of the event (different seed: other lap lengths)
+    other = SyntheticSession(n_drivers=2, n_laps=3, circuit=session.circuit, name='Race', seed=1)
+    cross_laps = [lap1, other.laps.pick_drivers(drivers[0]).pick_fastest()]
+
+    geometry = get_circuit_geometry(session, root=tempfile.mkdtemp())
+    session_tels = get_laps_telemetry(session.laps)
+    session_samples = bin_samples(geometry, session_tels)
+
+    def delta_map_segments():
+        v1, v2 = pair.channel('Speed')
+        x, y = geometry.position(pair.distance, lap_length=tel1.distance[-1])
+        points = np.array([x, y]).T.reshape(-1, 1, 2)
+        segments = np.concatenate([points[:-1], points[1:]], axis=1)
+        lc = LineCollection(segments, cmap='RdBu_r', norm=plt.Normalize(-5, 5), linewidth=6)
+        lc.set_array(v1 - v2)
+        return lc
+
+    def lod_zoom_window():
+        for name in LOD_CHANNELS:
+            pair.window(name, (1500, 3500))
+        return pair.delta_window((1500, 3500))
+
+    def dashboard_windows_four():
+        # N-driver dashboard data: one batch, then every panel's window (pyramids built cold)
+        delta_engine._batch_cache.clear()
+        delta_engine._pyramid_cache.clear()
+        batch = get_lap_batch(fastest[:4])
+        windows = [batch.window(name, (1500, 3500)) for name in LOD_CHANNELS]
+        return batch.delta_window((1500, 3500)), windows
+
+    def replay_stream_pair():
+        # The whole feed of two fastest laps, chunk by chunk (excluding extraction)
+        delta = StreamingDelta(grid, drivers)
+        for _, chunks in replay_chunks:
+            for driver, _, distance, seconds, values in chunks:
+                delta.push(driver, 0, distance, seconds, values)
+        return [delta.finish(d) for d in drivers]
+
+    replay_chunks = list(replay_feed([lap1, lap2], clock='lap'))
+    delta_map_fig = render_delta_map(session, drivers, 2024, 'Synthetic')
+
+    return {
+        'get_lap_telemetry': _cold(lambda: get_lap_telemetry(lap1)),
+        'get_laps_telemetry_session': _cold(lambda: get_laps_telemetry(session.laps)),
+        'delta_calculator_cold': _cold(lambda: delta_calculator(lap1, lap2)),
+        'delta_calculator_warm': lambda: delta_calculator(lap1, lap2),
+        'interp_channels_pair': lambda: (_interp_channels(grid, tel1), _interp_channels(grid, tel2)),
+        'lod_build': lambda: build_pyramid(tel1, LOD_CHANNELS),
+        'lod_zoom_window': lod_zoom_window,
+        'downsample_lttb_stint': lambda: downsample(stint_x, stint_speed, 1200, 'lttb'),
+        'downsample_minmax_stint': lambda: downsample(stint_x, stint_gear, 1200, 'minmax'),
+        'delta_map_segments': delta_map_segments,
+        'circuit_project_lap': lambda: geometry.project(tel2.x, tel2.y),
+        'heatmap_bin_session': lambda: bin_samples(geometry, session_tels),
+        'heatmap_median_session': lambda: track_profile(session_samples, len(geometry.distance), 'median_speed'),
+        'dashboard_windows_four': _cold(dashboard_windows_four),
+        'replay_stream_pair': replay_stream_pair,
+        'align_across_sessions_pair': _cold(lambda: align_across_sessions(cross_laps)),
+        'align_lap_batch_field': _cold(lambda: align_lap_batch(fastest)),
+        'minisector_table_field': _cold(lambda: minisector_table(session)),
+        'sector_table_session': lambda: sector_table(session.laps),
+        'render_delta_map': _render_and_close(lambda: render_delta_map(session, drivers, 2024, 'Synthetic')),
+        'render_heatmap': _render_and_close(lambda: render_heatmap(session, drivers[:1], 2024, 'Synthetic')),
+        'render_heatmap_session': _render_and_close(
+            lambda: render_heatmap(session, [], 2024, 'Synthetic', metric='median_speed', laps='all')),
+        'render_minisectors': _render_and_close(lambda: render_minisectors(session, drivers, 2024, 'Synthetic')),
+        'encode_delta_map_app': lambda: encode_figure(delta_map_fig, style='app'),
+    }
+
+def time_case(func, repeats=REPEATS):
+    """
+    Returns:
+        dict: best_ms, median_ms and repeats of func (one warm-up call first).
+    """
+    func()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {'best_ms': min(timings) * 1e3, 'median_ms': float(np.median(timings)) * 1e3, 'repeats': repeats}
+
+def run_suite(circuit='medium', n_drivers=20, n_laps=10, repeats=REPEATS, only=None):
+    """
+    Runs every benchmark case on a synthetic session.
+
+    Args:
+        circuit (str): Key of CIRCUITS.
+        n_drivers (int): Field size of the synthetic session.
+        n_laps (int): Laps per driver.
+        repeats (int): Timed calls per case.
+        only (list): Case names to run (default: all).
+
+    Returns:
+        dict: {'meta': run information, 'results': case -> timings}
+    """
+    session = SyntheticSession(n_drivers=n_drivers, n_laps=n_laps, circuit=circuit)
+    cases = build_cases(session)
+    results = {}
+    for name, func in cases.items():
+        if only and name not in only:
+            continue
+        results[name] = time_case(func, repeats)
+        print(f"{name:<26} best {results[name]['best_ms']:>9.3f} ms | median {results[name]['median_ms']:>9.3f} ms")
+
+    meta = {
+        'commit': _git_commit(),
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'matplotlib': matplotlib.__version__,
+        'machine': platform.machine(),
+        'circuit': circuit,
+        'n_drivers': n_drivers,
+        'n_laps': n_laps,
+    }
+    return {'meta': meta, 'results': results}
+
+def compare(base_path, new_path, threshold=REGRESSION_THRESHOLD):
+    """
+    Prints the best-time ratio of every case present in two result files.
+
+    Returns:
+        int: Number of regressions (new slower than base by more than threshold).
+    """
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    print(f"base: {base['meta'].get('commit')} ({base['meta']['date']})  "
+          f"new: {new['meta'].get('commit')} ({new['meta']['date']})")
+    print(f"{'case':<26} | {'base (ms)':>10} | {'new (ms)':>10} | ratio")
+    regressions = 0
+    for name in base['results']:
+        if name not in new['results']:
+            continue
+        b, n = base['results'][name]['best_ms'], new['results'][name]['best_ms']
+        ratio = n / b if b else float('inf')
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        print(f"{name:<26} | {b:>10.3f} | {n:>10.3f} | {ratio:.2f}x{flag}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks of the F1 Telemetry Lab hot paths.")
+    parser.add_argument('--circuit', choices=list(CIRCUITS), default='medium', help="synthetic circuit profile")
+    parser.add_argument('--drivers', type=int, default=20, help="field size (default: 20)")
+    parser.add_argument('--laps', type=int, default=10, help="laps per driver (default: 10)")
+    parser.add_argument('-r', '--repeats', type=int, default=REPEATS, help=f"timed calls per case (default: {REPEATS})")
+    parser.add_argument('-k', '--only', nargs='+', help="run only these cases")
+    parser.add_argument('-o', '--output', help="result file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'), help="compare two result files")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare(*args.compare) else 0
+
+    run = run_suite(args.circuit, args.drivers, args.laps, args.repeats, args.only)
+    output = args.output or os.path.join(RESULTS_DIR, f"{run['meta']['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(run, f, indent=2)
+    print(f"Results saved to {output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
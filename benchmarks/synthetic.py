@@ -0,0 +1,199 @@
+"""
+F1 Telemetry Lab - Synthetic Session Generator
+Author: Sergio Gonzalez
+Description: Offline stand-in for a loaded FastF1 session. Lap telemetry has
+             the shape of Lap.get_telemetry() frames (merged car and position
+             data at their native, jittered sample rates, FastF1 column
+             dtypes, realistic lap lengths) so the analysis code can be
+             benchmarked without session.load().
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+from fastf1.core import Telemetry
+
+from modules.lap_store import StoredLaps
+
+# Circuit profiles: lap length (m), reference lap time (s), corner count
+CIRCUITS = {
+    'short': {'length': 3337.0, 'lap_seconds': 72.0, 'corners': 19},   # Monaco-like
+    'medium': {'length': 4657.0, 'lap_seconds': 78.0, 'corners': 14},  # Barcelona-like
+    'long': {'length': 7004.0, 'lap_seconds': 106.0, 'corners': 19},   # Spa-like
+}
+
+# Native FastF1 sample rates: car data ~240 ms, position data ~220 ms.
+# Merged telemetry interleaves both streams.
+CAR_INTERVAL_S = 0.24
+POS_INTERVAL_S = 0.22
+
+# Marshal sectors per lap (real circuits have 15-25)
+MARSHAL_SECTORS = 20
+
+DRIVERS = ['VER', 'NOR', 'LEC', 'PIA', 'SAI', 'HAM', 'RUS', 'PER', 'ALO', 'STR',
+           'GAS', 'OCO', 'ALB', 'SAR', 'TSU', 'RIC', 'HUL', 'MAG', 'BOT', 'ZHO']
+
+def _sample_times(lap_seconds, rng):
+    """Merged car + position timestamps with the jitter of the live timing feed."""
+    def stream(interval, offset):
+        steps = rng.uniform(0.8 * interval, 1.2 * interval, int(lap_seconds / interval) + 2)
+        return np.cumsum(steps) - steps[0] + offset
+
+    # The two streams are not synchronised: position samples start in between
+    car, pos = stream(CAR_INTERVAL_S, 0.0), stream(POS_INTERVAL_S, rng.uniform(0.01, POS_INTERVAL_S))
+    times = np.concatenate([car, pos])
+    source = np.concatenate([np.full(len(car), 'car', dtype=object), np.full(len(pos), 'pos', dtype=object)])
+    order = np.argsort(times, kind='stable')
+    times, source = times[order], source[order]
+    keep = times <= lap_seconds
+    return times[keep], source[keep]
+
+def track_position(distance, circuit='medium'):
+    """
+    Position on the synthetic track outline (a closed curve with the
+    circuit's length scale) at distances from the start line.
+
+    Returns:
+        tuple: (X, Y) in FastF1 units (1/10 m).
+    """
+    length = CIRCUITS[circuit]['length']
+    angle = np.asarray(distance) / length * 2 * np.pi
+    radius = length / (2 * np.pi) * (1 + 0.15 * np.sin(3 * angle))
+    return radius * np.cos(angle) * 10, radius * np.sin(angle) * 10
+
+def synthetic_telemetry(seed=0, circuit='medium', lap_seconds=None):
+    """
+    One lap of merged telemetry, like Lap.get_telemetry().
+
+    Speed follows the circuit's corners (braking dips between full-throttle
+    straights) and is scaled so the integrated distance equals the lap length.
+
+    Args:
+        seed (int): Random seed (noise, sample jitter).
+        circuit (str): Key of CIRCUITS.
+        lap_seconds (float): Lap time, defaults to the circuit reference.
+
+    Returns:
+        Telemetry: Frame with FastF1's columns and dtypes (without 'Distance').
+    """
+    profile = CIRCUITS[circuit]
+    lap_seconds = lap_seconds or profile['lap_seconds']
+    rng = np.random.default_rng(seed)
+    t, source = _sample_times(lap_seconds, rng)
+    n = len(t)
+
+    # 1. Speed: a corner every 1/corners of the lap, plus sensor noise
+    phase = t / lap_seconds * profile['corners'] * 2 * np.pi
+    speed = 215 + 95 * np.sin(phase) ** 3 + rng.normal(0, 1.2, n)
+    speed *= profile['length'] / np.sum(np.diff(t) * (speed[1:] + speed[:-1]) / 7.2)
+    speed = np.clip(speed, 60, 350)
+
+    # 2. Driver inputs derived from the speed trace
+    accel = np.gradient(speed, t)
+    brake = accel < -15
+    throttle = np.where(brake, 0.0, np.clip(40 + accel * 4, 0, 100)).round()
+    gear = np.clip(speed // 42 + 1, 1, 8).astype('int64')
+
+    # 3. Track outline at the distance covered
+    covered = np.cumsum(speed / 3.6 * np.gradient(t))
+    x, y = track_position(covered, circuit)
+
+    start = pd.Timestamp('2024-06-22 14:00:00')
+    return Telemetry({
+        'Date': start + pd.to_timedelta(t, unit='s'),
+        'SessionTime': pd.to_timedelta(t + 3600, unit='s'),
+        'DriverAhead': np.full(n, '', dtype=object),
+        'DistanceToDriverAhead': rng.uniform(0, 500, n),
+        'Time': pd.to_timedelta(t, unit='s'),
+        'RPM': (speed * 38 + 6000).round(),
+        'Speed': speed.round(),
+        'nGear': gear,
+        'Throttle': throttle,
+        'Brake': brake,
+        'DRS': np.where(throttle == 100, 12, 0).astype('int64'),
+        'Source': source,
+        'X': x,
+        'Y': y,
+        'Z': 50 * np.sin(covered / profile['length'] * 2 * np.pi),
+        'Status': np.full(n, 'OnTrack', dtype=object),
+    })
+
+class SyntheticSession:
+    """
+    In-memory session exposing the FastF1 Session interface used in this project
+    (event, name, api_path, laps, get_circuit_info), like LapStoreSession.
+
+    Args:
+        n_drivers (int): Field size (at most len(DRIVERS)).
+        n_laps (int): Laps per driver.
+        circuit (str): Key of CIRCUITS.
+        name (str): Session name ('Qualifying', 'Race', ...).
+        seed (int): Base random seed.
+    """
+
+    def __init__(self, n_drivers=20, n_laps=3, circuit='medium', name='Qualifying', seed=0):
+        self.name = name
+        self.circuit = circuit
+        self.seed = seed
+        self.api_path = f'/synthetic/{circuit}/{name}/'
+        self.load_profile = 'telemetry'
+        self.event = pd.Series({'EventName': f'Synthetic {circuit.title()} Grand Prix',
+                                'EventDate': pd.Timestamp('2024-06-23'),
+                                'RoundNumber': 1, 'Location': circuit.title()})
+        self._telemetry = {}
+
+        rng = np.random.default_rng(seed)
+        reference = CIRCUITS[circuit]['lap_seconds']
+        rows = []
+        for d, driver in enumerate(DRIVERS[:n_drivers]):
+            for lap_number in range(1, n_laps + 1):
+                lap_seconds = reference * (1 + 0.002 * d) + rng.normal(0, 0.25) + 0.05 * lap_number
+                sectors = lap_seconds * np.array([0.28, 0.38, 0.34])
+                start = 3600 + (lap_number - 1) * (reference + 2)
+                rows.append({
+                    'Time': pd.Timedelta(seconds=start + lap_seconds), 'Driver': driver,
+                    'DriverNumber': str(d + 1), 'LapTime': pd.Timedelta(seconds=lap_seconds),
+                    'LapNumber': float(lap_number), 'Stint': 1.0 + (lap_number > n_laps // 2),
+                    'PitOutTime': pd.NaT, 'PitInTime': pd.NaT,
+                    'Sector1Time': pd.Timedelta(seconds=sectors[0]),
+                    'Sector2Time': pd.Timedelta(seconds=sectors[1]),
+                    'Sector3Time': pd.Timedelta(seconds=sectors[2]),
+                    'SpeedI1': 280.0, 'SpeedI2': 290.0, 'SpeedFL': 270.0, 'SpeedST': 310.0,
+                    'IsPersonalBest': False, 'Compound': 'SOFT', 'TyreLife': float(lap_number),
+                    'FreshTyre': True, 'Team': f'Team {d // 2 + 1}',
+                    'LapStartTime': pd.Timedelta(seconds=start), 'LapStartDate': pd.NaT,
+                    'TrackStatus': '1', 'Position': np.nan, 'Deleted': False,
+                    'DeletedReason': '', 'FastF1Generated': False, 'IsAccurate': True,
+                })
+        laps = pd.DataFrame(rows)
+        best = laps.groupby('Driver')['LapTime'].idxmin()
+        laps.loc[best, 'IsPersonalBest'] = True  # pick_fastest() selects personal bests
+        self.laps = StoredLaps(laps, session=self)
+
+    def load(self, *args, **kwargs):
+        """No-op: telemetry is generated on demand."""
+        return None
+
+    def lap_telemetry(self, driver, lap_number):
+        """Telemetry of one lap, generated once per (driver, lap) and then reused."""
+        key = (driver, lap_number)
+        if key not in self._telemetry:
+            lap = self.laps.loc[(self.laps['Driver'] == driver) & (self.laps['LapNumber'] == lap_number)]
+            seed = self.seed * 100000 + DRIVERS.index(driver) * 1000 + lap_number
+            self._telemetry[key] = synthetic_telemetry(seed, self.circuit,
+                                                       lap['LapTime'].iloc[0].total_seconds())
+        return self._telemetry[key]
+
+    def get_circuit_info(self):
+        """Corners and marshal sectors placed on the synthetic track outline."""
+        profile = CIRCUITS[self.circuit]
+
+        def markers(count):
+            distance = profile['length'] / count * (np.arange(count) + 0.5)
+            x, y = track_position(distance, self.circuit)
+            return pd.DataFrame({'X': x, 'Y': y, 'Number': np.arange(1, count + 1),
+                                 'Letter': '', 'Angle': 0.0, 'Distance': distance})
+
+        return SimpleNamespace(corners=markers(profile['corners']), marshal_sectors=markers(MARSHAL_SECTORS),
+                               rotation=0.0)
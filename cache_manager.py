@@ -0,0 +1,88 @@
+"""
+F1 Telemetry Lab - FastF1 Cache CLI
+Author: Sergio Gonzalez
+Description: Inspects and prunes the FastF1 disk cache (see modules/f1_cache.py).
+
+Usage:
+    python cache_manager.py info
+    python cache_manager.py prune [--budget-gb 20] [--dry-run]
+    python cache_manager.py compress [--cold-days 30] [--dry-run]
+    python cache_manager.py prewarm batch_manifest.json [--profile telemetry]
+"""
+
+import argparse
+import sys
+import time
+
+from modules.f1_cache import (COLD_DAYS, F1_CACHE_BYTES, F1_CACHE_DIR, cache_usage, compress_cold, enable_cache,
+                              enforce_budget, list_entries, manifest_sessions)
+from modules.f1_utils import LOAD_PROFILES, get_session_data
+
+def _gb(n_bytes):
+    return f"{n_bytes / 1024 ** 3:.2f} GB"
+
+def _print_entries(entries):
+    now = time.time()
+    for e in entries:
+        age = (now - e['last_access']) / 86400
+        packed = ' (xz)' if e['compressed'] else ''
+        print(f"{e['year']}  {e['event'][:40]:<40} {e['session'][:28]:<28} "
+              f"{e['bytes'] / 1024 ** 2:9.1f} MB  {age:6.1f} days{packed}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and prune the FastF1 disk cache.")
+    parser.add_argument('--cache-dir', default=F1_CACHE_DIR, help="FastF1 cache folder (default: f1_cache)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('info', help="list entries, least recently used first")
+
+    prune = commands.add_parser('prune', help="evict least recently used sessions down to a budget")
+    prune.add_argument('--budget-gb', type=float, default=F1_CACHE_BYTES / 1024 ** 3)
+    prune.add_argument('--dry-run', action='store_true')
+
+    compress = commands.add_parser('compress', help="recompress sessions not loaded for a while")
+    compress.add_argument('--cold-days', type=float, default=COLD_DAYS)
+    compress.add_argument('--dry-run', action='store_true')
+
+    prewarm = commands.add_parser('prewarm', help="download and cache every session of a batch manifest")
+    prewarm.add_argument('manifest')
+    prewarm.add_argument('--profile', choices=list(LOAD_PROFILES), default='full')
+    args = parser.parse_args(argv)
+
+    enable_cache(args.cache_dir)
+
+    if args.command == 'info':
+        _print_entries(list_entries())
+        usage = cache_usage()
+        print(f"{usage['entries']} sessions ({usage['compressed']} compressed): {_gb(usage['session_bytes'])} "
+              f"+ HTTP cache {_gb(usage['http_bytes'])} = {_gb(usage['total_bytes'])}")
+
+    elif args.command == 'prune':
+        evicted = enforce_budget(max_bytes=int(args.budget_gb * 1024 ** 3), dry_run=args.dry_run)
+        _print_entries(evicted)
+        verb = "Would evict" if args.dry_run else "Evicted"
+        print(f"{verb} {len(evicted)} sessions ({_gb(sum(e['bytes'] for e in evicted))})")
+
+    elif args.command == 'compress':
+        cold, saved = compress_cold(cold_days=args.cold_days, dry_run=args.dry_run)
+        _print_entries(cold)
+        if args.dry_run:
+            print(f"Would compress {len(cold)} sessions")
+        else:
+            print(f"Compressed {len(cold)} sessions, saved {_gb(saved)}")
+
+    else:
+        failed = 0
+        for year, gp, session_type in manifest_sessions(args.manifest):
+            start = time.perf_counter()
+            try:
+                get_session_data(year, gp, session_type, profile=args.profile)
+                print(f"{year} {gp} {session_type}: {time.perf_counter() - start:.1f}s")
+            except Exception as e:
+                failed += 1
+                print(f"{year} {gp} {session_type}: failed ({e})")
+        return 1 if failed else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,36 @@
+import matplotlib.pyplot as plt
+import os
+from modules import perf
+from modules.f1_utils import get_session_data
+from modules.minisectors import MINI_SECTORS, minisector_table, sector_winners
+from modules.report_plots import (PLOTS_DIR, minisector_options, plot_filename, render_minisectors,
+                                  report_figure_key, save_figure)
+
+# --- Configuration ---
+year, gp, session_type = 2024, 'Spain', 'Q'
+mode = 'equal'  # 'equal' distance mini-sectors or one per 'corners'
+n_sectors = MINI_SECTORS
+use_lap_store = False  # Read laps from the columnar lap store
+log_performance = False  # Append per-stage timings to performance.jsonl
+
+if log_performance:
+    perf.start_run()
+session = get_session_data(year, gp, session_type, lap_store=use_lap_store)
+
+# --- Segment Times ---
+# Every driver's fastest lap is timed through all mini-sectors in one pass
+table = minisector_table(session, mode=mode, n_sectors=n_sectors)
+print(sector_winners(table).round(3).to_string(index=False))
+
+# --- Plotting the Dominance Map ---
+# Each mini-sector is drawn in the colour of its fastest driver
+fig = render_minisectors(session, [], year, gp, mode=mode, n_sectors=n_sectors)
+
+# --- Export & Display ---
+file_name = plot_filename(year, gp, session_type, 'minisectors', [])
+save_figure(fig, os.path.join(PLOTS_DIR, file_name),
+            cache_key=report_figure_key(session, 'minisectors', [], **minisector_options(mode, n_sectors)))
+table.to_csv(os.path.join(PLOTS_DIR, file_name.replace('.png', '.csv')))
+if log_performance:
+    perf.log_run('minisector_map', year=year, gp=gp, session=session_type)
+plt.show()
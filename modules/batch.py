@@ -0,0 +1,249 @@
+"""
+F1 Telemetry Lab - Batch Report Generator
+Author: Sergio Gonzalez
+Description: Renders every figure listed in a report manifest with a process
+             pool. Work is planned per session (one session load for all of
+             its plots), and the largest sessions are split into parts until
+             every worker has one. Figures that are already up to date are
+             skipped.
+
+Manifest format (JSON):
+    {"sessions": [
+        {"year": 2024, "gp": "Spain", "session": "Q",
+         "pairs": [["NOR", "VER"]],
+         "plots": ["telemetry", "delta_map", "heatmap", "inputs_zoom"]},
+        {"year": 2024, "gp": "Spain", "session": "R",
+         "pairs": [["NOR", "VER"]],
+         "plots": ["tyre_deg", "heatmap"],
+         "options": {"tyre_deg": {"tyre": "SOFT", "stint": 1},
+                     "heatmap": {"metric": "median_speed", "laps": "quick"}}}
+    ]}
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+matplotlib.use('Agg')  # Workers render off-screen
+
+import fastf1.plotting
+
+from modules.f1_utils import get_session_data, set_downsampling
+from modules.figure_cache import code_fingerprint, get_figure_cache
+from modules.report_plots import (FIELD_KINDS, PLOT_KINDS, PLOTS_DIR, SINGLE_DRIVER_KINDS, TIMING_KINDS,
+                                  plot_filename, report_figure_key, write_figure_bytes)
+
+# Smallest part a session's figures are split into: below this, loading the
+# session again costs more than the rendering it spreads over the cores
+MIN_FIGURES_PER_JOB = 2
+
+# Output file name -> code_fingerprint() it was rendered with, kept in the output folder
+RENDER_STAMPS_FILE = '.render_stamps.json'
+
+def load_render_stamps(out_dir=PLOTS_DIR):
+    """Code fingerprints of the rendered outputs of a folder ({} when none were recorded)."""
+    try:
+        with open(os.path.join(out_dir, RENDER_STAMPS_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_render_stamps(stamps, out_dir=PLOTS_DIR):
+    """Writes the code fingerprints of the rendered outputs, replacing the file atomically."""
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, RENDER_STAMPS_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(stamps, f, indent=1, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+def plan_jobs(manifest, out_dir=PLOTS_DIR, force=False, since=0.0):
+    """
+    Expands a manifest into one job per session with the outputs still to render.
+
+    Args:
+        manifest (dict): Parsed manifest (see module docstring).
+        out_dir (str): Folder of the rendered figures.
+        force (bool): Re-render outputs that are already up to date.
+        since (float): Timestamp an output must be newer than to count as up to date.
+            It must also have been rendered by the current plotting code (its
+            stamp in RENDER_STAMPS_FILE matches code_fingerprint()).
+
+    Returns:
+        tuple: (jobs, skipped) where jobs is a list of dicts and skipped the
+               number of outputs that did not need rendering.
+    """
+    jobs, skipped, seen = {}, 0, set()
+    stamps, fingerprint = load_render_stamps(out_dir), code_fingerprint()
+    for entry in manifest['sessions']:
+        year, gp, session_type = entry['year'], entry['gp'], entry['session']
+        options = entry.get('options', {})
+
+        outputs = []
+        for kind in entry['plots']:
+            if kind not in PLOT_KINDS:
+                raise ValueError(f"Unknown plot kind '{kind}'. Available: {', '.join(PLOT_KINDS)}")
+            kind_options = options.get(kind, {})
+
+            # Heatmaps and consistency plots are single-driver figures (one per driver
+            # in the pairs), mini-sector maps cover the whole field (one per session)
+            if kind in SINGLE_DRIVER_KINDS:
+                targets = [[d] for pair in entry['pairs'] for d in pair]
+            elif kind in FIELD_KINDS:
+                targets = [[]]
+            else:
+                targets = entry['pairs']
+            for drivers in targets:
+                name = plot_filename(year, gp, session_type, kind, drivers,
+                                     tyre=kind_options.get('tyre', 'SOFT'))
+                path = os.path.join(out_dir, name)
+                if path in seen:
+                    continue
+                seen.add(path)
+
+                if (not force and os.path.exists(path) and os.path.getmtime(path) >= since
+                        and stamps.get(name) == fingerprint):
+                    skipped += 1
+                    continue
+                outputs.append({'kind': kind, 'drivers': list(drivers), 'path': path, 'options': kind_options})
+
+        if outputs:
+            # Entries of the same session share one job (one session load)
+            key = (year, gp, session_type, entry.get('lap_store', False))
+            if key not in jobs:
+                jobs[key] = {'year': year, 'gp': gp, 'session': session_type,
+                             'lap_store': key[3], 'outputs': []}
+            jobs[key]['outputs'].extend(outputs)
+    return list(jobs.values()), skipped
+
+def split_jobs(jobs, workers):
+    """
+    Splits the session jobs with the most figures in halves until there is one
+    job per worker, so a manifest of a few sessions keeps every core busy.
+    Every part loads its session again (from the FastF1 disk cache).
+
+    Args:
+        jobs (list): Jobs from plan_jobs.
+        workers (int): Worker processes.
+
+    Returns:
+        list: The same outputs, with the largest sessions split into parts.
+    """
+    jobs = list(jobs)
+    while jobs and len(jobs) < workers:
+        largest = max(jobs, key=lambda job: len(job['outputs']))
+        outputs = largest['outputs']
+        if len(outputs) < 2 * MIN_FIGURES_PER_JOB:
+            break
+        half = len(outputs) // 2
+        jobs.remove(largest)
+        jobs += [dict(largest, outputs=outputs[:half]), dict(largest, outputs=outputs[half:])]
+    return jobs
+
+def _init_worker(downsample=False):
+    fastf1.plotting.setup_mpl(mpl_timedelta_support=True, color_scheme='fastf1')
+    # Reports are publication renders: every sample is drawn unless asked otherwise
+    set_downsampling(downsample)
+
+def render_session(job):
+    """
+    Worker: loads one session and renders the pending figures of the job.
+
+    Returns:
+        tuple: (rendered paths, list of (path, error message))
+    """
+    # Strategy-only sessions skip car telemetry entirely
+    timing_only = all(output['kind'] in TIMING_KINDS for output in job['outputs'])
+    session = get_session_data(job['year'], job['gp'], job['session'], lap_store=job['lap_store'],
+                               profile='timing' if timing_only else 'telemetry')
+
+    rendered, errors = [], []
+    for output in job['outputs']:
+        try:
+            # Shared figure cache: reuse an identical figure rendered by the
+            # app or a script, and warm the dashboard with new ones
+            key = report_figure_key(session, output['kind'], output['drivers'], **output['options'])
+            data = get_figure_cache().get_or_render(
+                key,
+                lambda: PLOT_KINDS[output['kind']](session, output['drivers'], job['year'], job['gp'],
+                                                   **output['options']),
+                style='report')
+            write_figure_bytes(data, output['path'])
+            rendered.append(output['path'])
+        except Exception as e:
+            errors.append((output['path'], str(e)))
+    return rendered, errors
+
+def run_batch(manifest_path, workers=None, out_dir=PLOTS_DIR, force=False, downsample=False):
+    """
+    Renders every out-of-date figure of a manifest in parallel.
+
+    An output is up to date when it is newer than the manifest and was
+    rendered with the current code fingerprint (a hash of the plotting code,
+    see figure_cache.code_fingerprint), recorded in RENDER_STAMPS_FILE of
+    out_dir. Touching or checking out a file without changing it keeps the
+    outputs; an edit redraws them, and figure cache keys include the same
+    fingerprint so they are not served from the cache.
+
+    Args:
+        manifest_path (str): Path of the JSON manifest.
+        workers (int): Process count (default: all cores).
+        out_dir (str): Folder of the rendered figures.
+        force (bool): Re-render everything.
+        downsample (bool): Downsample telemetry lines to the plot width
+            (faster draft renders) instead of drawing every sample.
+
+    Returns:
+        int: Number of failed figures.
+    """
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    jobs, skipped = plan_jobs(manifest, out_dir, force, since=os.path.getmtime(manifest_path))
+    total = sum(len(job['outputs']) for job in jobs)
+    workers = workers or os.cpu_count()
+    sessions = len(jobs)
+    jobs = split_jobs(jobs, workers)
+    print(f"{total} figures to render across {sessions} sessions in {len(jobs)} jobs ({skipped} up to date)")
+    if not jobs:
+        return 0
+
+    start = time.perf_counter()
+    failures = 0
+    stamps, fingerprint = load_render_stamps(out_dir), code_fingerprint()
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), initializer=_init_worker,
+                             initargs=(downsample,)) as pool:
+        futures = {pool.submit(render_session, job): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            label = f"{job['year']} {job['gp']} {job['session']}"
+            try:
+                rendered, errors = future.result()
+            except Exception as e:
+                # The session itself could not be loaded
+                print(f"[{label}] failed: {e}")
+                failures += len(job['outputs'])
+                continue
+            for path in rendered:
+                stamps[os.path.basename(path)] = fingerprint
+                print(f"[{label}] saved {path}")
+            for path, message in errors:
+                print(f"[{label}] error in {path}: {message}")
+            failures += len(errors)
+    save_render_stamps(stamps, out_dir)
+
+    print(f"Done in {time.perf_counter() - start:.1f}s ({failures} failed)")
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a report manifest of F1 Telemetry Lab figures.")
+    parser.add_argument('manifest', help="JSON manifest of sessions, driver pairs and plot kinds")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('-o', '--out-dir', default=PLOTS_DIR, help="output folder (default: plots)")
+    parser.add_argument('-f', '--force', action='store_true', help="re-render figures that are up to date")
+    parser.add_argument('--downsample', action='store_true',
+                        help="downsample telemetry lines to the plot width (draft renders)")
+    args = parser.parse_args(argv)
+    return 1 if run_batch(args.manifest, args.workers, args.out_dir, args.force, args.downsample) else 0
@@ -0,0 +1,269 @@
+"""
+F1 Telemetry Lab - Circuit Geometry Module
+Author: Sergio Gonzalez
+Description: Per-circuit geometry index, built once from a session and
+             persisted to disk: a reference centreline resampled by distance,
+             corner and marshal sector positions, and a KD-tree over the
+             centreline that projects any X/Y sample to track distance in
+             O(log n). Corner labels, track maps and position-to-distance
+             lookups all share it, for every circuit.
+"""
+
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from modules.f1_utils import get_lap_telemetry
+
+CIRCUIT_DIR = 'circuit_index'
+
+# Spacing of the resampled centreline in meters
+CENTERLINE_STEP_M = 5.0
+
+# Columns kept for corners and marshal sectors (as in FastF1's CircuitInfo)
+MARKER_COLUMNS = ['Number', 'Letter', 'X', 'Y', 'Angle', 'Distance']
+
+_geometry_cache = {}  # (root folder, circuit_id) -> CircuitGeometry
+_build_lock = threading.Lock()
+
+def circuit_id(session):
+    """
+    Identifier of a circuit layout: year and location (layouts change between
+    seasons, e.g. Barcelona dropped its final chicane in 2023).
+
+    Args:
+        session (Session): FastF1 session (or LapStoreSession).
+
+    Returns:
+        str: e.g. '2024_Barcelona'.
+    """
+    location = str(session.event['Location']).replace(' ', '_').replace('/', '_')
+    return f"{session.event['EventDate'].year}_{location}"
+
+def _markers(frame):
+    """Corner or marshal sector table reduced to MARKER_COLUMNS (empty if missing)."""
+    if frame is None or len(frame) == 0:
+        return pd.DataFrame({name: pd.Series(dtype=object if name == 'Letter' else float)
+                             for name in MARKER_COLUMNS})
+    frame = pd.DataFrame(frame).reset_index(drop=True)
+    for name in MARKER_COLUMNS:
+        if name not in frame:
+            frame[name] = '' if name == 'Letter' else 0.0
+    return frame[MARKER_COLUMNS].copy()
+
+class CircuitGeometry:
+    """
+    Reference centreline of one circuit with its corners and marshal sectors.
+
+    Args:
+        distance (np.ndarray): Evenly spaced distances from the start line (m).
+        x, y (np.ndarray): Centreline position at those distances (1/10 m,
+            FastF1's position units).
+        corners (DataFrame): Corners with MARKER_COLUMNS.
+        marshal_sectors (DataFrame): Marshal sectors with MARKER_COLUMNS.
+        rotation (float): Map rotation in degrees (FastF1's CircuitInfo.rotation).
+        name (str): circuit_id() of the layout.
+
+    Attributes:
+        length (float): Lap length along the centreline in meters.
+    """
+
+    def __init__(self, distance, x, y, corners=None, marshal_sectors=None, rotation=0.0, name=None):
+        self.distance = np.asarray(distance, dtype=np.float64)
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.rotation = float(rotation)
+        self.name = name
+
+        # The closing segment (last point back to the start line) makes the loop continuous
+        self.step = self.distance[1] - self.distance[0]
+        self.length = self.distance[-1] + self.step
+        self._tree = cKDTree(np.column_stack([self.x, self.y]))
+
+        # Marker distances are re-projected so they share the centreline's distance scale
+        self.corners = self._locate(_markers(corners))
+        self.marshal_sectors = self._locate(_markers(marshal_sectors))
+
+    def _locate(self, markers):
+        if len(markers):
+            markers['Distance'] = self.project(markers['X'].to_numpy(float), markers['Y'].to_numpy(float))
+        return markers
+
+    def project(self, x, y):
+        """
+        Projects positions onto the centreline.
+
+        The nearest centreline point is found with the KD-tree; the position is
+        then projected onto the two segments around it, so the result is not
+        quantized to CENTERLINE_STEP_M.
+
+        Args:
+            x, y (array-like): Positions in FastF1 units.
+
+        Returns:
+            np.ndarray: Track distance of every position in [0, length).
+        """
+        points = np.column_stack([np.ravel(x), np.ravel(y)]).astype(np.float64)
+        _, nearest = self._tree.query(points)
+
+        n = len(self.x)
+        best_dist = np.full(len(points), np.inf)
+        best_pos = np.zeros(len(points))
+        for segment in ((nearest - 1) % n, nearest):
+            end = (segment + 1) % n
+            ax, ay = self.x[segment], self.y[segment]
+            dx, dy = self.x[end] - ax, self.y[end] - ay
+            seg_len_sq = np.maximum(dx * dx + dy * dy, 1e-12)
+            t = np.clip(((points[:, 0] - ax) * dx + (points[:, 1] - ay) * dy) / seg_len_sq, 0.0, 1.0)
+            off_sq = (ax + t * dx - points[:, 0]) ** 2 + (ay + t * dy - points[:, 1]) ** 2
+            closer = off_sq < best_dist
+            best_dist = np.where(closer, off_sq, best_dist)
+            best_pos = np.where(closer, self.distance[segment] + t * self.step, best_pos)
+        return np.mod(best_pos, self.length).reshape(np.shape(x))
+
+    def nearest(self, x, y, max_offset=np.inf):
+        """
+        Nearest centreline point of every position.
+
+        Args:
+            x, y (array-like): Positions in FastF1 units.
+            max_offset (float): Positions further than this from the centreline
+                (FastF1 units) get -1.
+
+        Returns:
+            np.ndarray: Centreline index of every position, or -1.
+        """
+        points = np.column_stack([np.ravel(x), np.ravel(y)]).astype(np.float64)
+        _, nearest = self._tree.query(points, distance_upper_bound=max_offset)
+        return np.where(nearest < len(self.x), nearest, -1).reshape(np.shape(x))
+
+    def position(self, distance, lap_length=None):
+        """
+        Centreline position at track distances (wrapping past the line).
+
+        Args:
+            distance (array-like): Distances in meters.
+            lap_length (float): Length of the lap the distances come from. When
+                given, distances are rescaled to the centreline length, so a lap
+                whose integrated distance is slightly longer still closes the loop.
+
+        Returns:
+            tuple: (x, y) arrays.
+        """
+        distance = np.asarray(distance, dtype=np.float64)
+        if lap_length:
+            distance = distance * (self.length / lap_length)
+        d = np.mod(distance, self.length)
+        loop_d = np.append(self.distance, self.length)
+        return (np.interp(d, loop_d, np.append(self.x, self.x[0])),
+                np.interp(d, loop_d, np.append(self.y, self.y[0])))
+
+    def corner_labels(self, start=None, end=None, lap_length=None):
+        """
+        Corner labels within a distance window.
+
+        Args:
+            start (float): Window start in meters, None for the lap start.
+            end (float): Window end in meters, None for the lap end.
+            lap_length (float): Length of the lap the window refers to; corner
+                distances are rescaled to it (see position()).
+
+        Returns:
+            list: (distance, label) tuples, e.g. (1520.3, 'T4'), in track order.
+        """
+        scale = lap_length / self.length if lap_length else 1.0
+        labels = []
+        for number, letter, dist in zip(self.corners['Number'], self.corners['Letter'], self.corners['Distance']):
+            dist *= scale
+            if (start is None or dist >= start) and (end is None or dist <= end):
+                labels.append((float(dist), f"T{int(number)}{letter or ''}"))
+        return sorted(labels)
+
+    @classmethod
+    def from_session(cls, session):
+        """
+        Builds the geometry from a session's fastest lap and its circuit info.
+
+        Args:
+            session (Session): Session with lap timing (telemetry is loaded on demand).
+
+        Returns:
+            CircuitGeometry: Geometry of the session's layout.
+        """
+        lap = session.laps.pick_fastest()
+        if lap is None:
+            raise ValueError("The session has no timed lap to build the circuit geometry from.")
+        tel = get_lap_telemetry(lap)
+
+        # 1. Centreline resampled every CENTERLINE_STEP_M along the reference lap
+        distance = np.arange(0.0, float(tel.distance[-1]), CENTERLINE_STEP_M)
+        x = np.interp(distance, tel.distance, tel.x)
+        y = np.interp(distance, tel.distance, tel.y)
+
+        # 2. Corners and marshal sectors (circuit info is not available for every session)
+        try:
+            info = session.get_circuit_info()
+        except Exception:
+            info = None
+        return cls(distance, x, y,
+                   corners=getattr(info, 'corners', None),
+                   marshal_sectors=getattr(info, 'marshal_sectors', None),
+                   rotation=getattr(info, 'rotation', 0.0) or 0.0,
+                   name=circuit_id(session))
+
+    def save(self, path):
+        """Writes the geometry to a directory (meta.json last, like the lap store)."""
+        os.makedirs(path, exist_ok=True)
+        np.savez(os.path.join(path, 'centerline.npz'), distance=self.distance, x=self.x, y=self.y)
+        self.corners.to_parquet(os.path.join(path, 'corners.parquet'))
+        self.marshal_sectors.to_parquet(os.path.join(path, 'marshal_sectors.parquet'))
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump({'name': self.name, 'rotation': self.rotation, 'length': self.length}, f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        """Reads a geometry written by save(); the KD-tree is rebuilt (a few ms)."""
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        centerline = np.load(os.path.join(path, 'centerline.npz'))
+        return cls(centerline['distance'], centerline['x'], centerline['y'],
+                   corners=pd.read_parquet(os.path.join(path, 'corners.parquet')),
+                   marshal_sectors=pd.read_parquet(os.path.join(path, 'marshal_sectors.parquet')),
+                   rotation=meta['rotation'], name=meta['name'])
+
+def get_circuit_geometry(session, root=CIRCUIT_DIR):
+    """
+    Geometry of a session's circuit: from memory, else from disk, else built
+    from the session and persisted.
+
+    Geometries built without circuit info (no corners) are kept in memory
+    only, so a later session with circuit info can still persist a full one.
+
+    Args:
+        session (Session): FastF1 session (or LapStoreSession).
+        root (str): Base directory of persisted geometries.
+
+    Returns:
+        CircuitGeometry: Shared geometry of the layout.
+    """
+    name = circuit_id(session)
+    # Keyed by folder too: geometries persisted under another root are not shared
+    key = (os.path.abspath(root), name)
+    if key in _geometry_cache:
+        return _geometry_cache[key]
+
+    with _build_lock:
+        if key not in _geometry_cache:
+            path = os.path.join(root, name)
+            if os.path.exists(os.path.join(path, 'meta.json')):
+                geometry = CircuitGeometry.load(path)
+            else:
+                geometry = CircuitGeometry.from_session(session)
+                if len(geometry.corners):
+                    geometry.save(path)
+            _geometry_cache[key] = geometry
+    return _geometry_cache[key]
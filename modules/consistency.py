@@ -0,0 +1,253 @@
+"""
+F1 Telemetry Lab - Lap Consistency Module
+Author: Sergio Gonzalez
+Description: Telemetry-level consistency of one driver over a race. Every
+             quick lap is resampled onto a common distance grid and stored
+             in one float32 (laps x grid x channel) tensor. Per-point
+             mean/std/min/max bands are kept as running sums, so adding laps
+             (new laps of a live session, a wider lap range) only interpolates
+             the new ones; narrowing the selection drops rows and rebuilds the
+             bands from the laps still stored.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from modules.delta_engine import interp_batch
+from modules.f1_utils import GRID_POINTS, get_laps_telemetry, lap_key, session_key
+from modules.lap_pool import as_lap_list
+
+# Channels of the consistency tensor, in its last-axis order. Brake is
+# interpolated as 0/1, so its mean is the share of laps braking at a point.
+CONSISTENCY_CHANNELS = ['Speed', 'Throttle', 'Brake']
+
+# Drivers' consistency tensors kept in memory (least recently used are dropped)
+CONSISTENCY_CACHE_SIZE = 8
+
+_consistency_cache = OrderedDict()
+_consistency_lock = threading.Lock()  # Held for the LRU updates only
+
+class LapConsistency:
+    """
+    Laps of one driver aligned on a fixed distance grid, with running per-point
+    statistics.
+
+    Args:
+        distance (np.ndarray): Common distance grid in meters. It stays fixed
+            so laps added later line up with the ones already stored.
+        channels (list): Channel names (last axis of the tensor).
+        capacity (int): Initial lap capacity; the buffer doubles when full.
+
+    Attributes:
+        lap_numbers (list): Lap number of every row of the tensor.
+        lock (threading.Lock): Serializes updates of a shared (cached) tensor.
+    """
+
+    def __init__(self, distance, channels=CONSISTENCY_CHANNELS, capacity=16):
+        self.distance = np.asarray(distance, dtype=np.float64)
+        self.channels = list(channels)
+        self.lap_numbers = []
+        self.lock = threading.Lock()
+        self._row_keys = []
+        self._keys = set()
+        shape = (len(self.distance), len(self.channels))
+        self._data = np.empty((capacity,) + shape, dtype=np.float32)
+        self._reset_statistics()
+
+    def _reset_statistics(self):
+        """Empty running statistics over the laps axis (float64 to keep the sums exact enough)."""
+        shape = self._data.shape[1:]
+        self._sum = np.zeros(shape)
+        self._sum_sq = np.zeros(shape)
+        self._min = np.full(shape, np.inf)
+        self._max = np.full(shape, -np.inf)
+
+    def _fold(self, block):
+        """Folds a (laps x grid x channel) block into the running statistics."""
+        self._sum += block.sum(axis=0, dtype=np.float64)
+        self._sum_sq += np.square(block, dtype=np.float64).sum(axis=0)
+        np.minimum(self._min, block.min(axis=0), out=self._min)
+        np.maximum(self._max, block.max(axis=0), out=self._max)
+
+    def __len__(self):
+        return len(self.lap_numbers)
+
+    @property
+    def tensor(self):
+        """(laps x grid x channel) float32 view of the stored laps, in insertion order."""
+        return self._data[:len(self)]
+
+    def add_laps(self, laps, workers=None):
+        """
+        Aligns and stores the laps not seen yet; stored laps are not touched.
+
+        Args:
+            laps (Laps or list): Laps of this driver.
+            workers (int): Concurrent telemetry extractions (see get_laps_telemetry).
+
+        Returns:
+            int: Number of laps added.
+        """
+        new, new_keys = [], []
+        for lap in as_lap_list(laps):
+            key = lap_key(lap)
+            if key not in self._keys and key not in new_keys:
+                new_keys.append(key)
+                new.append(lap)
+        if not new:
+            return 0
+
+        # 1. Batched interpolation of the new laps only: (laps x grid x channel)
+        interp = interp_batch(self.distance, get_laps_telemetry(new, workers), self.channels)
+        block = np.stack([interp[name] for name in self.channels], axis=-1).astype(np.float32)
+
+        # 2. Append, growing the buffer geometrically
+        n, end = len(self), len(self) + len(block)
+        if end > len(self._data):
+            grown = np.empty((max(end, 2 * len(self._data)),) + self._data.shape[1:], dtype=np.float32)
+            grown[:n] = self._data[:n]
+            self._data = grown
+        self._data[n:end] = block
+        self.lap_numbers.extend(int(lap['LapNumber']) for lap in new)
+        self._row_keys.extend(new_keys)
+        self._keys.update(new_keys)
+
+        # 3. Fold the block into the running statistics
+        self._fold(block)
+        return len(new)
+
+    def retain_laps(self, keys):
+        """
+        Drops the stored laps whose lap_key() is not in keys. Minima and maxima
+        cannot be unwound from running sums, so the statistics are rebuilt from
+        the remaining rows (no laps are interpolated again).
+
+        Args:
+            keys (set): lap_key() of the laps to keep.
+
+        Returns:
+            int: Number of laps dropped.
+        """
+        rows = [row for row, key in enumerate(self._row_keys) if key in keys]
+        dropped = len(self) - len(rows)
+        if not dropped:
+            return 0
+
+        self._data[:len(rows)] = self._data[rows]
+        self.lap_numbers = [self.lap_numbers[row] for row in rows]
+        self._row_keys = [self._row_keys[row] for row in rows]
+        self._keys = set(self._row_keys)
+        self._reset_statistics()
+        if rows:
+            self._fold(self.tensor)
+        return dropped
+
+    def snapshot(self):
+        """
+        Copy of the stored laps and statistics, so they can be read while
+        other threads keep updating this tensor. Take it under self.lock.
+
+        Returns:
+            LapConsistency: Independent copy with its own lock.
+        """
+        copy = LapConsistency(self.distance, self.channels, capacity=max(len(self), 1))
+        copy._data[:len(self)] = self.tensor
+        copy.lap_numbers = list(self.lap_numbers)
+        copy._row_keys = list(self._row_keys)
+        copy._keys = set(self._keys)
+        copy._sum, copy._sum_sq = self._sum.copy(), self._sum_sq.copy()
+        copy._min, copy._max = self._min.copy(), self._max.copy()
+        return copy
+
+    def _moments(self):
+        """Per-point (mean, std) across the stored laps, from the running sums."""
+        n = max(len(self), 1)
+        mean = self._sum / n
+        return mean, np.sqrt(np.maximum(self._sum_sq / n - mean ** 2, 0.0))
+
+    def bands(self):
+        """
+        Per-point statistics across the stored laps.
+
+        Returns:
+            dict: Channel name -> {'mean', 'std', 'min', 'max'} arrays over the grid.
+        """
+        mean, std = self._moments()
+        return {name: {'mean': mean[:, c], 'std': std[:, c], 'min': self._min[:, c], 'max': self._max[:, c]}
+                for c, name in enumerate(self.channels)}
+
+    def deviation(self):
+        """
+        Deviation score of every stored lap: RMS distance from the mean lap,
+        each channel scaled by its average spread so speed (km/h) does not
+        outweigh the pedal channels.
+
+        Returns:
+            np.ndarray: One score per lap (0 for a lap identical to the mean).
+        """
+        if not len(self):
+            return np.empty(0)
+        mean, std = self._moments()
+        scale = std.mean(axis=0)
+        scale[scale == 0] = 1.0
+        z = (self.tensor - mean) / scale
+        return np.sqrt(np.mean(np.square(z), axis=(1, 2)))
+
+    def most_deviating(self):
+        """
+        Returns:
+            tuple: (lap number, row in the tensor) of the lap furthest from the
+            mean, or None if no lap is stored.
+        """
+        if not len(self):
+            return None
+        row = int(np.argmax(self.deviation()))
+        return self.lap_numbers[row], row
+
+def get_lap_consistency(session, driver, laps=None, workers=None):
+    """
+    Consistency tensor of one driver, updated in place to hold exactly the
+    requested laps: laps it does not hold yet are interpolated and added,
+    laps outside the selection are dropped.
+
+    The tensor is cached per (session, driver); its grid spans the driver's
+    fastest lap of the first call. The caller gets a snapshot taken once the
+    update is done, so a concurrent call with another lap selection cannot
+    change it while it is read. By default every quick lap is used
+    (pick_quicklaps removes in/out laps and slow laps under yellow flags).
+
+    Args:
+        session (Session): Loaded FastF1 session.
+        driver (str): Driver code (e.g., 'NOR').
+        laps (Laps): Laps to include (default: the driver's quick laps).
+        workers (int): Concurrent telemetry extractions for new laps.
+
+    Returns:
+        LapConsistency: Snapshot of the tensor and statistics of the included laps.
+    """
+    if laps is None:
+        laps = session.laps.pick_drivers(driver).pick_quicklaps()
+
+    key = (session_key(session), driver)
+    with _consistency_lock:
+        consistency = _consistency_cache.get(key)
+    if consistency is None:
+        fastest = laps.pick_fastest()
+        if fastest is None:
+            raise ValueError(f"No quick laps with telemetry for {driver}.")
+        reference = get_laps_telemetry([fastest])[0]
+        consistency = LapConsistency(np.linspace(0, reference.distance.max(), GRID_POINTS))
+    with _consistency_lock:
+        # Another thread may have created the tensor meanwhile: keep one
+        consistency = _consistency_cache.setdefault(key, consistency)
+        _consistency_cache.move_to_end(key)
+        if len(_consistency_cache) > CONSISTENCY_CACHE_SIZE:
+            _consistency_cache.popitem(last=False)
+
+    laps = as_lap_list(laps)
+    with consistency.lock:
+        consistency.retain_laps({lap_key(lap) for lap in laps})
+        consistency.add_laps(laps, workers)
+        return consistency.snapshot()
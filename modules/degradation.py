@@ -0,0 +1,219 @@
+"""
+F1 Telemetry Lab - Tyre Degradation Module
+Author: Sergio Gonzalez
+Description: Fuel-corrected pace models for every (driver, stint, compound)
+             of a race in one grouped pass. Per-group sums of powers of tyre
+             age are accumulated with np.bincount and all normal equations
+             are solved as one stacked np.linalg.solve, so fitting the whole
+             field costs about the same as fitting a single stint.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from modules.f1_utils import session_key
+
+# Lap time gained per lap of fuel burned (~1.7 kg/lap at ~0.035 s/kg).
+# Lap times are corrected to the pace of an empty car.
+FUEL_EFFECT_S_PER_LAP = 0.06
+
+# Columns identifying one fitted stint
+DEG_GROUP_KEYS = ['Driver', 'Stint', 'Compound']
+
+# Pace model -> polynomial degree in tyre age
+DEG_MODELS = {'linear': 1, 'quadratic': 2}
+
+# The projected cliff is the tyre age at which the fitted pace has dropped
+# this many seconds from the stint's fresh-tyre pace
+CLIFF_LOSS_S = 1.5
+
+# Fitted tables kept per (session, model, fuel effect)
+DEG_CACHE_SIZE = 16
+
+_deg_cache = OrderedDict()
+_deg_lock = threading.Lock()  # Held for the LRU updates only, never while fitting
+
+def _group_sums(group, values, n_groups):
+    return np.bincount(group, weights=values, minlength=n_groups)
+
+def _cliff_age(slope, curvature, loss=CLIFF_LOSS_S):
+    """
+    Smallest positive tyre age x with slope * x + curvature * x**2 = loss
+    (NaN when the model never loses that much time).
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        linear = np.where(slope > 0, loss / slope, np.nan)
+        root = np.sqrt(slope ** 2 + 4 * curvature * loss)
+        # Both roots of the quadratic; keep the smallest positive one
+        r1 = (-slope + root) / (2 * curvature)
+        r2 = (-slope - root) / (2 * curvature)
+        r1 = np.where(r1 > 0, r1, np.inf)
+        r2 = np.where(r2 > 0, r2, np.inf)
+        quadratic = np.minimum(r1, r2)
+        quadratic = np.where(np.isfinite(quadratic), quadratic, np.nan)
+    return np.where(curvature == 0, linear, quadratic)
+
+def clean_race_laps(laps):
+    """
+    Laps that represent race pace: quick laps (within 107% of the fastest
+    lap of the selection) without pit in/out laps, with a lap time and a
+    known stint and tyre age.
+
+    Args:
+        laps (Laps): Laps of one or more drivers.
+
+    Returns:
+        Laps: Filtered selection.
+    """
+    laps = laps.pick_quicklaps().pick_wo_box()
+    return laps[laps['LapTime'].notna() & laps['Stint'].notna() & laps['TyreLife'].notna()]
+
+def fit_degradation(laps, model='linear', fuel_effect=FUEL_EFFECT_S_PER_LAP, total_laps=None,
+                    keys=DEG_GROUP_KEYS):
+    """
+    Fits a fuel-corrected pace model to every stint of a laps table at once.
+
+    Each group's corrected lap times are modelled as a polynomial in tyre
+    age (TyreLife). Tyre age is centred per group before solving so the
+    normal equations stay well conditioned.
+
+    Args:
+        laps (DataFrame): Clean race laps (see clean_race_laps) with LapTime,
+            LapNumber, TyreLife and the group keys.
+        model (str): Key of DEG_MODELS ('linear' or 'quadratic').
+        fuel_effect (float): Seconds gained per lap of fuel burned.
+        total_laps (int or array): Race distance in laps for the fuel
+            correction, or one value per lap when the table mixes races
+            (default: the highest lap number in the table).
+        keys (list): Columns defining one group (e.g. add an event column
+            when fitting several races in one table).
+
+    Returns:
+        DataFrame: One row per group with the keys and Laps, FirstLap,
+        LastLap, TyreLifeStart, BasePace (s, fresh tyre, empty car),
+        DegRate (s/lap at the stint's mean tyre age), Curvature (s/lap²,
+        0 for the linear model), ResidualStd (s), CliffTyreLife and
+        CliffLap (NaN when no cliff is projected). Groups with too few
+        distinct tyre ages for the model have NaN fit columns.
+    """
+    degree = DEG_MODELS[model]
+    frame = pd.DataFrame(laps)
+    if total_laps is None:
+        total_laps = frame['LapNumber'].max()
+
+    # 1. Group ids in one factorization of the key columns
+    group, index = pd.MultiIndex.from_frame(frame[keys]).factorize()
+    n_groups = len(index)
+    lap_number = frame['LapNumber'].to_numpy(dtype=np.float64)
+    age = frame['TyreLife'].to_numpy(dtype=np.float64)
+    # Empty-car pace: remove the time the remaining fuel still costs
+    pace = frame['LapTime'].dt.total_seconds().to_numpy() - fuel_effect * (np.asarray(total_laps) - lap_number)
+
+    # 2. Centre tyre age per group
+    count = np.bincount(group, minlength=n_groups).astype(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_age = _group_sums(group, age, n_groups) / count
+    x = age - mean_age[group]
+
+    # 3. Normal equations for every group: A[g] = sum x^(i+j), b[g] = sum x^i * y
+    powers = np.stack([x ** k for k in range(2 * degree + 1)])
+    moments = np.stack([_group_sums(group, p, n_groups) for p in powers], axis=1)
+    rhs = np.stack([_group_sums(group, powers[k] * pace, n_groups) for k in range(degree + 1)], axis=1)
+    exponents = np.add.outer(np.arange(degree + 1), np.arange(degree + 1))
+    normal = moments[:, exponents]
+
+    # A polynomial of this degree needs degree + 1 distinct tyre ages (and one
+    # more lap to estimate the residual noise)
+    order = np.lexsort((age, group))
+    first = np.r_[True, (np.diff(group[order]) != 0) | (np.diff(age[order]) != 0)]
+    distinct = np.bincount(group[order][first], minlength=n_groups)
+    valid = (distinct > degree) & (count > degree + 1)
+    coef = np.full((n_groups, degree + 1), np.nan)
+    if valid.any():
+        coef[valid] = np.linalg.solve(normal[valid], rhs[valid][..., None])[..., 0]
+
+    # 4. Residual noise from the fitted values of every lap
+    fitted = sum(coef[group, k] * powers[k] for k in range(degree + 1))
+    ssr = _group_sums(group, (pace - fitted) ** 2, n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        residual_std = np.sqrt(ssr / (count - degree - 1))
+
+    # 5. Back to uncentred tyre age: pace(a) = base + slope0 * a + curvature * a^2
+    c0, c1 = coef[:, 0], coef[:, 1]
+    curvature = coef[:, 2] if degree == 2 else np.zeros(n_groups)
+    slope0 = c1 - 2 * curvature * mean_age
+    base = c0 - c1 * mean_age + curvature * mean_age ** 2
+    cliff_age = _cliff_age(slope0, curvature)
+
+    first_lap = pd.Series(lap_number).groupby(group).min().to_numpy()
+    last_lap = pd.Series(lap_number).groupby(group).max().to_numpy()
+    start_age = pd.Series(age).groupby(group).min().to_numpy()
+
+    table = index.to_frame(index=False, name=keys)
+    table['Laps'] = count.astype(int)
+    table['FirstLap'] = first_lap.astype(int)
+    table['LastLap'] = last_lap.astype(int)
+    table['TyreLifeStart'] = start_age
+    table['BasePace'] = np.where(valid, base, np.nan)
+    table['DegRate'] = np.where(valid, c1, np.nan)
+    table['Curvature'] = np.where(valid, curvature, np.nan)
+    table['ResidualStd'] = np.where(valid, residual_std, np.nan)
+    table['CliffTyreLife'] = cliff_age
+    table['CliffLap'] = first_lap + (cliff_age - start_age)
+    return table.sort_values(keys, ignore_index=True)
+
+def get_degradation_table(session, model='linear', fuel_effect=FUEL_EFFECT_S_PER_LAP):
+    """
+    Degradation table of a whole race, fitted once per session and model and
+    then served from memory.
+
+    Args:
+        session (Session): Session loaded with lap timing.
+        model (str): Key of DEG_MODELS.
+        fuel_effect (float): Seconds gained per lap of fuel burned.
+
+    Returns:
+        DataFrame: See fit_degradation.
+    """
+    key = (session_key(session), model, fuel_effect)
+    with _deg_lock:
+        if key in _deg_cache:
+            _deg_cache.move_to_end(key)
+            return _deg_cache[key]
+
+    # Race distance from the full table: filtered laps may end before the flag
+    table = fit_degradation(clean_race_laps(session.laps), model, fuel_effect,
+                            total_laps=session.laps['LapNumber'].max())
+    with _deg_lock:
+        table = _deg_cache.setdefault(key, table)
+        _deg_cache.move_to_end(key)
+        if len(_deg_cache) > DEG_CACHE_SIZE:
+            _deg_cache.popitem(last=False)
+    return table
+
+def fit_degradation_sessions(sessions, model='linear', fuel_effect=FUEL_EFFECT_S_PER_LAP):
+    """
+    Degradation table of several races (e.g. a season) in a single fit: the
+    clean laps of every session are stacked and grouped by event as well.
+
+    Args:
+        sessions (list): Race sessions loaded with lap timing.
+        model (str): Key of DEG_MODELS.
+        fuel_effect (float): Seconds gained per lap of fuel burned.
+
+    Returns:
+        DataFrame: fit_degradation table with leading Year and EventName columns.
+    """
+    frames = []
+    for session in sessions:
+        laps = pd.DataFrame(clean_race_laps(session.laps))
+        laps['Year'] = session.event['EventDate'].year
+        laps['EventName'] = session.event['EventName']
+        laps['TotalLaps'] = session.laps['LapNumber'].max()
+        frames.append(laps)
+    laps = pd.concat(frames, ignore_index=True)
+    return fit_degradation(laps, model, fuel_effect, total_laps=laps['TotalLaps'].to_numpy(),
+                           keys=['Year', 'EventName'] + DEG_GROUP_KEYS)
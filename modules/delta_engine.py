@@ -0,0 +1,262 @@
+"""
+F1 Telemetry Lab - Batched Delta Engine
+Author: Sergio Gonzalez
+Description: Aligns N laps onto one common distance grid in one pass of
+             stacked NumPy operations: a shared bracketing of every grid
+             point and one float32 multiply-add over (channel x lap x grid),
+             instead of a Python loop of pairwise np.interp calls. Used for
+             whole-field qualifying debriefs (every driver vs pole), race
+             consistency (every lap vs the driver's best lap) and the
+             N-driver telemetry dashboard.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from modules.f1_utils import (ALIGNED_CHANNELS, ALIGNED_DTYPES, GRID_POINTS, LOD_CHANNELS, get_laps_telemetry,
+                              lap_key)
+from modules.lod import LOD_POINTS, build_pyramid
+from modules.perf import stage
+
+# Aligned lap batches kept in memory (least recently used are dropped)
+BATCH_CACHE_SIZE = 8
+
+# Level-of-detail pyramids kept per lap, shared by every batch the lap is in
+PYRAMID_CACHE_SIZE = 32
+
+_batch_cache = OrderedDict()
+_pyramid_cache = OrderedDict()
+# Guards both LRUs (shared by the analysis service's pool and Streamlit's
+# threads); held for the dict updates only, never while building
+_cache_lock = threading.Lock()
+
+def _stack(tels, names):
+    """
+    Packs N LapTelemetry objects into padded arrays, one row per lap. The
+    padding column after each lap's last sample has distance +inf.
+
+    Returns:
+        tuple: (distance (N x L), seconds (N x L), values (C x N x L) float32,
+        gears (N x L), lengths (N,))
+    """
+    lengths = np.array([len(t) for t in tels])
+    n_samples = lengths.max() + 1  # At least one padding column per lap
+    dist = np.full((len(tels), n_samples), np.inf)
+    seconds = np.zeros((len(tels), n_samples))
+    values = np.zeros((len(names), len(tels), n_samples), dtype=np.float32)
+    gears = np.zeros((len(tels), n_samples), dtype=np.int8)
+
+    for i, tel in enumerate(tels):
+        n = lengths[i]
+        dist[i, :n] = tel.distance
+        seconds[i, :n] = tel.seconds
+        gears[i, :n] = tel.ngear
+        for c, name in enumerate(names):
+            values[c, i, :n] = tel[name]
+    return dist, seconds, values, gears, lengths
+
+def _sample_slopes(values, dist):
+    """Per-sample slopes towards the next sample, zero from the last sample on (value held past the lap)."""
+    slopes = np.zeros(values.shape, dtype=values.dtype)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(np.diff(values, axis=-1), np.diff(dist, axis=-1).astype(values.dtype), out=slopes[..., :-1])
+    slopes[~np.isfinite(slopes)] = 0.0
+    return slopes
+
+def interp_batch(grid, tels, channels=ALIGNED_CHANNELS):
+    """
+    Interpolates the channels of N laps onto one distance grid.
+
+    The laps are padded into (N x samples) arrays and every grid point is
+    bracketed once for all laps and channels (one searchsorted plus a per-row
+    cumulative histogram). Every float channel is then evaluated in one
+    float32 (C x N x grid) gather and multiply-add, y0 + slope * (x - x0).
+    'Time' goes through the same formula in float64 (np.interp's own), so it
+    is bit-identical to the pairwise alignment and so are the deltas; the
+    float32 channels agree with it to float32 rounding.
+
+    Args:
+        grid (np.ndarray): Sorted common distance grid in meters.
+        tels (list): LapTelemetry of every lap.
+        channels (list): Channel names to interpolate. 'Time' is the seconds
+            from the first sample, 'nGear' uses a step lookup.
+
+    Returns:
+        dict: Channel name -> (N x len(grid)) array.
+    """
+    channels = list(channels)
+    floats = [name for name in channels if name not in ('Time', 'nGear')]
+    grid = np.asarray(grid, dtype=np.float64)
+    n_laps, n_grid = len(tels), len(grid)
+    dist, seconds, values, gears, lengths = _stack(tels, floats)
+    n_samples = dist.shape[1]
+    rows = np.arange(n_laps)[:, None]
+
+    # 1. For every grid point, the last sample at or before it (np.interp's
+    #    bracket), for all laps at once: position of every sample on the grid,
+    #    then a per-row cumulative histogram
+    pos = np.searchsorted(grid, dist, side='left')
+    hist = np.bincount((rows * (n_grid + 1) + pos).ravel(), minlength=n_laps * (n_grid + 1))
+    j = np.cumsum(hist.reshape(n_laps, n_grid + 1), axis=1)[:, :n_grid] - 1
+
+    # 2. Flat index of that sample and the distance past it. Before the first
+    #    sample the offset is clipped to 0, after the last one the slope is 0,
+    #    so both ends hold the edge value as np.interp does
+    k = np.clip(j, 0, (lengths - 1)[:, None])
+    k += rows * n_samples
+    dx = grid - dist.ravel().take(k)
+    np.maximum(dx, 0.0, out=dx)
+
+    # 3. One gather and multiply-add per precision
+    result = {}
+    if 'Time' in channels:
+        time = _sample_slopes(seconds, dist).ravel().take(k)
+        time *= dx
+        time += seconds.ravel().take(k)
+        result['Time'] = time
+    if floats:
+        block = _sample_slopes(values, dist).reshape(len(floats), -1).take(k, axis=1)
+        block *= dx.astype(np.float32)
+        block += values.reshape(len(floats), -1).take(k, axis=1)
+        for c, name in enumerate(floats):
+            result[name] = block[c].astype(ALIGNED_DTYPES.get(name, np.float32), copy=False)
+    if 'nGear' in channels:
+        # Step lookup: last gear engaged at or before each grid point
+        result['nGear'] = gears.ravel().take(k)
+    return {name: result[name] for name in channels}
+
+def _lap_pyramid(key, tel):
+    """LOD_CHANNELS pyramid of one lap, from the per-lap LRU when the lap is known."""
+    if key is None:
+        return build_pyramid(tel, LOD_CHANNELS)
+    with _cache_lock:
+        if key in _pyramid_cache:
+            _pyramid_cache.move_to_end(key)
+            return _pyramid_cache[key]
+    pyramid = build_pyramid(tel, LOD_CHANNELS)
+    with _cache_lock:
+        pyramid = _pyramid_cache.setdefault(key, pyramid)
+        _pyramid_cache.move_to_end(key)
+        if len(_pyramid_cache) > PYRAMID_CACHE_SIZE:
+            _pyramid_cache.popitem(last=False)
+    return pyramid
+
+class AlignedLapBatch:
+    """
+    N laps resampled onto the distance grid of a reference lap.
+
+    Attributes:
+        tels (list): LapTelemetry of every lap.
+        keys (list): lap_key() of every lap, None when built from telemetry only.
+        reference (int): Row of the reference lap.
+        distance (np.ndarray): Common distance grid in meters.
+        channels (dict): Channel name -> (N x grid) array.
+    """
+
+    def __init__(self, tels, reference=0, n_points=GRID_POINTS, keys=None):
+        self.tels = tels
+        self.keys = keys or [None] * len(tels)
+        self.reference = reference
+        self.distance = np.linspace(0, tels[reference].distance.max(), n_points)
+        with stage('interpolation'):
+            self.channels = interp_batch(self.distance, tels)
+        self._pyramids = None
+
+    @property
+    def delta(self):
+        """
+        (N x grid) time gap in seconds: reference time minus each lap's time,
+        the same convention as delta_calculator(reference_lap, lap).
+        """
+        time = self.channels['Time']
+        return time[self.reference] - time
+
+    @property
+    def pyramids(self):
+        """TelemetryPyramid of LOD_CHANNELS per lap (one build per lap, see PYRAMID_CACHE_SIZE)."""
+        if self._pyramids is None:
+            with stage('lod.build'):
+                self._pyramids = [_lap_pyramid(key, tel) for key, tel in zip(self.keys, self.tels)]
+        return self._pyramids
+
+    def window(self, name, zoom_range=None, max_points=LOD_POINTS):
+        """
+        Raw-channel samples of every lap for a distance window, at the finest
+        resolution that fits the point budget (see AlignedLapPair.window).
+
+        Returns:
+            list: (distance, values) per lap.
+        """
+        start, end = zoom_range if zoom_range is not None else (None, None)
+        return [p.window(name, start, end, max_points) for p in self.pyramids]
+
+    def delta_window(self, zoom_range=None, max_points=LOD_POINTS):
+        """
+        Time gap of every lap over a distance window, evaluated at the
+        reference lap's raw sample distances when they fit the point budget
+        (an evenly spaced grid otherwise), in one batched interpolation.
+
+        Returns:
+            tuple: (distance, N x len(distance) gaps), same sign convention as delta.
+        """
+        dist_ref = self.tels[self.reference].distance
+        start, end = zoom_range if zoom_range is not None else (0, dist_ref[-1])
+        i0 = max(np.searchsorted(dist_ref, start, side='left') - 1, 0)
+        i1 = np.searchsorted(dist_ref, end, side='right') + 1
+        grid = dist_ref[i0:i1] if i1 - i0 <= max_points else np.linspace(start, end, max_points)
+
+        time = interp_batch(grid, self.tels, ['Time'])['Time']
+        return grid, time[self.reference] - time
+
+def align_lap_batch(laps, reference=0, n_points=GRID_POINTS, workers=None):
+    """
+    Extracts telemetry for N laps (concurrently, see get_laps_telemetry) and
+    aligns them in one batched pass.
+
+    For two laps, align_lap_batch([lap1, lap2]).delta[1] equals
+    delta_calculator(lap1, lap2)[1] exactly.
+
+    Args:
+        laps (list or Laps): Lap objects; a Laps selection is iterated in order.
+        reference (int): Index of the lap that defines the grid and the gap.
+        n_points (int): Resolution of the distance grid.
+        workers (int): Concurrent telemetry extractions (default: all cores).
+
+    Returns:
+        AlignedLapBatch: Stacked channels and deltas for every lap.
+    """
+    tels = get_laps_telemetry(laps, workers)
+    return AlignedLapBatch(tels, reference, n_points)
+
+def get_lap_batch(laps, reference=0, workers=None):
+    """
+    Aligned batch of laps, reusing a cached one for the same laps and
+    reference (LRU of BATCH_CACHE_SIZE). Telemetry and LOD pyramids are
+    cached per lap, so adding one lap to a known set costs one extraction,
+    one pyramid and a batched interpolation.
+
+    Args:
+        laps (list): Lap objects, in plot order.
+        reference (int): Index of the reference lap (gap baseline and grid).
+        workers (int): Concurrent telemetry extractions (see get_laps_telemetry).
+
+    Returns:
+        AlignedLapBatch: Shared batch with lap keys (pyramids available).
+    """
+    laps = list(laps)
+    keys = [lap_key(lap) for lap in laps]
+    key = (tuple(keys), reference)
+    with _cache_lock:
+        if key in _batch_cache:
+            _batch_cache.move_to_end(key)
+            return _batch_cache[key]
+
+    batch = AlignedLapBatch(get_laps_telemetry(laps, workers), reference, keys=keys)
+    with _cache_lock:
+        batch = _batch_cache.setdefault(key, batch)
+        _batch_cache.move_to_end(key)
+        if len(_batch_cache) > BATCH_CACHE_SIZE:
+            _batch_cache.popitem(last=False)
+    return batch
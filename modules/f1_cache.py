@@ -0,0 +1,311 @@
+"""
+F1 Telemetry Lab - FastF1 Cache Manager
+Author: Sergio Gonzalez
+Description: Owns the FastF1 disk cache (f1_cache/). Every session folder
+             is one entry with its footprint and last access (a marker
+             file touched on each load, as access times are unreliable).
+             A disk budget is enforced with LRU eviction, cold entries can
+             be recompressed into .tar.xz archives (restored transparently
+             when loaded again) and sessions can be pre-warmed from a batch
+             manifest.
+"""
+
+import json
+import os
+import shutil
+import tarfile
+import threading
+import time
+
+import fastf1
+
+F1_CACHE_DIR = 'f1_cache'
+
+# Disk budget of the session entries (the HTTP cache is reported but not evicted)
+F1_CACHE_BYTES = 20 * 1024 ** 3
+
+# Entries not loaded for this long are "cold" and worth recompressing
+COLD_DAYS = 30
+
+# Entries loaded this recently are never evicted: another process may be
+# reading them right now
+ACTIVE_SECONDS = 3600
+
+# After a session load the budget is checked against a running total: the
+# sizes of the last full scan with the loaded entry re-measured. A full scan
+# walks every entry, so it only runs when the last one is older than this or
+# the running total is over budget
+BUDGET_SCAN_SECONDS = 300
+
+ACCESS_MARKER = '.last_access'
+ARCHIVE_SUFFIX = '.tar.xz'
+
+_cache_dir = None
+_max_bytes = F1_CACHE_BYTES
+_entry_lock = threading.Lock()
+
+# Entry sizes of the last full scan: {'dir', 'time', 'sizes': {path: bytes}}
+_scan = {'dir': None, 'time': 0.0, 'sizes': {}}
+_scan_lock = threading.Lock()
+
+def enable_cache(cache_dir=None, max_bytes=None):
+    """
+    Creates the cache folder and points FastF1 at it (once per process and folder).
+
+    Args:
+        cache_dir (str): FastF1 cache folder (default: keep the enabled one,
+            F1_CACHE_DIR initially).
+        max_bytes (int): Disk budget enforced after each session load
+            (default: keep the current one, F1_CACHE_BYTES initially).
+    """
+    global _cache_dir, _max_bytes
+    if max_bytes is not None:
+        _max_bytes = max_bytes
+    cache_dir = _root(cache_dir)
+    if _cache_dir == cache_dir:
+        return
+    os.makedirs(cache_dir, exist_ok=True)
+    fastf1.Cache.enable_cache(cache_dir)
+    _cache_dir = cache_dir
+
+def _root(cache_dir):
+    """Explicit folder, else the enabled one, else the default."""
+    return cache_dir or _cache_dir or F1_CACHE_DIR
+
+def _folder_size(path):
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+def _entry(path):
+    """Footprint and last access of one session folder or archive."""
+    compressed = path.endswith(ARCHIVE_SUFFIX)
+    if compressed:
+        size = os.path.getsize(path)
+        last_access = os.path.getmtime(path)
+    else:
+        size = _folder_size(path)
+        marker = os.path.join(path, ACCESS_MARKER)
+        # Folders written before the manager existed: newest file instead
+        last_access = (os.path.getmtime(marker) if os.path.exists(marker) else
+                       max((os.path.getmtime(os.path.join(path, n)) for n in os.listdir(path)),
+                           default=os.path.getmtime(path)))
+    event_dir = os.path.dirname(path)
+    return {'year': os.path.basename(os.path.dirname(event_dir)), 'event': os.path.basename(event_dir),
+            'session': os.path.basename(path).removesuffix(ARCHIVE_SUFFIX),
+            'path': path, 'bytes': size, 'last_access': last_access, 'compressed': compressed}
+
+def list_entries(cache_dir=None):
+    """
+    Session entries of the cache (FastF1 layout: <year>/<event>/<session>/).
+
+    Args:
+        cache_dir (str): FastF1 cache folder (default: the enabled one).
+
+    Returns:
+        list: One dict per entry (year, event, session, path, bytes,
+        last_access, compressed), least recently used first.
+    """
+    cache_dir = _root(cache_dir)
+    entries = []
+    if not os.path.isdir(cache_dir):
+        return entries
+    for year in sorted(os.listdir(cache_dir)):
+        year_dir = os.path.join(cache_dir, year)
+        if not (year.isdigit() and os.path.isdir(year_dir)):
+            continue
+        for event in sorted(os.listdir(year_dir)):
+            event_dir = os.path.join(year_dir, event)
+            if not os.path.isdir(event_dir):
+                continue
+            for name in sorted(os.listdir(event_dir)):
+                path = os.path.join(event_dir, name)
+                if name.endswith(('.tmp', '.restore')):
+                    continue  # Being written by another process
+                if os.path.isdir(path) or name.endswith(ARCHIVE_SUFFIX):
+                    try:
+                        entries.append(_entry(path))
+                    except OSError:
+                        continue  # Removed or being restored by another process
+    return sorted(entries, key=lambda e: e['last_access'])
+
+def cache_usage(cache_dir=None):
+    """
+    Args:
+        cache_dir (str): FastF1 cache folder (default: the enabled one).
+
+    Returns:
+        dict: entries, compressed, session_bytes, http_bytes (FastF1's
+        requests cache), total_bytes and max_bytes. The budget applies to
+        session_bytes only.
+    """
+    entries = list_entries(cache_dir)
+    http = os.path.join(_root(cache_dir), 'fastf1_http_cache.sqlite')
+    session_bytes = sum(e['bytes'] for e in entries)
+    http_bytes = os.path.getsize(http) if os.path.exists(http) else 0
+    return {'entries': len(entries), 'compressed': sum(e['compressed'] for e in entries),
+            'session_bytes': session_bytes, 'http_bytes': http_bytes,
+            'total_bytes': session_bytes + http_bytes, 'max_bytes': _max_bytes}
+
+def session_entry_path(session, cache_dir=None):
+    """Cache folder of a FastF1 session (from its API path)."""
+    # api_path looks like '/static/2024/2024-06-23_Spanish_Grand_Prix/2024-06-22_Qualifying/'
+    return os.path.join(_root(cache_dir), session.api_path[len('/static/'):].strip('/'))
+
+def compress_entry(path):
+    """
+    Packs a session folder into <folder>.tar.xz and removes the folder. The
+    archive keeps the folder's last access as its modification time.
+
+    Returns:
+        int: Bytes saved.
+    """
+    entry = _entry(path)
+    archive = path + ARCHIVE_SUFFIX
+    tmp = f"{archive}.{os.getpid()}.tmp"
+    with tarfile.open(tmp, 'w:xz') as tar:
+        tar.add(path, arcname=os.path.basename(path))
+    os.utime(tmp, (entry['last_access'], entry['last_access']))
+    os.replace(tmp, archive)  # Atomic: readers see the folder or the archive, never a partial file
+    shutil.rmtree(path, ignore_errors=True)
+    return entry['bytes'] - os.path.getsize(archive)
+
+def restore_entry(archive):
+    """Unpacks a compressed entry back into its folder and removes the archive."""
+    parent = os.path.dirname(archive)
+    tmp = f"{archive}.{os.getpid()}.restore"
+    with tarfile.open(archive, 'r:xz') as tar:
+        tar.extractall(tmp, filter='data')
+    name = os.path.basename(archive).removesuffix(ARCHIVE_SUFFIX)
+    try:
+        os.replace(os.path.join(tmp, name), os.path.join(parent, name))
+    except OSError:
+        pass  # Another process restored it first
+    shutil.rmtree(tmp, ignore_errors=True)
+    if os.path.exists(archive):
+        os.remove(archive)
+
+def open_session_entry(session):
+    """
+    Prepares a session's cache entry before FastF1 loads it: restores it if
+    it was compressed and records the access.
+
+    Args:
+        session (Session): FastF1 session, not loaded yet.
+
+    Returns:
+        str: Path of the entry.
+    """
+    path = session_entry_path(session)
+    with _entry_lock:
+        if os.path.exists(path + ARCHIVE_SUFFIX) and not os.path.isdir(path):
+            restore_entry(path + ARCHIVE_SUFFIX)
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, ACCESS_MARKER), 'w') as f:
+            f.write(str(time.time()))
+    return path
+
+def enforce_budget(cache_dir=None, max_bytes=None, keep=(), dry_run=False):
+    """
+    Evicts least recently used entries until the sessions fit the budget.
+
+    Args:
+        cache_dir (str): FastF1 cache folder (default: the enabled one).
+        max_bytes (int): Budget (default: the one given to enable_cache()).
+        keep (iterable): Entry paths never to evict (e.g. the session just loaded).
+        dry_run (bool): Only report what would be evicted.
+
+    Returns:
+        list: Evicted entries.
+    """
+    max_bytes = _max_bytes if max_bytes is None else max_bytes
+    cache_dir = _root(cache_dir)
+    entries = list_entries(cache_dir)
+    total = sum(e['bytes'] for e in entries)
+    keep = {os.path.normpath(p) for p in keep}
+    active_since = time.time() - ACTIVE_SECONDS
+
+    evicted = []
+    for entry in entries:
+        if total <= max_bytes:
+            break
+        folder = entry['path'].removesuffix(ARCHIVE_SUFFIX)
+        if os.path.normpath(folder) in keep or entry['last_access'] >= active_since:
+            continue
+        if not dry_run:
+            if entry['compressed']:
+                os.remove(entry['path'])
+            else:
+                shutil.rmtree(entry['path'], ignore_errors=True)
+        total -= entry['bytes']
+        evicted.append(entry)
+
+    if not dry_run:
+        gone = {e['path'] for e in evicted}
+        with _scan_lock:
+            _scan.update({'dir': cache_dir, 'time': time.time(),
+                          'sizes': {e['path']: e['bytes'] for e in entries if e['path'] not in gone}})
+    return evicted
+
+def enforce_budget_after_load(entry, cache_dir=None):
+    """
+    Budget check after a session load, without walking the whole cache every
+    time: only the loaded entry is re-measured and added to the sizes of the
+    last full scan. enforce_budget() runs when that scan is older than
+    BUDGET_SCAN_SECONDS (other processes write to the cache too) or the
+    running total is over budget.
+
+    Args:
+        entry (str): Path of the session entry just loaded (never evicted).
+        cache_dir (str): FastF1 cache folder (default: the enabled one).
+
+    Returns:
+        list: Evicted entries.
+    """
+    cache_dir = _root(cache_dir)
+    with _scan_lock:
+        fresh = _scan['dir'] == cache_dir and time.time() - _scan['time'] < BUDGET_SCAN_SECONDS
+        if fresh:
+            sizes = _scan['sizes']
+            sizes.pop(entry + ARCHIVE_SUFFIX, None)  # Restored from its archive by the load
+            sizes[entry] = _folder_size(entry)
+            if sum(sizes.values()) <= _max_bytes:
+                return []
+    return enforce_budget(cache_dir, keep=[entry])
+
+def compress_cold(cache_dir=None, cold_days=COLD_DAYS, dry_run=False):
+    """
+    Recompresses every uncompressed entry not loaded for cold_days.
+
+    Args:
+        cache_dir (str): FastF1 cache folder (default: the enabled one).
+        cold_days (float): Days without a load after which an entry is cold.
+        dry_run (bool): Only report what would be compressed.
+
+    Returns:
+        tuple: (compressed entries, bytes saved)
+    """
+    cutoff = time.time() - cold_days * 86400
+    cold = [e for e in list_entries(cache_dir)
+            if not e['compressed'] and e['last_access'] < cutoff]
+    saved = 0 if dry_run else sum(compress_entry(e['path']) for e in cold)
+    return cold, saved
+
+def manifest_sessions(manifest):
+    """
+    Distinct (year, gp, session) of a batch report manifest (see modules/batch.py).
+
+    Args:
+        manifest (dict or str): Parsed manifest or path of its JSON file.
+
+    Returns:
+        list: Sessions in manifest order.
+    """
+    if isinstance(manifest, str):
+        with open(manifest) as f:
+            manifest = json.load(f)
+    sessions = []
+    for entry in manifest['sessions']:
+        key = (entry['year'], entry['gp'], entry['session'])
+        if key not in sessions:
+            sessions.append(key)
+    return sessions
@@ -7,30 +7,427 @@ Description: Helper functions for session loading, telemetry interpolation,
 
 import fastf1
 import numpy as np
-import os
+import threading
+from collections import OrderedDict
+from modules.f1_cache import enable_cache, enforce_budget_after_load, open_session_entry
+from modules.lap_pool import as_lap_list, map_laps
+from modules.lap_store import build_lap_store, open_lap_store
+from modules.lod import LOD_POINTS, build_pyramid
+from modules.perf import stage, timed
 
-def get_session_data(year, gp, session_type):
+# Number of aligned lap comparisons kept in memory (least recently used are dropped)
+ALIGNED_CACHE_SIZE = 8
+
+# Number of compact lap telemetries kept in memory (~20 KB each for a 700-sample lap)
+TELEMETRY_CACHE_SIZE = 64
+
+# Resolution of the common distance grid used for every lap comparison
+GRID_POINTS = 2000
+
+# Channels interpolated onto the common grid. nGear is a discrete channel, so it
+# is sampled with a step lookup instead of linear interpolation.
+ALIGNED_CHANNELS = ['Time', 'Speed', 'Throttle', 'Brake', 'nGear', 'X', 'Y']
+
+# Storage dtypes of the aligned channels: float32 except the time base,
+# which needs float64 for millisecond gaps
+ALIGNED_DTYPES = {'Time': np.float64, 'Speed': np.float32, 'Throttle': np.float32, 'Brake': np.float32,
+                  'nGear': np.int8, 'X': np.float32, 'Y': np.float32}
+
+# Channels drawn from the level-of-detail pyramid (see modules/lod.py)
+LOD_CHANNELS = ['Speed', 'Throttle', 'Brake', 'nGear']
+
+# Plot-aware downsampling: points kept per horizontal pixel of the axes.
+# Step-like channels use min-max decimation so brake and gear edges stay
+# sharp; continuous channels use Largest-Triangle-Three-Buckets.
+DOWNSAMPLE_POINTS_PER_PIXEL = 2
+DOWNSAMPLE_METHODS = {'Brake': 'minmax', 'nGear': 'minmax'}
+
+# Named session load profiles: which FastF1 data sets session.load() fetches.
+# 'timing' is enough for lap-time/strategy work; telemetry is added lazily
+# the first time a telemetry plot asks for it (see ensure_telemetry).
+# Race-control messages are always kept: FastF1 uses them to flag deleted laps.
+LOAD_PROFILES = {
+    'timing': {'laps': True, 'telemetry': False, 'weather': False, 'messages': True},
+    'telemetry': {'laps': True, 'telemetry': True, 'weather': False, 'messages': True},
+    'full': {'laps': True, 'telemetry': True, 'weather': True, 'messages': True},
+}
+
+_aligned_cache = OrderedDict()
+_telemetry_cache = OrderedDict()
+# Guards both LRUs: the analysis service's pool and Streamlit's script threads
+# share them. Held for the dict updates only, never while extracting or aligning
+_cache_lock = threading.Lock()
+_upgrade_lock = threading.Lock()
+_downsampling_enabled = True
+
+def get_session_data(year, gp, session_type, lap_store=False, profile='full'):
     """
-    Sets up the local cache and loads the session data from FastF1.
+    Sets up the local cache and loads the session data from FastF1. The
+    disk cache stays within its budget (see modules/f1_cache.py).
 
     Args:
         year (int): Year of the Grand Prix (e.g., 2024).
         gp (str): Name or location of the GP (e.g., 'Spain').
         session_type (str): Type of session ('Q' for Qualy, 'R' for Race).
+        lap_store (bool): Open the session from the columnar lap store
+            (see modules/lap_store.py). The store is built from a full load
+            the first time; later runs only memory-map the laps they read.
+        profile (str): Data to load, one of LOAD_PROFILES ('timing',
+            'telemetry' or 'full'). Ignored in lap-store mode.
 
     Returns:
-        fastf1.core.Session: The fully loaded session object.
+        fastf1.core.Session: The loaded session object
+        (a LapStoreSession in lap-store mode).
     """
-    cache_dir = 'f1_cache'
-    if not os.path.exists(cache_dir): 
-        os.makedirs(cache_dir)
-    
-    fastf1.Cache.enable_cache(cache_dir)
+    if profile not in LOAD_PROFILES:
+        raise ValueError(f"Unknown load profile '{profile}'. Available: {', '.join(LOAD_PROFILES)}")
+
+    enable_cache()
+
+    if lap_store:
+        with stage('lap_store.open'):
+            stored = open_lap_store(year, gp, session_type)
+        if stored is not None:
+            return stored
+        # Building the store needs telemetry whatever the requested profile
+        profile = 'full' if profile == 'full' else 'telemetry'
     
     session = fastf1.get_session(year, gp, session_type)
-    session.load()
+    with stage('f1_cache.open'):
+        entry = open_session_entry(session)
+    with stage(f'session.load ({profile})'):
+        session.load(**LOAD_PROFILES[profile])
+    session.load_profile = profile
+    with stage('f1_cache.budget'):
+        enforce_budget_after_load(entry)
+
+    if lap_store:
+        with stage('lap_store.build'):
+            build_lap_store(session, year, gp, session_type)
+        return open_lap_store(year, gp, session_type)
     return session
 
+def ensure_telemetry(session):
+    """
+    Upgrades a session loaded with the 'timing' profile so that car and
+    position data are available. Sessions that already have telemetry
+    (or were not loaded through get_session_data) are left untouched.
+
+    Args:
+        session (Session): Session returned by get_session_data.
+    """
+    if getattr(session, 'load_profile', 'full') != 'timing':
+        return
+    # Cached sessions are shared between threads: upgrade each one only once.
+    # The lock is per session, so different sessions upgrade concurrently.
+    with _upgrade_lock:
+        lock = session.__dict__.setdefault('_upgrade_lock', threading.Lock())
+    with lock:
+        if session.load_profile == 'timing':
+            with stage('session.load (telemetry upgrade)'):
+                session.load(**LOAD_PROFILES['telemetry'])
+            session.load_profile = 'telemetry'
+
+class LapTelemetry:
+    """
+    Compact, array-backed telemetry of one lap (struct of arrays).
+
+    Holds only the channels the analysis uses, each in the smallest dtype that
+    represents it exactly enough, plus lap time as precomputed float seconds
+    (no Timedelta conversions downstream). About 2x smaller than the same
+    channels of the merged FastF1 Telemetry frame it is built from (the
+    frame's unused columns are dropped on top of that).
+
+    Attributes:
+        seconds (float64): Time from the first sample of the lap.
+        distance (float32): Distance from the start of the lap in meters.
+        speed (float32): km/h.
+        throttle (uint8): Pedal position in %.
+        brake (bool): Brake pressed.
+        ngear (int8): Gear engaged.
+        x, y (float32): Car position in 1/10 m.
+    """
+
+    __slots__ = ('seconds', 'distance', 'speed', 'throttle', 'brake', 'ngear', 'x', 'y')
+
+    # FastF1 channel name -> attribute, for code written against Telemetry frames
+    CHANNELS = {'Seconds': 'seconds', 'Distance': 'distance', 'Speed': 'speed', 'Throttle': 'throttle',
+                'Brake': 'brake', 'nGear': 'ngear', 'X': 'x', 'Y': 'y'}
+
+    def __init__(self, seconds, distance, speed, throttle, brake, ngear, x, y):
+        self.seconds = np.asarray(seconds, dtype=np.float64)
+        self.distance = np.asarray(distance, dtype=np.float32)
+        self.speed = np.asarray(speed, dtype=np.float32)
+        self.throttle = np.asarray(throttle, dtype=np.uint8)
+        self.brake = np.asarray(brake, dtype=bool)
+        self.ngear = np.asarray(ngear, dtype=np.int8)
+        self.x = np.asarray(x, dtype=np.float32)
+        self.y = np.asarray(y, dtype=np.float32)
+
+    @classmethod
+    def from_telemetry(cls, tel):
+        """
+        Converts a FastF1 Telemetry frame with 'Distance' added.
+
+        Gaps in the integer channels (NaN after merging car and position data)
+        are filled from the neighbouring samples before narrowing the dtype.
+        """
+        def filled(name):
+            return tel[name].ffill().bfill().fillna(0).to_numpy()
+
+        ns = tel['Time'].to_numpy().view(np.int64)
+        return cls(seconds=(ns - ns[0]) / 1e9,
+                   distance=tel['Distance'].to_numpy(),
+                   speed=tel['Speed'].to_numpy(),
+                   throttle=np.clip(filled('Throttle'), 0, 255),
+                   brake=filled('Brake').astype(bool),
+                   ngear=filled('nGear'),
+                   x=tel['X'].to_numpy(),
+                   y=tel['Y'].to_numpy())
+
+    def __getitem__(self, name):
+        """Channel by its FastF1 name (e.g., tel['Speed'])."""
+        try:
+            return getattr(self, self.CHANNELS[name])
+        except KeyError:
+            raise KeyError(f"Channel '{name}' is not kept in LapTelemetry.") from None
+
+    def __len__(self):
+        return len(self.distance)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.__slots__)
+
+def _extract_lap_telemetry(lap):
+    """Extracts and converts one lap's telemetry (uncached)."""
+    with stage('get_telemetry'):
+        tel = lap.get_telemetry()
+    with stage('add_distance'):
+        tel = tel.add_distance()
+    with stage('compact_telemetry'):
+        return LapTelemetry.from_telemetry(tel)
+
+def _cache_telemetry(key, compact):
+    """Stores a lap in the telemetry LRU (lock held by the caller)."""
+    _telemetry_cache[key] = compact
+    _telemetry_cache.move_to_end(key)
+    if len(_telemetry_cache) > TELEMETRY_CACHE_SIZE:
+        _telemetry_cache.popitem(last=False)
+
+def get_lap_telemetry(lap):
+    """
+    Compact telemetry of one lap, loading the session's telemetry first if it
+    was opened with the 'timing' profile. Each lap is extracted and converted
+    once; later calls reuse it from an LRU of TELEMETRY_CACHE_SIZE laps.
+
+    Args:
+        lap (Lap): FastF1 Lap object (or a single-row Laps selection).
+
+    Returns:
+        LapTelemetry: Merged car and position data of the lap.
+    """
+    key = lap_key(lap)
+    with _cache_lock:
+        if key in _telemetry_cache:
+            _telemetry_cache.move_to_end(key)
+            return _telemetry_cache[key]
+
+    ensure_telemetry(lap.session)
+    compact = _extract_lap_telemetry(lap)
+    with _cache_lock:
+        _cache_telemetry(key, compact)
+    return compact
+
+def get_laps_telemetry(laps, workers=None, processes=False):
+    """
+    Compact telemetry of many laps, extracted concurrently.
+
+    Laps already in the telemetry LRU are reused; the others are extracted by
+    a thread pool (or forked processes, see modules/lap_pool.py) that reads
+    the session's car and position data in place, then cached.
+
+    Args:
+        laps (Laps or list): Lap selection, e.g. all fastest laps of a
+            qualifying session or every lap of a race.
+        workers (int): Concurrent extractions (default: all cores). 1 is serial.
+        processes (bool): Use worker processes instead of threads.
+
+    Returns:
+        list: LapTelemetry of every lap, in lap order.
+    """
+    laps = as_lap_list(laps)
+    keys = [lap_key(lap) for lap in laps]
+    # One extraction per distinct lap that is not cached yet
+    with _cache_lock:
+        found = {key: _telemetry_cache.get(key) for key in keys}
+    missing = {key: lap for key, lap in zip(keys, laps) if found[key] is None}
+
+    if missing:
+        for session in {id(lap.session): lap.session for lap in missing.values()}.values():
+            ensure_telemetry(session)  # Once per session, before the workers start
+        with stage('bulk_telemetry'):
+            extracted = map_laps(_extract_lap_telemetry, list(missing.values()), workers, processes)
+        found.update(zip(missing, extracted))
+
+    result = [found[key] for key in keys]
+    with _cache_lock:
+        for key, compact in zip(keys, result):
+            _cache_telemetry(key, compact)
+    return result
+
+def session_key(session):
+    """
+    Builds a stable identifier for a session: (year, event name, session name).
+    Unlike the object itself, it survives copies made by caching layers.
+
+    Args:
+        session (Session): Loaded FastF1 session.
+
+    Returns:
+        tuple: (year, event_name, session_name)
+    """
+    return (session.event['EventDate'].year, session.event['EventName'], session.name)
+
+def lap_key(lap):
+    """
+    Identifies a single lap inside its session: (session_key, driver, lap number).
+
+    Args:
+        lap (Lap): FastF1 Lap object (or a single-row Laps selection).
+
+    Returns:
+        tuple: (session_key, driver_code, lap_number)
+    """
+    if hasattr(lap, 'iloc') and getattr(lap, 'ndim', 1) == 2:
+        lap = lap.iloc[0]
+    return (session_key(lap.session), lap['Driver'], int(lap['LapNumber']))
+
+def _interp_channels(grid, tel):
+    """Interpolates every aligned channel of one LapTelemetry onto the grid."""
+    dist = tel.distance
+    channels = {'Time': np.interp(grid, dist, tel.seconds)}
+    for name in ['Speed', 'Throttle', 'Brake', 'X', 'Y']:
+        channels[name] = np.interp(grid, dist, tel[name]).astype(ALIGNED_DTYPES[name])
+    # Step lookup: last gear engaged at or before each grid point
+    idx = np.clip(np.searchsorted(dist, grid, side='right') - 1, 0, len(dist) - 1)
+    channels['nGear'] = tel.ngear[idx]
+    return channels
+
+class AlignedLapPair:
+    """
+    Two laps resampled onto one common distance grid.
+
+    Holds the raw telemetry of both laps (with Distance) plus every channel in
+    ALIGNED_CHANNELS interpolated onto the grid, so plots and the delta
+    calculation all share a single extraction.
+
+    Attributes:
+        tel1, tel2 (LapTelemetry): Raw (compact) telemetry of both laps.
+        distance (np.ndarray): Common distance grid in meters (GRID_POINTS
+            samples from 0 to the longer of the two laps, so neither
+            driver's tail is cut from the plots).
+        channels1, channels2 (dict): Channel name -> values on the grid.
+            'Time' holds seconds from the start of each lap.
+    """
+
+    def __init__(self, lap1, lap2, n_points=GRID_POINTS):
+        self.tel1 = get_lap_telemetry(lap1)
+        self.tel2 = get_lap_telemetry(lap2)
+
+        # The grid spans both laps, as the plots always did: past the end of
+        # the shorter lap its channels hold their last sample
+        self.distance = np.linspace(0, max(self.tel1.distance.max(), self.tel2.distance.max()), n_points)
+        with stage('interpolation'):
+            self.channels1 = _interp_channels(self.distance, self.tel1)
+            self.channels2 = _interp_channels(self.distance, self.tel2)
+        self._pyramids = None
+
+    @property
+    def delta(self):
+        """Time gap along the grid in seconds (negative: driver 1 ahead)."""
+        return self.channels1['Time'] - self.channels2['Time']
+
+    def channel(self, name):
+        """Returns the (driver 1, driver 2) arrays of one aligned channel."""
+        return self.channels1[name], self.channels2[name]
+
+    @property
+    def pyramids(self):
+        """(driver 1, driver 2) TelemetryPyramid of LOD_CHANNELS, built on first use."""
+        if self._pyramids is None:
+            with stage('lod.build'):
+                self._pyramids = (build_pyramid(self.tel1, LOD_CHANNELS),
+                                  build_pyramid(self.tel2, LOD_CHANNELS))
+        return self._pyramids
+
+    def window(self, name, zoom_range=None, max_points=LOD_POINTS):
+        """
+        Raw-channel samples of both drivers for a distance window, at the finest
+        resolution that fits the point budget.
+
+        Args:
+            name (str): One of LOD_CHANNELS.
+            zoom_range (tuple): (start, end) in meters, None for the whole lap.
+            max_points (int): Point budget per driver.
+
+        Returns:
+            tuple: ((distance1, values1), (distance2, values2))
+        """
+        start, end = zoom_range if zoom_range is not None else (None, None)
+        return tuple(p.window(name, start, end, max_points) for p in self.pyramids)
+
+    def delta_window(self, zoom_range=None, max_points=LOD_POINTS):
+        """
+        Time gap over a distance window, evaluated at driver 1's raw sample
+        distances when they fit the point budget (an evenly spaced grid of
+        max_points otherwise), instead of the fixed whole-lap grid.
+
+        Args:
+            zoom_range (tuple): (start, end) in meters, None for the whole lap.
+            max_points (int): Point budget.
+
+        Returns:
+            tuple: (distance, delta) arrays, same sign convention as delta.
+        """
+        dist1 = self.tel1.distance
+        start, end = zoom_range if zoom_range is not None else (0, dist1[-1])
+        i0 = max(np.searchsorted(dist1, start, side='left') - 1, 0)
+        i1 = np.searchsorted(dist1, end, side='right') + 1
+        grid = dist1[i0:i1] if i1 - i0 <= max_points else np.linspace(start, end, max_points)
+
+        time1 = np.interp(grid, dist1, self.tel1.seconds)
+        time2 = np.interp(grid, self.tel2.distance, self.tel2.seconds)
+        return grid, time1 - time2
+
+def align_laps(lap1, lap2):
+    """
+    Returns the AlignedLapPair for two laps, reusing a cached one if this exact
+    comparison was already computed. The cache is an LRU of ALIGNED_CACHE_SIZE
+    entries keyed by (session, drivers, lap numbers).
+
+    Args:
+        lap1 (Lap): Reference lap (driver 1).
+        lap2 (Lap): Compared lap (driver 2).
+
+    Returns:
+        AlignedLapPair: Shared aligned telemetry for both laps.
+    """
+    key = (lap_key(lap1), lap_key(lap2))
+    with _cache_lock:
+        if key in _aligned_cache:
+            _aligned_cache.move_to_end(key)
+            return _aligned_cache[key]
+
+    pair = AlignedLapPair(lap1, lap2)
+    with _cache_lock:
+        # Another thread may have aligned the same laps meanwhile: keep one pair
+        pair = _aligned_cache.setdefault(key, pair)
+        _aligned_cache.move_to_end(key)
+        if len(_aligned_cache) > ALIGNED_CACHE_SIZE:
+            _aligned_cache.popitem(last=False)
+    return pair
+
 def delta_calculator(lap1, lap2):
     """
     Calculates the time delta between two laps based on track distance.
@@ -41,28 +438,125 @@ def delta_calculator(lap1, lap2):
         lap2 (Lap): FastF1 Lap object for driver 2.
 
     Returns:
-        tuple: (common_distance_grid, time_delta_array)
+        tuple: (common_distance_grid, time_delta_array), the grid spanning
+        driver 1's lap.
     """
-    # 1. Add distance data to telemetry
-    tel1 = lap1.get_telemetry().add_distance()
-    tel2 = lap2.get_telemetry().add_distance()
+    # 1. Telemetry extraction is shared with the plotting functions through
+    #    the aligned-lap cache
+    pair = align_laps(lap1, lap2)
 
-    # 2. Convert timestamps to total seconds from lap start
-    t1 = (tel1['Time'] - tel1['Time'].iloc[0]).dt.total_seconds()
-    t2 = (tel2['Time'] - tel2['Time'].iloc[0]).dt.total_seconds()
+    # 2. The delta grid spans driver 1's lap only (the pair's grid spans the
+    #    longer lap); when driver 1's lap is the longer one they coincide
+    dist_max = pair.tel1.distance.max()
+    if pair.distance[-1] == dist_max:
+        return pair.distance, pair.delta
+    common_dist = np.linspace(0, dist_max, GRID_POINTS)
+    delta = (np.interp(common_dist, pair.tel1.distance, pair.tel1.seconds)
+             - np.interp(common_dist, pair.tel2.distance, pair.tel2.seconds))
+    return common_dist, delta
 
-    # 3. Create a unified distance grid (2000 points) to compare samples
-    # This solves the problem of sensors not pinging at the same time
-    dist_max = tel1['Distance'].max()
-    common_dist = np.linspace(0, dist_max, 2000)
+def set_downsampling(enabled):
+    """
+    Turns plot downsampling on or off for this process. Publication renders
+    (the 300-DPI files in plots/) switch it off to draw every sample.
 
-    # 4. Interpolate time values based on the common distance grid
-    time_interp1 = np.interp(common_dist, tel1['Distance'], t1)
-    time_interp2 = np.interp(common_dist, tel2['Distance'], t2)
+    Args:
+        enabled (bool): False makes downsample() return its input unchanged.
+    """
+    global _downsampling_enabled
+    _downsampling_enabled = enabled
 
-    # 5. Calculate the gap (Delta)
-    delta = time_interp1 - time_interp2
-    return common_dist, delta
+def downsampling_enabled():
+    return _downsampling_enabled
+
+def _lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: indices of the n_out samples to keep."""
+    n = len(x)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    keep = np.empty(n_out, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Third vertex: average of the next bucket (the last sample for the last bucket)
+        nxt_hi = edges[i + 2] if i + 2 < len(edges) else n
+        cx, cy = x[hi:nxt_hi].mean(), y[hi:nxt_hi].mean()
+        px, py = x[keep[i]], y[keep[i]]
+        # Twice the triangle area for every candidate in the bucket
+        area = np.abs((px - cx) * (y[lo:hi] - py) - (px - x[lo:hi]) * (cy - py))
+        keep[i + 1] = lo + np.nanargmax(area) if not np.isnan(area).all() else lo
+    return keep
+
+def _minmax(y, n_out):
+    """Min-max decimation: first minimum and maximum of each bucket, in order."""
+    n_buckets = max(n_out // 2, 1)
+    bucket = np.arange(len(y)) * n_buckets // len(y)
+    first_min = np.lexsort((y, bucket))
+    first_max = np.lexsort((-y, bucket))
+    starts = np.searchsorted(bucket, np.arange(n_buckets))
+    # After sorting by bucket, each bucket's samples stay in one contiguous run
+    lo, hi = first_min[starts], first_max[starts]
+    return np.unique(np.concatenate([lo, hi]))
+
+@timed('downsample')
+def downsample(x, y, width_px, method='lttb'):
+    """
+    Reduces a series to what can be seen at a given pixel width.
+
+    Args:
+        x (array-like): Sorted x values (distance).
+        y (array-like): Channel values.
+        width_px (int): Width of the plot area in pixels.
+        method (str): 'lttb' (continuous channels) or 'minmax' (step-like
+            channels: keeps both levels of every edge).
+
+    Returns:
+        tuple: (x, y) arrays, unchanged if already small enough or if
+        downsampling is switched off (see set_downsampling).
+    """
+    x, y = np.asarray(x), np.asarray(y, dtype=float)
+    n_out = int(width_px * DOWNSAMPLE_POINTS_PER_PIXEL)
+    if not _downsampling_enabled or len(x) <= max(n_out, 3):
+        return x, y
+
+    keep = _minmax(y, n_out) if method == 'minmax' else _lttb(x, y, n_out)
+    return x[keep], y[keep]
+
+def axes_width_px(ax):
+    """Width of a Matplotlib axes in pixels at the figure's DPI."""
+    return ax.get_window_extent().width
+
+def plot_telemetry(ax, x, y, channel=None, **kwargs):
+    """
+    ax.plot() of a telemetry series, downsampled to the width of the axes.
+
+    Args:
+        ax (Axes): Target axes.
+        x, y (array-like): Distance and channel values.
+        channel (str): Channel name, used to pick the method in DOWNSAMPLE_METHODS.
+        **kwargs: Passed to ax.plot().
+
+    Returns:
+        list: The Line2D objects created.
+    """
+    x, y = downsample(x, y, axes_width_px(ax), DOWNSAMPLE_METHODS.get(channel, 'lttb'))
+    return ax.plot(x, y, **kwargs)
+
+def sector_comparison(lap1, lap2):
+    """
+    Sector times of two laps side by side.
+
+    Args:
+        lap1 (Lap): Lap object for driver 1.
+        lap2 (Lap): Lap object for driver 2.
+
+    Returns:
+        list: (sector, seconds 1, seconds 2) tuples for S1, S2 and S3.
+    """
+    sectors = ['Sector1Time', 'Sector2Time', 'Sector3Time']
+    # Convert Timedelta to float seconds
+    return [(sector[:7], getattr(lap1, sector).total_seconds(), getattr(lap2, sector).total_seconds())
+            for sector in sectors]
 
 def print_sector_times(lap1, lap2, driver1, driver2):
     """
@@ -74,14 +568,10 @@ def print_sector_times(lap1, lap2, driver1, driver2):
         driver1 (str): Code of driver 1 (e.g., 'NOR').
         driver2 (str): Code of driver 2 (e.g., 'RUS').
     """
-    sectors = ['Sector1Time', 'Sector2Time', 'Sector3Time']
     print(f"\n--- SECTOR ANALYSIS: {driver1} vs {driver2} ---")
     
-    for sector in sectors:
-        # Convert Timedelta to float seconds
-        s1 = getattr(lap1, sector).total_seconds()
-        s2 = getattr(lap2, sector).total_seconds()
+    for sector, s1, s2 in sector_comparison(lap1, lap2):
         diff = s1 - s2
         
         faster = driver1 if diff < 0 else driver2
-        print(f"{sector[:7]}: {driver1} {s1:.3f}s | {driver2} {s2:.3f}s | Delta: {abs(diff):.3f}s ({faster} wins)")
\ No newline at end of file
+        print(f"{sector}: {driver1} {s1:.3f}s | {driver2} {s2:.3f}s | Delta: {abs(diff):.3f}s ({faster} wins)")
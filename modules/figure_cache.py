@@ -0,0 +1,246 @@
+"""
+F1 Telemetry Lab - Figure Cache Module
+Author: Sergio Gonzalez
+Description: Content-addressed cache of rendered figures. A figure is keyed by
+             a hash of what it shows (session, drivers, lap, plot kind, zoom
+             range, style) and of the code that draws it, and stored as
+             encoded image bytes in an in-memory LRU backed by a size-capped
+             disk folder shared by the app, the standalone scripts and the
+             batch report generator.
+"""
+
+import glob
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import matplotlib.pyplot as plt
+
+from modules.perf import stage
+
+FIGURE_CACHE_DIR = 'figure_cache'
+
+# Bump when the cache format changes. Changes to the plotting code are
+# picked up by the code fingerprint in every key (see code_fingerprint)
+FIGURE_CACHE_VERSION = 5
+
+# Source files that shape a figure: every module plus the dashboard app
+FIGURE_CODE_FILES = sorted(
+    glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), '*.py'))
+    + [os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')])
+
+# savefig options per style: 'report' matches the 300-DPI files in plots/,
+# 'app' matches what st.pyplot renders
+FIGURE_STYLES = {
+    'report': {'format': 'png', 'dpi': 300, 'bbox_inches': 'tight', 'facecolor': 'black'},
+    'app': {'format': 'png', 'dpi': 200, 'bbox_inches': 'tight'},
+}
+
+_fingerprint = (None, None)
+_fingerprint_lock = threading.Lock()
+
+def code_fingerprint():
+    """
+    Hash of the source of FIGURE_CODE_FILES. Re-hashed only when a file's
+    modification time or size changes, so editing the plotting code gives
+    every figure a new key instead of serving the image drawn by the old code.
+
+    Returns:
+        str: Hex SHA-256 digest.
+    """
+    global _fingerprint
+    stamp = []
+    for path in FIGURE_CODE_FILES:
+        if os.path.exists(path):
+            st = os.stat(path)
+            stamp.append((path, st.st_mtime_ns, st.st_size))
+    stamp = tuple(stamp)
+    with _fingerprint_lock:
+        if _fingerprint[0] != stamp:
+            digest = hashlib.sha256()
+            for path, _, _ in stamp:
+                digest.update(os.path.basename(path).encode())
+                with open(path, 'rb') as f:
+                    digest.update(f.read())
+            _fingerprint = (stamp, digest.hexdigest())
+        return _fingerprint[1]
+
+def figure_key(session_id, kind, drivers, lap=None, zoom_range=None, style='app', **options):
+    """
+    Hash identifying one rendered figure.
+
+    Args:
+        session_id (tuple): session_key() of the session.
+        kind (str): Plot kind (e.g., 'dashboard', 'delta_map').
+        drivers (list): Driver codes in plot order.
+        lap (int): Lap number, None for fastest laps.
+        zoom_range (tuple): Distance window in meters, None for the full lap.
+        style (str): One of FIGURE_STYLES.
+        **options: Any other parameter that changes the figure.
+
+    Returns:
+        str: Hex SHA-256 digest.
+    """
+    parts = {
+        'version': FIGURE_CACHE_VERSION,
+        'code': code_fingerprint(),
+        'session': list(session_id),
+        'kind': kind,
+        'drivers': list(drivers),
+        'lap': lap,
+        'zoom': list(zoom_range) if zoom_range is not None else None,
+        'style': style,
+        'options': options,
+    }
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def encode_figure(fig, style='app'):
+    """Renders a figure to image bytes with the savefig options of a style."""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, **FIGURE_STYLES[style])
+    return buffer.getvalue()
+
+class FigureCache:
+    """
+    Two-tier (memory + disk) cache of encoded figures.
+
+    Args:
+        cache_dir (str): Disk tier folder.
+        memory_bytes (int): Budget of the in-memory LRU.
+        disk_bytes (int): Budget of the disk tier; least recently used
+            files are deleted beyond it.
+    """
+
+    def __init__(self, cache_dir=FIGURE_CACHE_DIR, memory_bytes=256 * 1024 ** 2,
+                 disk_bytes=2 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._disk_size = None  # Measured lazily, then tracked incrementally
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.png")
+
+    def _remember(self, key, data):
+        """Adds bytes to the memory tier and trims it to budget (lock held)."""
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = data
+        self._memory_size += len(data)
+        while len(self._memory) > 1 and self._memory_size > self.memory_bytes:
+            _, dropped = self._memory.popitem(last=False)
+            self._memory_size -= len(dropped)
+
+    def get(self, key):
+        """
+        Returns:
+            bytes or None: Encoded image, from memory or disk.
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)  # Disk LRU uses modification time
+        except OSError:
+            return None
+
+        with self._lock:
+            self._remember(key, data)
+        return data
+
+    def put(self, key, data):
+        """Stores encoded image bytes in both tiers."""
+        with self._lock:
+            self._remember(key, data)
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)  # Atomic: concurrent readers never see partial files
+
+        with self._lock:
+            if self._disk_size is not None:
+                self._disk_size += len(data)
+            over_budget = self._disk_size is None or self._disk_size > self.disk_bytes
+        if over_budget:
+            self._trim_disk()
+
+    def get_or_render(self, key, render, style='app'):
+        """
+        Returns the cached image for key, rendering and storing it on a miss.
+
+        Args:
+            key (str): figure_key() of the figure.
+            render (callable): Zero-argument function returning a Matplotlib figure.
+            style (str): Encoding style used on a miss.
+
+        Returns:
+            bytes: Encoded image.
+        """
+        with stage('figure_cache.get'):
+            data = self.get(key)
+        if data is None:
+            with stage('matplotlib.draw'):
+                fig = render()
+            with stage('matplotlib.encode'):
+                data = encode_figure(fig, style)
+            plt.close(fig)
+            self.put(key, data)
+        return data
+
+    def _trim_disk(self):
+        """Deletes least recently used files while the disk tier is over budget."""
+        files = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if name.endswith('.tmp'):
+                    continue  # Being written by another process
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue  # Removed by another process
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+        with self._lock:
+            self._disk_size = total
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+def get_figure_cache():
+    """Process-wide FigureCache on FIGURE_CACHE_DIR (created on first use)."""
+    global _default_cache
+    if _default_cache is None:
+        with _default_lock:
+            # Threads that raced to the first use share one instance (one
+            # memory LRU and one disk size count)
+            if _default_cache is None:
+                _default_cache = FigureCache()
+    return _default_cache
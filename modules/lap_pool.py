@@ -0,0 +1,82 @@
+"""
+F1 Telemetry Lab - Lap Pool Module
+Author: Sergio Gonzalez
+Description: Runs a per-lap function (telemetry extraction, conversion) over
+             many laps concurrently. Threads share the loaded session
+             directly; worker processes are forked after the laps are
+             published in a module global, so they inherit the session's car
+             and position data copy-on-write and only receive row numbers.
+             Results always come back in lap order.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Laps handed to each worker task: small enough to balance uneven laps,
+# large enough to keep scheduling overhead negligible
+CHUNK_SIZE = 4
+
+# (func, laps) published to forked workers. Set only while a process pool runs.
+_shared = None
+
+def as_lap_list(laps):
+    """
+    Normalizes a lap selection to a list of Lap objects.
+
+    Args:
+        laps (Laps or list): FastF1 Laps selection or Lap objects.
+
+    Returns:
+        list: Lap objects in selection order.
+    """
+    if hasattr(laps, 'iterlaps'):
+        return [lap for _, lap in laps.iterlaps()]
+    return list(laps)
+
+def _run_shared(index):
+    """Worker-process task: applies the published function to one published lap."""
+    func, laps = _shared
+    return func(laps[index])
+
+def map_laps(func, laps, workers=None, processes=False):
+    """
+    Applies func to every lap concurrently.
+
+    Threads are the default: FastF1 slicing, merging and numpy resampling
+    release the GIL for much of their work, and threads read the session's
+    data in place. processes=True forks worker processes instead, for
+    CPU-bound functions on multi-core machines; it needs the 'fork' start
+    method (Linux/macOS) and falls back to threads elsewhere. Avoid it in
+    multi-threaded hosts such as a Streamlit server.
+
+    Args:
+        func (callable): Function of one Lap. Must be a module-level function
+            when processes=True (its result is pickled back).
+        laps (Laps or list): Laps to process.
+        workers (int): Concurrent workers (default: all cores). 1 runs serially.
+        processes (bool): Use forked worker processes instead of threads.
+
+    Returns:
+        list: func(lap) for every lap, in lap order.
+    """
+    global _shared
+
+    laps = as_lap_list(laps)
+    workers = min(workers or os.cpu_count() or 1, len(laps))
+    if workers <= 1:
+        return [func(lap) for lap in laps]
+
+    if processes and 'fork' in multiprocessing.get_all_start_methods():
+        # Publish before the pool forks: children see the laps (and through
+        # them the session) without pickling, only indices cross the pipe
+        _shared = (func, laps)
+        try:
+            with ProcessPoolExecutor(max_workers=workers,
+                                     mp_context=multiprocessing.get_context('fork')) as pool:
+                return list(pool.map(_run_shared, range(len(laps)), chunksize=CHUNK_SIZE))
+        finally:
+            _shared = None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, laps))
@@ -0,0 +1,239 @@
+"""
+F1 Telemetry Lab - Lap Store Module
+Author: Sergio Gonzalez
+Description: Columnar on-disk telemetry store derived from a loaded FastF1
+             session. Every channel is saved as one .npy file per driver with
+             lap offsets, so readers memory-map only the laps they need
+             instead of unpickling the full Session.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from fastf1.core import Lap, Laps, Telemetry
+
+from modules.lap_pool import map_laps
+
+STORE_DIR = 'lap_store'
+
+# Channels persisted per lap. 'Time' is stored as float seconds from lap start.
+STORE_CHANNELS = ['Time', 'Distance', 'Speed', 'RPM', 'nGear', 'Throttle',
+                  'Brake', 'DRS', 'X', 'Y', 'Z']
+
+def store_path(year, gp, session_type, root=STORE_DIR):
+    """Directory of one session's store, named like the files in plots/."""
+    return os.path.join(root, f"{year}_{gp}_{session_type}")
+
+def _store_columns(lap):
+    """Stored channels of one lap, None for laps without usable telemetry."""
+    try:
+        tel = lap.get_telemetry().add_distance()
+    except Exception:
+        return None  # e.g. red flag, no timing
+    tel = tel.assign(Time=(tel['Time'] - tel['Time'].iloc[0]).dt.total_seconds())
+    return {ch: tel[ch].to_numpy() for ch in STORE_CHANNELS}
+
+def build_lap_store(session, year, gp, session_type, root=STORE_DIR, workers=None):
+    """
+    Writes the lap store for a fully loaded session.
+
+    Args:
+        session (Session): FastF1 session loaded with laps and telemetry.
+        year (int): Year used to name the store.
+        gp (str): GP name used to name the store (e.g., 'Spain').
+        session_type (str): Session identifier ('Q', 'R', ...).
+        root (str): Base directory of all stores.
+        workers (int): Concurrent lap extractions (default: all cores).
+
+    Returns:
+        str: Path of the written store.
+    """
+    path = store_path(year, gp, session_type, root)
+    os.makedirs(path, exist_ok=True)
+
+    # 1. Lap timing table
+    pd.DataFrame(session.laps).to_parquet(os.path.join(path, 'laps.parquet'))
+
+    rotation = 0.0
+    try:
+        info = session.get_circuit_info()
+        pd.DataFrame(info.corners).to_parquet(os.path.join(path, 'corners.parquet'))
+        if getattr(info, 'marshal_sectors', None) is not None:
+            pd.DataFrame(info.marshal_sectors).to_parquet(os.path.join(path, 'marshal_sectors.parquet'))
+        rotation = float(getattr(info, 'rotation', 0.0) or 0.0)
+    except Exception:
+        pass  # Circuit info is optional (not available for every session)
+
+    # 2. One file per (driver, channel) with all laps concatenated. Laps of the
+    #    whole field are extracted concurrently, then grouped per driver.
+    extracted = map_laps(_store_columns, session.laps, workers)
+    rows = list(zip(session.laps['Driver'], session.laps['LapNumber'], extracted))
+    for driver in session.laps['Driver'].unique():
+        driver_dir = os.path.join(path, driver)
+        os.makedirs(driver_dir, exist_ok=True)
+
+        columns = {ch: [] for ch in STORE_CHANNELS}
+        lap_numbers, offsets = [], [0]
+        for lap_driver, lap_number, lap_columns in rows:
+            if lap_driver != driver or lap_columns is None:
+                continue
+            for ch in STORE_CHANNELS:
+                columns[ch].append(lap_columns[ch])
+            lap_numbers.append(int(lap_number))
+            offsets.append(offsets[-1] + len(lap_columns['Time']))
+
+        for ch, chunks in columns.items():
+            data = np.concatenate(chunks) if chunks else np.empty(0)
+            np.save(os.path.join(driver_dir, f"{ch}.npy"), data)
+        np.save(os.path.join(driver_dir, 'laps.npy'), np.array(lap_numbers, dtype=np.int64))
+        np.save(os.path.join(driver_dir, 'offsets.npy'), np.array(offsets, dtype=np.int64))
+
+    # 3. Session metadata, written last so an interrupted build is never opened
+    meta = {
+        'name': session.name,
+        'api_path': session.api_path,
+        'event': {k: str(v) for k, v in session.event.items()},
+        'channels': STORE_CHANNELS,
+        'rotation': rotation,
+    }
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    return path
+
+class StoredLap(Lap):
+    """Lap whose telemetry is read from the lap store instead of the session."""
+
+    def get_telemetry(self, *, frequency=None):
+        return self.session.lap_telemetry(self['Driver'], int(self['LapNumber']))
+
+class StoredLaps(Laps):
+    """Laps table of a LapStoreSession. Slices return StoredLap objects."""
+
+    @property
+    def _constructor_sliced_horizontal(self):
+        return StoredLap
+
+    def get_telemetry(self, *, frequency=None):
+        if len(self) != 1:
+            raise ValueError("Lap-store telemetry can only be read for a single lap.")
+        return self.iloc[0].get_telemetry()
+
+class _CircuitInfo:
+    """Minimal stand-in for fastf1.mvapi.CircuitInfo (corners, marshal sectors, rotation)."""
+
+    def __init__(self, corners, marshal_sectors=None, rotation=0.0):
+        self.corners = corners
+        self.marshal_sectors = marshal_sectors
+        self.rotation = rotation
+
+class LapStoreSession:
+    """
+    Read-only session backed by a lap store.
+
+    Exposes the subset of the FastF1 Session interface used in this project
+    (event, name, api_path, laps, get_circuit_info), with telemetry
+    memory-mapped per channel on demand.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+
+        self.name = meta['name']
+        self.api_path = meta['api_path']
+        self.channels = meta['channels']
+        self.rotation = meta.get('rotation', 0.0)  # Stores built before it was saved have none
+        self.event = pd.Series(meta['event'])
+        self.event['EventDate'] = pd.Timestamp(self.event['EventDate'])
+        self.event['RoundNumber'] = int(self.event['RoundNumber'])
+
+        laps = pd.read_parquet(os.path.join(path, 'laps.parquet'))
+        self.laps = StoredLaps(laps, session=self)
+        self._index = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_index'] = {}  # Memory maps are reopened after unpickling
+        return state
+
+    def load(self, *args, **kwargs):
+        """No-op: store data is read lazily."""
+        return None
+
+    def get_circuit_info(self):
+        corners_file = os.path.join(self.path, 'corners.parquet')
+        if not os.path.exists(corners_file):
+            raise ValueError("No circuit info saved in this lap store.")
+        sectors_file = os.path.join(self.path, 'marshal_sectors.parquet')
+        sectors = pd.read_parquet(sectors_file) if os.path.exists(sectors_file) else None
+        return _CircuitInfo(pd.read_parquet(corners_file), sectors, self.rotation)
+
+    def _driver_index(self, driver):
+        """Lap numbers, offsets and lazily opened channel memory maps of one driver."""
+        if driver not in self._index:
+            driver_dir = os.path.join(self.path, driver)
+            lap_numbers = np.load(os.path.join(driver_dir, 'laps.npy'))
+            self._index[driver] = {
+                'laps': {int(n): i for i, n in enumerate(lap_numbers)},
+                'offsets': np.load(os.path.join(driver_dir, 'offsets.npy')),
+                'maps': {},
+            }
+        return self._index[driver]
+
+    def channel(self, driver, lap_number, name):
+        """
+        Reads one channel of one lap from its memory-mapped column file.
+
+        Args:
+            driver (str): Driver code (e.g., 'VER').
+            lap_number (int): Lap number.
+            name (str): Channel name from STORE_CHANNELS.
+
+        Returns:
+            np.ndarray: Read-only view of the samples of that lap.
+        """
+        index = self._driver_index(driver)
+        if lap_number not in index['laps']:
+            raise KeyError(f"No stored telemetry for {driver} lap {lap_number}.")
+
+        if name not in index['maps']:
+            file = os.path.join(self.path, driver, f"{name}.npy")
+            index['maps'][name] = np.load(file, mmap_mode='r')
+
+        i = index['laps'][lap_number]
+        start, stop = index['offsets'][i], index['offsets'][i + 1]
+        return index['maps'][name][start:stop]
+
+    def lap_telemetry(self, driver, lap_number, channels=None):
+        """
+        Builds a Telemetry frame for one lap from the stored columns.
+
+        Args:
+            driver (str): Driver code.
+            lap_number (int): Lap number.
+            channels (list): Channels to read (default: all stored channels).
+
+        Returns:
+            Telemetry: Frame with 'Time' as Timedelta from lap start.
+        """
+        channels = channels or self.channels
+        data = {ch: np.asarray(self.channel(driver, lap_number, ch)) for ch in channels}
+        if 'Time' in data:
+            data['Time'] = pd.to_timedelta(data['Time'], unit='s')
+        return Telemetry(data)
+
+def open_lap_store(year, gp, session_type, root=STORE_DIR):
+    """
+    Opens an existing lap store.
+
+    Returns:
+        LapStoreSession or None: None if the store has not been built yet.
+    """
+    path = store_path(year, gp, session_type, root)
+    if not os.path.exists(os.path.join(path, 'meta.json')):
+        return None
+    return LapStoreSession(path)
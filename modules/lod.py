@@ -0,0 +1,129 @@
+"""
+F1 Telemetry Lab - Level-of-Detail Module
+Author: Sergio Gonzalez
+Description: Multi-resolution (pyramid) representation of lap telemetry.
+             Level 0 holds the raw samples; each coarser level halves the
+             sample count with a min/max envelope, so peaks such as braking
+             points and minimum corner speeds survive decimation. A distance
+             window is served from the finest level that still fits a fixed
+             point budget sized from the panel's pixel width, which keeps
+             the cost of drawing a panel constant whether it shows the whole
+             lap or a 200 m zoom.
+"""
+
+import numpy as np
+
+# Screen pixels per drawn point: a min/max envelope every 4 px keeps peaks
+# visible, and a lap (~700 merged samples) exceeds the budget of any usual
+# panel width, so the full-lap view really is drawn from a coarser level
+LOD_PIXELS_PER_POINT = 4
+
+# Default point budget per line (a ~1000 px wide panel), see lod_budget()
+LOD_POINTS = 250
+
+# Smallest budget served: levels are added until the coarsest one fits it
+LOD_MIN_POINTS = 64
+
+def lod_budget(width_px):
+    """
+    Point budget of one line for a panel of a given width.
+
+    Args:
+        width_px (float): Axes width in pixels (see f1_utils.axes_width_px).
+
+    Returns:
+        int: Points per line, at least LOD_MIN_POINTS.
+    """
+    return max(LOD_MIN_POINTS, int(width_px // LOD_PIXELS_PER_POINT))
+
+def minmax_decimate(distance, values):
+    """
+    Halves a series by keeping the minimum and maximum of every 4 samples,
+    in the order they occur. A trailing incomplete bucket is kept as is.
+
+    Args:
+        distance (np.ndarray): Sorted sample distances in meters.
+        values (np.ndarray): Channel values at those distances.
+
+    Returns:
+        tuple: (distance, values) of the coarser level.
+    """
+    n = len(values) // 4 * 4
+    if n == 0:
+        return distance, values
+
+    buckets_d = distance[:n].reshape(-1, 4)
+    buckets_v = values[:n].reshape(-1, 4)
+    lo, hi = buckets_v.argmin(axis=1), buckets_v.argmax(axis=1)
+    idx = np.stack([np.minimum(lo, hi), np.maximum(lo, hi)], axis=1)
+    rows = np.arange(len(buckets_v))[:, None]
+
+    return (np.concatenate([buckets_d[rows, idx].ravel(), distance[n:]]),
+            np.concatenate([buckets_v[rows, idx].ravel(), values[n:]]))
+
+class TelemetryPyramid:
+    """
+    Per-channel resolution levels of one lap's telemetry.
+
+    Args:
+        distance (np.ndarray): Sorted sample distances in meters.
+        channels (dict): Channel name -> raw values at those distances.
+        max_points (int): Levels are added until the coarsest one has at most
+            this many samples, so any window can be served within any budget
+            of at least that size.
+
+    Attributes:
+        levels (dict): Channel name -> list of (distance, values), finest first.
+    """
+
+    def __init__(self, distance, channels, max_points=LOD_MIN_POINTS):
+        # Levels keep the source dtypes (e.g. float32 distance, uint8 throttle)
+        distance = np.asarray(distance)
+        self.levels = {}
+        for name, values in channels.items():
+            level = (distance, np.asarray(values))
+            levels = [level]
+            while len(level[0]) > max_points:
+                level = minmax_decimate(*level)
+                levels.append(level)
+            self.levels[name] = levels
+
+    def window(self, name, start=None, end=None, max_points=LOD_POINTS):
+        """
+        Returns the samples of a channel covering a distance window, taken from
+        the finest level with at most max_points samples in that window.
+
+        One sample either side of the window is included so lines reach the
+        plot edges.
+
+        Args:
+            name (str): Channel name.
+            start (float): Window start in meters, None for the lap start.
+            end (float): Window end in meters, None for the lap end.
+            max_points (int): Point budget for the window.
+
+        Returns:
+            tuple: (distance, values) arrays.
+        """
+        levels = self.levels[name]
+        for i, (dist, values) in enumerate(levels):
+            i0 = 0 if start is None else max(np.searchsorted(dist, start, side='left') - 1, 0)
+            i1 = len(dist) if end is None else np.searchsorted(dist, end, side='right') + 1
+            if i1 - i0 <= max_points or i == len(levels) - 1:
+                return dist[i0:i1], values[i0:i1]
+
+def build_pyramid(tel, channels, max_points=LOD_MIN_POINTS):
+    """
+    Builds a TelemetryPyramid from one lap's telemetry.
+
+    Args:
+        tel (LapTelemetry): Raw lap telemetry (or a Telemetry frame with 'Distance').
+        channels (list): Channel names to include.
+        max_points (int): Point budget of the coarsest level.
+
+    Returns:
+        TelemetryPyramid: Resolution levels of every channel.
+    """
+    return TelemetryPyramid(np.asarray(tel['Distance']),
+                            {name: np.asarray(tel[name]) for name in channels},
+                            max_points)
@@ -0,0 +1,142 @@
+"""
+F1 Telemetry Lab - Mini-Sector Module
+Author: Sergio Gonzalez
+Description: Splits the lap into mini-sectors (equal distance or one per
+             corner) and times every driver through each of them. All laps
+             are evaluated in a single np.interp call over their concatenated
+             telemetry, so timing the whole field costs little more than the
+             telemetry extraction itself.
+"""
+
+import numpy as np
+import pandas as pd
+
+from modules.circuit import get_circuit_geometry
+from modules.f1_utils import get_laps_telemetry
+
+# Default number of equal-distance mini-sectors
+MINI_SECTORS = 25
+
+# Segmentation modes: 'equal' splits the lap into equal distances, 'corners'
+# puts one corner in each segment (boundaries halfway between corners)
+SEGMENT_MODES = ['equal', 'corners']
+
+def segment_fractions(geometry, mode='equal', n_sectors=MINI_SECTORS):
+    """
+    Mini-sector boundaries as fractions of the lap.
+
+    Args:
+        geometry (CircuitGeometry): Circuit of the session.
+        mode (str): One of SEGMENT_MODES. 'corners' falls back to 'equal'
+            when the circuit has no corner data.
+        n_sectors (int): Number of segments for 'equal'.
+
+    Returns:
+        np.ndarray: Increasing fractions from 0.0 to 1.0 (segments + 1 values).
+    """
+    if mode not in SEGMENT_MODES:
+        raise ValueError(f"Unknown segment mode '{mode}'. Available: {', '.join(SEGMENT_MODES)}")
+    corners = np.sort(geometry.corners['Distance'].to_numpy(dtype=float)) / geometry.length
+    if mode == 'corners' and len(corners) > 1:
+        return np.concatenate([[0.0], (corners[:-1] + corners[1:]) / 2, [1.0]])
+    return np.linspace(0.0, 1.0, n_sectors + 1)
+
+def segment_times(tels, fractions):
+    """
+    Time spent by every lap in every segment.
+
+    Each lap's boundaries are the fractions of its own distance range, so the
+    segment times of a lap add up to its telemetry lap time. The laps are
+    laid end to end on one distance axis (each offset past the previous
+    one), which lets a single np.interp evaluate every boundary of every lap.
+
+    Args:
+        tels (list): LapTelemetry of every lap.
+        fractions (np.ndarray): Boundaries from segment_fractions().
+
+    Returns:
+        np.ndarray: (laps x segments) times in seconds.
+    """
+    starts = np.array([float(tel.distance[0]) for tel in tels])
+    ends = np.array([float(tel.distance[-1]) for tel in tels])
+    # Gap between consecutive laps on the shared axis: longer than any lap
+    span = 2 * ends.max() + 1
+    offsets = np.arange(len(tels)) * span
+
+    distance = np.concatenate([tel.distance.astype(np.float64) + offset for tel, offset in zip(tels, offsets)])
+    seconds = np.concatenate([tel.seconds for tel in tels])
+    # Boundaries stay inside each lap's own samples, never between two laps
+    boundaries = (starts + offsets)[:, None] + (ends - starts)[:, None] * fractions[None, :]
+
+    times = np.interp(boundaries.ravel(), distance, seconds).reshape(boundaries.shape)
+    return np.diff(times, axis=1)
+
+def fastest_laps(laps):
+    """
+    Fastest lap of every driver in one grouped pass (pick_fastest's rule: the
+    quickest personal best).
+
+    Args:
+        laps (Laps): Laps of one or more drivers.
+
+    Returns:
+        Laps: One lap per driver with a timed personal best.
+    """
+    best = laps[(laps['IsPersonalBest'] == True) & laps['LapTime'].notna()]
+    return laps.loc[best.groupby('Driver')['LapTime'].idxmin()]
+
+def minisector_table(session, drivers=None, mode='equal', n_sectors=MINI_SECTORS, workers=None):
+    """
+    Mini-sector times of each driver's fastest lap.
+
+    Args:
+        session (Session): Loaded FastF1 session.
+        drivers (list): Driver codes (default: every driver with a timed lap).
+        mode (str): One of SEGMENT_MODES.
+        n_sectors (int): Number of segments for 'equal'.
+        workers (int): Concurrent telemetry extractions (see get_laps_telemetry).
+
+    Returns:
+        DataFrame: One row per driver (index 'Driver') with Team, LapNumber and
+        one column per mini-sector ('MS1', 'MS2', ...) in seconds, sorted
+        by lap time. The segment start/end distances are in table.attrs
+        ('start_m', 'end_m', relative to the circuit's centreline length).
+    """
+    geometry = get_circuit_geometry(session)
+    fractions = segment_fractions(geometry, mode, n_sectors)
+
+    fastest = fastest_laps(session.laps if drivers is None else session.laps.pick_drivers(drivers))
+    rows = [{'Driver': lap['Driver'], 'Team': lap['Team'], 'LapNumber': int(lap['LapNumber'])}
+            for _, lap in fastest.iterlaps()]
+
+    times = segment_times(get_laps_telemetry(fastest, workers), fractions)
+    columns = [f"MS{i + 1}" for i in range(times.shape[1])]
+    table = pd.concat([pd.DataFrame(rows), pd.DataFrame(times, columns=columns)], axis=1).set_index('Driver')
+    table = table.loc[table[columns].sum(axis=1).sort_values().index]
+    table.attrs['start_m'] = list(fractions[:-1] * geometry.length)
+    table.attrs['end_m'] = list(fractions[1:] * geometry.length)
+    return table
+
+def sector_winners(table):
+    """
+    Fastest driver of every mini-sector.
+
+    Args:
+        table (DataFrame): Output of minisector_table().
+
+    Returns:
+        DataFrame: One row per mini-sector with Sector, Driver, Team, Time (s)
+        and Margin (s) over the second fastest.
+    """
+    columns = [c for c in table.columns if c.startswith('MS')]
+    times = table[columns].to_numpy()
+    order = np.argsort(times, axis=0)
+    best = times[order[0], np.arange(len(columns))]
+    second = times[order[1], np.arange(len(columns))] if len(table) > 1 else np.full(len(columns), np.nan)
+    return pd.DataFrame({
+        'Sector': columns,
+        'Driver': table.index[order[0]],
+        'Team': table['Team'].to_numpy()[order[0]],
+        'Time': best,
+        'Margin': second - best,
+    })
@@ -0,0 +1,128 @@
+"""
+F1 Telemetry Lab - Multi-Session Module
+Author: Sergio Gonzalez
+Description: Loads several sessions at once (Q vs R of one event, the same
+             GP across seasons) on a thread pool, handing each one over as
+             soon as it is ready, and aligns laps from different sessions on
+             a shared circuit distance grid. Session loads are dominated by
+             downloads and disk reads, so the wall-clock time approaches the
+             slowest single load instead of the sum.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from modules.circuit import get_circuit_geometry
+from modules.delta_engine import AlignedLapBatch
+from modules.f1_cache import enable_cache
+from modules.f1_utils import GRID_POINTS, LapTelemetry, ensure_telemetry, get_laps_telemetry, get_session_data
+from modules.lap_pool import as_lap_list
+
+# Sessions loaded at the same time
+LOAD_WORKERS = 4
+
+def session_label(spec):
+    """Short label of a (year, gp, session_type) spec, e.g. '2024 Spain Q'."""
+    return ' '.join(str(part) for part in spec)
+
+def load_sessions(specs, workers=LOAD_WORKERS, loader=None, telemetry=False, **load_kwargs):
+    """
+    Loads sessions concurrently, yielding each one as soon as it is ready.
+
+    Args:
+        specs (list): (year, gp, session_type) tuples.
+        workers (int): Sessions loaded at the same time.
+        loader (callable): (year, gp, session_type) -> session (default:
+            get_session_data with load_kwargs, e.g. profile='timing').
+        telemetry (bool): Also add car and position data to sessions loaded
+            with lap timing only (see ensure_telemetry), inside the worker.
+        **load_kwargs: Passed to get_session_data when no loader is given.
+
+    Yields:
+        tuple: (spec, session, error) in completion order. A failed load
+        yields its exception with session None; the other loads go on.
+    """
+    specs = list(dict.fromkeys(tuple(spec) for spec in specs))
+    if loader is None:
+        enable_cache()  # Once, before the workers share FastF1's cache
+        loader = lambda year, gp, session_type: get_session_data(year, gp, session_type, **load_kwargs)
+
+    def load(spec):
+        session = loader(*spec)
+        if telemetry:
+            ensure_telemetry(session)
+        return session
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(specs) or 1))) as pool:
+        futures = {pool.submit(load, spec): spec for spec in specs}
+        for future in as_completed(futures):
+            error = future.exception()
+            yield futures[future], (None if error else future.result()), error
+
+def get_sessions(specs, workers=LOAD_WORKERS, loader=None, telemetry=False, progress=None, **load_kwargs):
+    """
+    Loads sessions concurrently and returns them in spec order.
+
+    Args:
+        specs (list): (year, gp, session_type) tuples.
+        workers (int): Sessions loaded at the same time.
+        loader (callable): See load_sessions().
+        telemetry (bool): See load_sessions().
+        progress (callable): Called as progress(done, total, spec, error)
+            after every load.
+        **load_kwargs: Passed to get_session_data when no loader is given.
+
+    Returns:
+        list: Sessions, one per spec.
+
+    Raises:
+        Exception: The error of the first spec that failed (after every
+        load has finished).
+    """
+    specs = [tuple(spec) for spec in specs]
+    sessions, errors = {}, {}
+    unique = list(dict.fromkeys(specs))
+    for done, (spec, session, error) in enumerate(
+            load_sessions(unique, workers, loader, telemetry, **load_kwargs), start=1):
+        if error is None:
+            sessions[spec] = session
+        else:
+            errors[spec] = error
+        if progress is not None:
+            progress(done, len(unique), spec, error)
+    for spec in unique:
+        if spec in errors:
+            raise errors[spec]
+    return [sessions[spec] for spec in specs]
+
+def _rescaled(tel, length):
+    """LapTelemetry with its distance stretched to a lap length (other channels shared)."""
+    scale = length / float(tel.distance[-1])
+    return LapTelemetry(tel.seconds, tel.distance * scale, tel.speed, tel.throttle, tel.brake,
+                        tel.ngear, tel.x, tel.y)
+
+def align_across_sessions(laps, reference=0, n_points=GRID_POINTS, workers=None):
+    """
+    Aligns laps from different sessions on one circuit distance grid.
+
+    Integrated lap distances differ by a few tens of meters between sessions
+    (and layouts change between seasons), so each lap is first stretched to
+    the centreline length of the reference lap's circuit: start and finish
+    lines match and corner labels of that circuit apply directly.
+
+    Args:
+        laps (list): Lap objects, from any sessions.
+        reference (int): Index of the lap that defines the circuit and the gap.
+        n_points (int): Resolution of the distance grid.
+        workers (int): Concurrent telemetry extractions (see get_laps_telemetry).
+
+    Returns:
+        AlignedLapBatch: Channels and deltas of every lap on the grid
+        (0..circuit length), with the reference's CircuitGeometry as
+        batch.geometry.
+    """
+    laps = as_lap_list(laps)
+    geometry = get_circuit_geometry(laps[reference].session)
+    tels = [_rescaled(tel, geometry.length) for tel in get_laps_telemetry(laps, workers)]
+    batch = AlignedLapBatch(tels, reference, n_points)
+    batch.geometry = geometry
+    return batch
@@ -0,0 +1,155 @@
+"""
+F1 Telemetry Lab - Performance Instrumentation Module
+Author: Sergio Gonzalez
+Description: Lightweight per-stage timing. Code marks its expensive stages
+             (session loading, telemetry extraction, interpolation, drawing,
+             encoding) with stage() blocks or @timed functions. Recording is
+             active only in a thread that called start_run(); everywhere else
+             a stage is a shared no-op context, so instrumented code costs a
+             single attribute lookup when profiling is off.
+"""
+
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+# JSON-lines log the standalone scripts append to
+PERF_LOG = 'performance.jsonl'
+
+_local = threading.local()
+_NO_OP = contextlib.nullcontext()
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = None
+
+def _rss_bytes():
+    """Resident memory of the process (Linux /proc), None where unavailable."""
+    if _PAGE_SIZE is None:
+        return None
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+class _Stage:
+    """Context manager recording the duration and memory delta of one stage."""
+
+    __slots__ = ('name', 'records', 'depth', 'rss', 'start')
+
+    def __init__(self, name, records):
+        self.name = name
+        self.records = records
+
+    def __enter__(self):
+        self.depth = _local.depth
+        _local.depth += 1
+        self.rss = _rss_bytes()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        rss = _rss_bytes()
+        _local.depth -= 1
+        self.records.append({
+            'stage': self.name,
+            'ms': elapsed * 1e3,
+            'mem_delta_mb': (rss - self.rss) / 1024 ** 2 if rss is not None and self.rss is not None else None,
+            'depth': self.depth,
+        })
+        return False
+
+def start_run():
+    """Starts recording stages in the current thread (discarding earlier records)."""
+    _local.records = []
+    _local.depth = 0
+
+def collect():
+    """
+    Stops recording in the current thread.
+
+    Returns:
+        list: Records in completion order, dicts with 'stage', 'ms',
+        'mem_delta_mb' (process RSS change, None where unavailable) and
+        'depth' (nesting level).
+    """
+    records = getattr(_local, 'records', None) or []
+    _local.records = None
+    return records
+
+def recording():
+    return getattr(_local, 'records', None) is not None
+
+def stage(name):
+    """
+    Context manager timing one stage when recording, a no-op otherwise.
+
+    Args:
+        name (str): Stage label (e.g., 'session.load').
+    """
+    records = getattr(_local, 'records', None)
+    if records is None:
+        return _NO_OP
+    return _Stage(name, records)
+
+def timed(name):
+    """Decorator form of stage(): times every call of the function."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            records = getattr(_local, 'records', None)
+            if records is None:
+                return func(*args, **kwargs)
+            with _Stage(name, records):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def summarize(records):
+    """
+    Aggregates records per stage, in order of first completion.
+
+    Returns:
+        list: Dicts with 'stage', 'calls', 'ms' (total) and 'mem_delta_mb' (total).
+    """
+    totals = {}
+    for record in records:
+        entry = totals.setdefault(record['stage'], {'stage': record['stage'], 'calls': 0, 'ms': 0.0,
+                                                    'mem_delta_mb': None, 'depth': record['depth']})
+        entry['calls'] += 1
+        entry['ms'] += record['ms']
+        if record['mem_delta_mb'] is not None:
+            entry['mem_delta_mb'] = (entry['mem_delta_mb'] or 0.0) + record['mem_delta_mb']
+    return list(totals.values())
+
+def write_jsonl(path, records, **context):
+    """
+    Appends one JSON line per record.
+
+    Args:
+        path (str): Log file (created if missing).
+        records (list): Output of collect().
+        **context: Fields added to every line (e.g., script, year, gp).
+    """
+    timestamp = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    with open(path, 'a') as f:
+        for record in records:
+            f.write(json.dumps({'timestamp': timestamp, **context, **record}) + '\n')
+
+def log_run(script, path=PERF_LOG, **context):
+    """
+    Ends recording and appends the stages of a script run to the JSON-lines log.
+
+    Args:
+        script (str): Script name, stored in every line.
+        path (str): Log file.
+        **context: Extra fields (e.g., year, gp, session).
+    """
+    write_jsonl(path, collect(), script=script, **context)
@@ -0,0 +1,222 @@
+"""
+F1 Telemetry Lab - Streaming Replay Module
+Author: Sergio Gonzalez
+Description: Replays a cached session as a live feed and keeps the
+             distance-aligned comparison of two drivers up to date as samples
+             arrive. Each incoming chunk only interpolates the grid points it
+             newly covers (same formulas as the batch alignment), so the work
+             per sample is O(1) amortized and the memory per driver is a
+             fixed number of grid-sized lap buffers.
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+from modules.f1_utils import ALIGNED_DTYPES, get_laps_telemetry
+from modules.lap_pool import as_lap_list
+
+# Channels compared along the grid (besides Time)
+REPLAY_CHANNELS = ['Speed', 'Throttle', 'Brake', 'nGear']
+
+# Seconds of telemetry per feed chunk (a live timing packet is about this long)
+REPLAY_CHUNK_S = 0.5
+
+# Lap buffers kept per driver: the lap in progress and the previous one, so
+# a driver can start a new lap before the other finishes the compared one
+LAPS_KEPT = 2
+
+class StreamingLap:
+    """
+    One lap resampled onto a fixed distance grid, filled in as samples arrive.
+
+    Grid points are filled once, when the first sample at or past them
+    arrives, by interpolating between the two samples around them (the
+    previous chunk's last sample is kept for that). The result is identical
+    to interpolating the finished lap in one go.
+
+    Args:
+        grid (np.ndarray): Distance grid in meters.
+        channels (list): Channels kept besides Time.
+
+    Attributes:
+        filled (int): Grid points filled so far (a prefix of the grid).
+        time (np.ndarray): Time at every grid point (valid up to filled).
+        channels (dict): Channel name -> values on the grid (valid up to filled).
+    """
+
+    def __init__(self, grid, channels=REPLAY_CHANNELS):
+        self.grid = grid
+        self.time = np.empty(len(grid))
+        self.channels = {name: np.empty(len(grid), dtype=ALIGNED_DTYPES[name]) for name in channels}
+        self.reset()
+
+    def reset(self):
+        """Clears the lap, keeping the buffers for the next one."""
+        self.filled = 0
+        self._last = None
+
+    def push(self, distance, seconds, values):
+        """
+        Adds a chunk of consecutive samples.
+
+        Args:
+            distance (np.ndarray): Sample distances (non-decreasing, continuing the lap).
+            seconds (np.ndarray): Sample times.
+            values (dict): Channel name -> sample values.
+
+        Returns:
+            int: New number of filled grid points.
+        """
+        if len(distance) == 0:
+            return self.filled
+
+        # Bracket the chunk with the previous sample so points between chunks interpolate
+        if self._last is not None:
+            last_d, last_t, last_values = self._last
+            distance = np.concatenate([[last_d], distance])
+            seconds = np.concatenate([[last_t], seconds])
+            values = {name: np.concatenate([[last_values[name]], values[name]]) for name in self.channels}
+        self._last = (distance[-1], seconds[-1], {name: values[name][-1] for name in self.channels})
+
+        end = int(np.searchsorted(self.grid, distance[-1], side='right'))
+        self._fill(end, distance, seconds, values)
+        return self.filled
+
+    def finish(self):
+        """Lap complete: grid points past the last sample take its values (as np.interp clamps)."""
+        if self._last is None:
+            return self.filled
+        last_d, last_t, last_values = self._last
+        self._fill(len(self.grid), np.array([last_d]), np.array([last_t]),
+                   {name: np.array([v]) for name, v in last_values.items()})
+        return self.filled
+
+    def _fill(self, end, distance, seconds, values):
+        start = self.filled
+        if end <= start:
+            return
+        grid = self.grid[start:end]
+        self.time[start:end] = np.interp(grid, distance, seconds)
+        for name, out in self.channels.items():
+            if name == 'nGear':
+                # Step lookup: last gear engaged at or before each grid point
+                idx = np.clip(np.searchsorted(distance, grid, side='right') - 1, 0, len(distance) - 1)
+                out[start:end] = values[name][idx]
+            else:
+                out[start:end] = np.interp(grid, distance, values[name])
+        self.filled = end
+
+class StreamingDelta:
+    """
+    Incremental distance-aligned comparison of two drivers.
+
+    Args:
+        grid (np.ndarray): Distance grid shared by both drivers.
+        drivers (list): The two driver codes (driver 1 is the reference).
+        channels (list): Channels compared besides Time.
+    """
+
+    def __init__(self, grid, drivers, channels=REPLAY_CHANNELS):
+        self.grid = np.asarray(grid, dtype=np.float64)
+        self.drivers = list(drivers)
+        self.channels = list(channels)
+        self._laps = {driver: OrderedDict() for driver in self.drivers}
+        self._common = {}
+
+    def _lap(self, driver, lap_number):
+        laps = self._laps[driver]
+        if lap_number not in laps:
+            # Reuse the oldest buffer once LAPS_KEPT laps are held
+            if len(laps) >= LAPS_KEPT:
+                old_number, lap = laps.popitem(last=False)
+                lap.finish()
+                lap.reset()
+                self._common.pop(old_number, None)
+            else:
+                lap = StreamingLap(self.grid, self.channels)
+            for previous in laps.values():
+                previous.finish()  # The driver has crossed the line
+            laps[lap_number] = lap
+        return laps[lap_number]
+
+    def push(self, driver, lap_number, distance, seconds, values):
+        """
+        Adds a chunk of one driver's samples.
+
+        Returns:
+            list: (lap number, start, end) grid ranges newly covered by both
+            drivers (a new lap also completes the driver's previous one).
+        """
+        self._lap(driver, lap_number).push(distance, seconds, values)
+        return self._advance()
+
+    def finish(self, driver):
+        """Marks a driver's current lap as complete (end of the feed)."""
+        for lap in self._laps[driver].values():
+            lap.finish()
+        return self._advance()
+
+    def _advance(self):
+        updates = []
+        for lap_number in sorted(set.intersection(*(set(self._laps[d]) for d in self.drivers))):
+            start = self._common.get(lap_number, 0)
+            end = min(self._laps[d][lap_number].filled for d in self.drivers)
+            if end > start:
+                self._common[lap_number] = end
+                updates.append((lap_number, start, end))
+        return updates
+
+    def segment(self, lap_number, start, end):
+        """
+        Aligned values of a grid range of one lap.
+
+        Returns:
+            dict: 'Distance', 'Delta' (driver 1 minus driver 2 time, negative:
+            driver 1 ahead) and '<channel> <driver>' for every channel.
+        """
+        lap1, lap2 = (self._laps[d][lap_number] for d in self.drivers)
+        segment = {'Distance': self.grid[start:end], 'Delta': lap1.time[start:end] - lap2.time[start:end]}
+        for name in self.channels:
+            for driver, lap in zip(self.drivers, (lap1, lap2)):
+                segment[f"{name} {driver}"] = lap.channels[name][start:end]
+        return segment
+
+def replay_feed(laps, chunk_s=REPLAY_CHUNK_S, clock='session'):
+    """
+    Replays cached laps as a live feed: chunks of samples in time order.
+
+    Args:
+        laps (Laps or list): Laps to replay (any drivers and lap numbers).
+        chunk_s (float): Seconds of telemetry per chunk.
+        clock (str): 'session' replays laps at their real session time (race
+            gaps); 'lap' starts every lap at 0 (ghost laps, e.g. qualifying).
+
+    Yields:
+        tuple: (feed time in seconds, list of (driver, lap number, distance,
+        seconds, values) chunks). Samples keep their lap-relative seconds
+        plus the lap start in 'session' mode.
+    """
+    laps = as_lap_list(laps)
+    tels = get_laps_telemetry(laps)
+    streams = []
+    for lap, tel in zip(laps, tels):
+        start = lap['LapStartTime'].total_seconds() if clock == 'session' else 0.0
+        streams.append((lap['Driver'], int(lap['LapNumber']), start + tel.seconds, tel))
+    if not streams:
+        return
+
+    positions = [0] * len(streams)
+    t = min(times[0] for _, _, times, _ in streams)
+    t_end = max(times[-1] for _, _, times, _ in streams)
+    while t <= t_end:
+        t += chunk_s
+        chunks = []
+        for i, (driver, lap_number, times, tel) in enumerate(streams):
+            stop = int(np.searchsorted(times, t, side='left'))
+            if stop > positions[i]:
+                part = slice(positions[i], stop)
+                chunks.append((driver, lap_number, tel.distance[part], times[part],
+                               {name: tel[name][part] for name in REPLAY_CHANNELS}))
+                positions[i] = stop
+        yield t, chunks
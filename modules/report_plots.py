@@ -0,0 +1,429 @@
+"""
+F1 Telemetry Lab - Report Plots Module
+Author: Sergio Gonzalez
+Description: Figure builders behind the standalone scripts and the batch
+             report generator. Each function takes a loaded session and the
+             drivers to compare and returns a Matplotlib figure; saving is
+             left to the caller (see save_figure).
+"""
+
+import os
+
+import fastf1.plotting
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
+
+from modules.circuit import get_circuit_geometry
+from modules.consistency import get_lap_consistency
+from modules.f1_utils import (align_laps, axes_width_px, delta_calculator, downsample, downsampling_enabled,
+                              get_lap_telemetry, plot_telemetry, session_key)
+from modules.figure_cache import encode_figure, figure_key, get_figure_cache
+from modules.lod import lod_budget
+from modules.minisectors import MINI_SECTORS, minisector_table, sector_winners
+from modules.perf import timed
+from modules.track_heatmap import HEATMAP_METRICS, draw_track_image, get_track_heatmap
+
+PLOTS_DIR = 'plots'
+
+# Plot kinds whose telemetry lines go through plot-aware downsampling
+DOWNSAMPLED_KINDS = {'telemetry', 'inputs_zoom'}
+
+# Plot kinds drawn for a single driver: the batch renders one per driver of each pair
+SINGLE_DRIVER_KINDS = {'heatmap', 'consistency'}
+
+# Plot kinds covering the whole field: the batch renders one per session
+FIELD_KINDS = {'minisectors'}
+
+# Field-wide plots colour by team from this palette: FastF1's colour lookups
+# fetch the driver list from the live-timing API, once per driver
+TEAM_PALETTE = plt.get_cmap('tab10').colors
+
+def plot_filename(year, gp, session_type, kind, drivers, tyre='SOFT'):
+    """
+    Standard file name of a figure in plots/ (same convention as the scripts).
+
+    Args:
+        year (int): Year of the Grand Prix.
+        gp (str): GP name (e.g., 'Spain').
+        session_type (str): Session identifier ('Q', 'R', ...).
+        kind (str): One of PLOT_KINDS.
+        drivers (list): Driver codes (one for 'heatmap' and 'consistency', two otherwise;
+            'minisectors' covers the whole field and ignores them).
+        tyre (str): Compound, only used by 'tyre_deg'.
+
+    Returns:
+        str: File name without directory.
+    """
+    prefix = f"{year}_{gp}_{session_type}"
+    if kind in SINGLE_DRIVER_KINDS:
+        return f"{prefix}_{drivers[0]}_{kind}.png"
+    if kind in FIELD_KINDS:
+        return f"{prefix}_{kind}.png"
+    if kind == 'inputs_zoom':
+        return f"{prefix}_inputs_zoom_{drivers[0]}_{drivers[1]}.png"
+    if kind == 'tyre_deg':
+        return f"{prefix}_{tyre}_deg_{drivers[0]}_{drivers[1]}.png"
+    return f"{prefix}_{drivers[0]}_vs_{drivers[1]}_{kind}.png"
+
+def report_figure_key(session, kind, drivers, **options):
+    """Figure-cache key of a report figure (300 DPI 'report' style)."""
+    if kind in DOWNSAMPLED_KINDS and downsampling_enabled():
+        options['downsampled'] = True  # Draft render: not the same image as the full-resolution one
+    return figure_key(session_key(session), kind, drivers, style='report', **options)
+
+def write_figure_bytes(data, path):
+    """Writes already encoded image bytes, creating the folder if needed."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+@timed('save_figure')
+def save_figure(fig, path, cache_key=None):
+    """
+    Saves a figure at 300 DPI on a black background, creating the folder if needed.
+
+    Args:
+        fig (Figure): Figure to save.
+        path (str): Output file.
+        cache_key (str): If given (see report_figure_key), the encoded image is
+            also stored in the figure cache so the dashboard can serve it.
+    """
+    data = encode_figure(fig, style='report')
+    write_figure_bytes(data, path)
+    if cache_key is not None:
+        get_figure_cache().put(cache_key, data)
+
+@timed('render_telemetry')
+def render_telemetry(session, drivers, year, gp):
+    """5-panel comparison (gap, speed, throttle, brake, gear) of two fastest laps."""
+    fig, ax = plt.subplots(5, 1, figsize=(15, 12), sharex=True)
+
+    lap1 = session.laps.pick_drivers(drivers[0]).pick_fastest()
+    lap2 = session.laps.pick_drivers(drivers[1]).pick_fastest()
+    ref_dist, delta_values = delta_calculator(lap1, lap2)
+
+    # Panel 1: the gap, Y-axis inverted so a rising line means driver 1 gains time
+    gap_dist, gap = downsample(ref_dist, delta_values, axes_width_px(ax[0]))
+    ax[0].plot(gap_dist, gap, color='white', label=f'Gap {drivers[0]} vs {drivers[1]}')
+    ax[0].axhline(0, color='white', linestyle='--', alpha=0.5)
+    max_gap = np.max(np.abs(delta_values))
+    ax[0].set_ylim(-max_gap * 1.1, max_gap * 1.1)
+    ax[0].invert_yaxis()
+
+    # Panels 2-5: telemetry channels with official team styles
+    pair = align_laps(lap1, lap2)
+    for driver, telemetry in zip(drivers, [pair.tel1, pair.tel2]):
+        style = fastf1.plotting.get_driver_style(identifier=driver, style=['color', 'linestyle'], session=session)
+        for i, name in enumerate(['Speed', 'Throttle', 'Brake', 'nGear'], start=1):
+            plot_telemetry(ax[i], telemetry['Distance'], telemetry[name], name, **style, label=driver)
+
+    # Circuit landmarks: vertical line and label at every corner
+    # (from the persisted circuit geometry index, rescaled to driver 1's lap)
+    for dist, label in get_circuit_geometry(session).corner_labels(lap_length=pair.tel1.distance[-1]):
+        for i in range(5):
+            ax[i].axvline(dist, color='white', linestyle=':', alpha=0.3)
+        ax[0].text(dist, ax[0].get_ylim()[1], f"  {label}",
+                   rotation=90, va='bottom', ha='center',
+                   fontsize=9, color='grey', alpha=0.9)
+
+    labels = ['Gap (s)', 'Speed (km/h)', 'Throttle %', 'Brake %', 'Gears']
+    for i in range(5):
+        ax[i].set_ylabel(labels[i])
+    ax[1].legend(loc='lower right', fontsize=10, frameon=True)
+    for i in range(1, 5):
+        ax[i].legend(loc='upper right', fontsize=8)
+
+    plt.tight_layout()
+    return fig
+
+def _label_corners(ax, geometry):
+    """Writes every corner number next to its position on a track map."""
+    for dist, label in geometry.corner_labels():
+        x, y = geometry.position(dist)
+        ax.text(x, y, label, color='lightgray', fontsize=8, ha='center', va='center',
+                bbox={'boxstyle': 'round,pad=0.15', 'facecolor': 'black', 'alpha': 0.6, 'linewidth': 0})
+
+@timed('render_delta_map')
+def render_delta_map(session, drivers, year, gp, lap=None):
+    """Track map coloured by the speed difference between two fastest laps (or lap number `lap`)."""
+    if lap is None:
+        lap1 = session.laps.pick_drivers(drivers[0]).pick_fastest()
+        lap2 = session.laps.pick_drivers(drivers[1]).pick_fastest()
+    else:
+        lap1 = session.laps.pick_drivers(drivers[0]).pick_laps(lap)
+        lap2 = session.laps.pick_drivers(drivers[1]).pick_laps(lap)
+
+    pair = align_laps(lap1, lap2)
+    v1, v2 = pair.channel('Speed')
+    # Drawn along the circuit's reference centreline, shared by every track map
+    geometry = get_circuit_geometry(session)
+    x, y = geometry.position(pair.distance, lap_length=pair.distance[-1])
+    speed_delta = v1 - v2
+
+    with plt.style.context('dark_background'):
+        fig, ax = plt.subplots(figsize=(10, 10))
+
+        points = np.array([x, y]).T.reshape(-1, 1, 2)
+        segments = np.concatenate([points[:-1], points[1:]], axis=1)
+
+        norm = plt.Normalize(-5, 5)
+        lc = LineCollection(segments, cmap='RdBu_r', norm=norm, linewidth=6)
+        lc.set_array(speed_delta)
+
+        ax.add_collection(lc)
+        _label_corners(ax, geometry)
+        ax.set_aspect('equal')
+        ax.autoscale_view()
+        ax.axis('off')
+        ax.set_title(f"SPEED DELTA: {drivers[0]} vs {drivers[1]}", size=15, weight='bold', pad=20)
+
+        cbar = plt.colorbar(plt.cm.ScalarMappable(norm=norm, cmap='RdBu_r'), ax=ax, shrink=0.5)
+        cbar.set_label('km/h Difference', size=10)
+    return fig
+
+def minisector_options(mode='equal', n_sectors=MINI_SECTORS, field=True):
+    """
+    render_minisectors() options that differ from the defaults, so the default
+    map has one figure-cache key whichever caller renders it.
+    """
+    options = {}
+    if mode != 'equal':
+        options['mode'] = mode
+    elif n_sectors != MINI_SECTORS:
+        options['n_sectors'] = int(n_sectors)
+    if not field:
+        options['field'] = False
+    return options
+
+def _team_colors(table):
+    """Colour of every driver of a Driver-indexed table, shared by teammates (offline, no API lookups)."""
+    teams = table['Team'].fillna('').astype(str)
+    palette = {team: TEAM_PALETTE[i % len(TEAM_PALETTE)] for i, team in enumerate(sorted(teams.unique()))}
+    return {driver: palette[team] for driver, team in teams.items()}
+
+@timed('render_minisectors')
+def render_minisectors(session, drivers, year, gp, mode='equal', n_sectors=MINI_SECTORS, field=True):
+    """Track map coloured by the fastest driver (team colour) of every mini-sector."""
+    table = minisector_table(session, None if field else drivers, mode, n_sectors)
+    winners = sector_winners(table)
+    geometry = get_circuit_geometry(session)
+
+    # Mini-sector of every centreline segment, then the colour of its winner
+    x, y = np.append(geometry.x, geometry.x[0]), np.append(geometry.y, geometry.y[0])
+    mid = geometry.distance + geometry.step / 2
+    sector = np.minimum(np.searchsorted(table.attrs['end_m'], mid, side='right'), len(winners) - 1)
+    colors = _team_colors(table)
+
+    with plt.style.context('dark_background'):
+        fig, ax = plt.subplots(figsize=(10, 10))
+
+        points = np.array([x, y]).T.reshape(-1, 1, 2)
+        segments = np.concatenate([points[:-1], points[1:]], axis=1)
+        lc = LineCollection(segments, colors=[colors[d] for d in winners['Driver'].to_numpy()[sector]],
+                            linewidth=8)
+
+        ax.add_collection(lc)
+        _label_corners(ax, geometry)
+        ax.set_aspect('equal')
+        ax.autoscale_view()
+        ax.axis('off')
+        ax.set_title(f"MINI-SECTOR DOMINANCE: {len(table)} drivers, {len(winners)} sectors",
+                     size=15, weight='bold', pad=20)
+
+        counts = winners['Driver'].value_counts()
+        handles = [Line2D([0], [0], color=colors[d], linewidth=6,
+                          label=f"{d} ({table.loc[d, 'Team']}): {counts[d]}") for d in counts.index]
+        ax.legend(handles=handles, loc='lower center', bbox_to_anchor=(0.5, -0.08), ncol=min(len(handles), 4),
+                  frameon=False, title="Fastest mini-sectors")
+    return fig
+
+@timed('render_heatmap')
+def render_heatmap(session, drivers, year, gp, metric='mean_speed', laps='fastest'):
+    """
+    Track map coloured by a speed or braking statistic over a lap selection.
+
+    The laps are aggregated onto the circuit centreline and drawn as a single
+    raster image, so the cost does not grow with the number of laps.
+    drivers=[] aggregates the whole field.
+    """
+    geometry = get_circuit_geometry(session)
+    values, n_laps = get_track_heatmap(session, geometry, drivers, laps, metric)
+    _, _, label = HEATMAP_METRICS[metric]
+    if metric == 'braking':
+        values = values * 100
+    cmap = 'inferno' if metric == 'braking' else 'plasma'  # Plasma is standard for absolute speed
+
+    with plt.style.context('dark_background'):
+        fig, ax = plt.subplots(figsize=(10, 10))
+
+        image = draw_track_image(ax, geometry, values, cmap=cmap)
+        _label_corners(ax, geometry)
+        ax.set_aspect('equal')
+        ax.axis('off')
+        who = drivers[0] if len(drivers) == 1 else ', '.join(drivers) if drivers else 'FIELD'
+        title = label.split(' (')[0].upper()
+        ax.set_title(f"{title}: {who} ({n_laps} lap{'s' if n_laps != 1 else ''})", size=15, weight='bold', pad=20)
+
+        cbar = plt.colorbar(image, ax=ax, shrink=0.5)
+        cbar.set_label(label, size=10)
+    return fig
+
+@timed('render_inputs_zoom')
+def render_inputs_zoom(session, drivers, year, gp, zoom_range=(1500, 3500)):
+    """4-panel driver input comparison (speed, throttle, brake, gear) over a distance window."""
+    color1 = fastf1.plotting.get_driver_color(drivers[0], session=session)
+    color2 = fastf1.plotting.get_driver_color(drivers[1], session=session)
+
+    lap1 = session.laps.pick_drivers(drivers[0]).pick_fastest()
+    lap2 = session.laps.pick_drivers(drivers[1]).pick_fastest()
+    pair = align_laps(lap1, lap2)
+
+    with plt.style.context('dark_background'):
+        fig, ax = plt.subplots(4, 1, figsize=(14, 12), sharex=True,
+                               gridspec_kw={'height_ratios': [2, 1, 1, 1]})
+
+        # Only the window is drawn, at the finest resolution within the point
+        # budget of the panel width (every sample for publication renders)
+        budget = lod_budget(axes_width_px(ax[0])) if downsampling_enabled() else np.inf
+        (s1, speed1), (s2, speed2) = pair.window('Speed', zoom_range, budget)
+        (t1, throttle1), (t2, throttle2) = pair.window('Throttle', zoom_range, budget)
+        (b1, brake1), (b2, brake2) = pair.window('Brake', zoom_range, budget)
+        (g1, gear1), (g2, gear2) = pair.window('nGear', zoom_range, budget)
+        fig.suptitle(f"DRIVER INPUT ANALYSIS: {drivers[0]} vs {drivers[1]}\n{year} {gp} Grand Prix",
+                     size=18, weight='bold', y=0.97)
+
+        plot_telemetry(ax[0], s1, speed1, 'Speed', color=color1, label=drivers[0], linewidth=2)
+        plot_telemetry(ax[0], s2, speed2, 'Speed', color=color2, label=drivers[1], linewidth=2)
+        ax[0].set_ylabel("Speed (km/h)", color='gray')
+        ax[0].legend(loc='lower center', ncol=2, frameon=False)
+
+        plot_telemetry(ax[1], t1, throttle1, 'Throttle', color=color1, linewidth=1.5)
+        plot_telemetry(ax[1], t2, throttle2, 'Throttle', color=color2, linewidth=1.5)
+        ax[1].set_ylabel("Throttle %", color='gray')
+        ax[1].set_ylim(-5, 105)
+
+        plot_telemetry(ax[2], b1, brake1, 'Brake', color=color1, linewidth=1.5)
+        plot_telemetry(ax[2], b2, brake2, 'Brake', color=color2, linewidth=1.5)
+        ax[2].set_ylabel("Brake", color='gray')
+        ax[2].set_ylim(-0.1, 1.1)
+
+        # 'steps-post' reflects discrete gear changes
+        plot_telemetry(ax[3], g1, gear1, 'nGear', color=color1, linewidth=2, drawstyle='steps-post')
+        plot_telemetry(ax[3], g2, gear2, 'nGear', color=color2, linewidth=2, drawstyle='steps-post')
+        ax[3].set_ylabel("Gear", color='gray')
+        ax[3].set_xlabel("Distance (m)")
+        ax[3].set_ylim(0.5, 8.5)
+
+        for a in ax:
+            a.grid(color='gray', linestyle='--', alpha=0.2)
+        ax[3].set_xlim(zoom_range)
+
+        plt.tight_layout(rect=[0, 0.03, 1, 0.95])
+    return fig
+
+# Consistency panels: channel -> (axis label, y limits)
+CONSISTENCY_PANELS = {'Speed': ("Speed (km/h)", None), 'Throttle': ("Throttle %", (-5, 105)),
+                      'Brake': ("Brake (share of laps)", (-0.05, 1.05))}
+
+@timed('render_consistency')
+def render_consistency(session, drivers, year, gp):
+    """Telemetry spread of one driver's quick laps: min-max and ±1 std bands, mean lap and the outlier lap."""
+    driver = drivers[0]
+    color = fastf1.plotting.get_driver_color(driver, session=session)
+    consistency = get_lap_consistency(session, driver)
+    most_deviating = consistency.most_deviating()
+    if most_deviating is None:
+        raise ValueError(f"No quick laps with telemetry for {driver}.")
+    lap_number, row = most_deviating
+    bands = consistency.bands()
+    outlier = consistency.tensor[row]
+    dist = consistency.distance
+
+    with plt.style.context('dark_background'):
+        fig, ax = plt.subplots(3, 1, figsize=(14, 10), sharex=True,
+                               gridspec_kw={'height_ratios': [2, 1, 1]})
+        fig.suptitle(f"LAP CONSISTENCY: {driver} ({len(consistency)} quick laps)\n{year} {gp} Grand Prix",
+                     size=18, weight='bold', y=0.97)
+
+        for c, (name, (label, ylim)) in enumerate(CONSISTENCY_PANELS.items()):
+            band = bands[name]
+            ax[c].fill_between(dist, band['min'], band['max'], color=color, alpha=0.15, linewidth=0,
+                               label='Min-max')
+            ax[c].fill_between(dist, band['mean'] - band['std'], band['mean'] + band['std'], color=color,
+                               alpha=0.4, linewidth=0, label='±1 std')
+            ax[c].plot(dist, band['mean'], color='white', linewidth=1.2, label='Mean lap')
+            ax[c].plot(dist, outlier[:, c], color='red', linewidth=1, linestyle='--',
+                       label=f'Lap {lap_number} (most deviating)')
+            ax[c].set_ylabel(label, color='gray')
+            if ylim:
+                ax[c].set_ylim(ylim)
+            ax[c].grid(color='gray', linestyle='--', alpha=0.2)
+
+        ax[0].legend(loc='lower center', ncol=4, frameon=False)
+        ax[2].set_xlabel("Distance (m)")
+        ax[2].set_xlim(dist[0], dist[-1])
+        plt.tight_layout(rect=[0, 0.03, 1, 0.95])
+    return fig
+
+def get_stint_data(all_laps, driver, compound, stint_number):
+    """
+    Filters laps for a specific driver, tyre compound, and stint number.
+    Uses pick_quicklaps to remove outliers (pits, yellow flags).
+
+    Args:
+        all_laps (Laps): The full session laps object.
+        driver (str): Driver code (e.g., 'NOR').
+        compound (str): Tyre compound name (e.g., 'SOFT').
+        stint_number (int): The number of the stint to analyze.
+
+    Returns:
+        Laps: Filtered lap data ready for plotting.
+    """
+    filtered = all_laps.pick_drivers(driver).pick_compounds(compound)
+
+    # We filter by the 'Stint' column as there is no direct pick_stint method
+    filtered = filtered[filtered['Stint'] == stint_number]
+
+    return filtered.pick_quicklaps()
+
+@timed('render_tyre_deg')
+def render_tyre_deg(session, drivers, year, gp, tyre='SOFT', stint=1):
+    """Lap time trend of two drivers over the same stint and compound."""
+    stint1 = get_stint_data(session.laps, drivers[0], tyre, stint)
+    stint2 = get_stint_data(session.laps, drivers[1], tyre, stint)
+    times1 = stint1['LapTime'].dt.total_seconds()
+    times2 = stint2['LapTime'].dt.total_seconds()
+
+    fig, ax = plt.subplots(figsize=(12, 6))
+    ax.plot(stint1['LapNumber'], times1, marker='o', color='orange',
+            label=f'{drivers[0]} - Stint {stint} ({tyre})')
+    ax.plot(stint2['LapNumber'], times2, marker='s', color='blue',
+            label=f'{drivers[1]} - Stint {stint} ({tyre})')
+
+    ax.set_xlabel('Lap Number')
+    ax.set_ylabel('Lap Time (s)')
+    ax.set_title(f'Tyre Degradation Duel: {drivers[0]} vs {drivers[1]} ({gp} {year})')
+    ax.grid(True, alpha=0.3, linestyle='--')
+    ax.legend()
+
+    # Zoom the Y-axis on the relevant pace window
+    all_times = list(times1) + list(times2)
+    if all_times:
+        ax.set_ylim(min(all_times) - 0.5, max(all_times) + 0.5)
+    return fig
+
+# Plot kinds that only need lap timing (sessions can use the 'timing' load profile)
+TIMING_KINDS = {'tyre_deg'}
+
+# Plot kind -> figure builder, as used by the batch report generator
+PLOT_KINDS = {
+    'telemetry': render_telemetry,
+    'delta_map': render_delta_map,
+    'heatmap': render_heatmap,
+    'inputs_zoom': render_inputs_zoom,
+    'tyre_deg': render_tyre_deg,
+    'consistency': render_consistency,
+    'minisectors': render_minisectors,
+}
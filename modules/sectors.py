@@ -0,0 +1,132 @@
+"""
+F1 Telemetry Lab - Sector Analytics Module
+Author: Sergio Gonzalez
+Description: Whole-field sector table of a session in one grouped pass:
+             every driver's best S1/S2/S3, theoretical best lap, gaps to the
+             theoretical and ideal laps, sector ranks and speed-trap maxima.
+             Lap times are read once as float seconds and reduced per driver
+             with NumPy ufuncs, replacing pairwise lap comparisons.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from modules.f1_utils import session_key
+
+SECTOR_COLUMNS = ['Sector1Time', 'Sector2Time', 'Sector3Time']
+
+# Speed traps recorded by FastF1 (intermediate 1 and 2, finish line, speed trap)
+SPEED_TRAPS = ['SpeedI1', 'SpeedI2', 'SpeedFL', 'SpeedST']
+
+# Sector tables kept per session
+SECTOR_CACHE_SIZE = 16
+
+_sector_cache = OrderedDict()
+_sector_lock = threading.Lock()  # Held for the LRU updates only, never while computing
+
+def _seconds(values):
+    """Timedelta column as float seconds (NaT -> NaN)."""
+    return pd.to_timedelta(values).dt.total_seconds().to_numpy(np.float64)
+
+def _ranks(values):
+    """Rank of every value, 1 = lowest, ties share the best rank, NaN stays NaN."""
+    known = ~np.isnan(values)
+    ranks = np.full(len(values), np.nan)
+    ranks[known] = np.searchsorted(np.sort(values[known]), values[known], side='left') + 1
+    return ranks
+
+def sector_table(laps):
+    """
+    Sector analytics of every driver of a laps table at once.
+
+    Deleted laps (track limits) do not count towards lap or sector bests;
+    speed traps use every lap.
+
+    Args:
+        laps (Laps): Laps of one or more drivers (e.g. session.laps).
+
+    Returns:
+        DataFrame: One row per driver, sorted by best lap: Driver, Team,
+        Laps (timed laps), BestLap, BestS1-3, TheoreticalBest (sum of the
+        driver's best sectors), GapToTheoretical (BestLap minus it),
+        GapToIdeal (BestLap minus the field's ideal lap), RankS1-3,
+        RankTheoretical and MaxSpeedI1/I2/FL/ST. Times are in seconds. The
+        ideal lap and its sector holders are in table.attrs ('ideal_lap',
+        'ideal_sectors' as (driver, seconds) per sector).
+    """
+    frame = pd.DataFrame(laps)
+
+    # 1. Driver ids in one factorization, timing columns as float seconds
+    group, drivers = pd.factorize(frame['Driver'])
+    n_drivers = len(drivers)
+    valid = ~frame['Deleted'].fillna(False).to_numpy(bool) if 'Deleted' in frame else np.ones(len(frame), bool)
+    lap_time = np.where(valid, _seconds(frame['LapTime']), np.nan)
+    sectors = np.column_stack([_seconds(frame[c]) for c in SECTOR_COLUMNS])
+    sectors[~valid] = np.nan
+
+    # 2. Per-driver minima (NaN ignored: it never wins np.fmin)
+    best_lap = np.full(n_drivers, np.nan)
+    np.fmin.at(best_lap, group, lap_time)
+    best_sectors = np.full((n_drivers, len(SECTOR_COLUMNS)), np.nan)
+    np.fmin.at(best_sectors, group, sectors)
+    timed = np.bincount(group, weights=~np.isnan(lap_time), minlength=n_drivers).astype(int)
+
+    # 3. Theoretical best (NaN unless all three sectors were set) and the field's ideal lap
+    theoretical = best_sectors.sum(axis=1)
+    holders = [int(np.nanargmin(column)) if not np.isnan(column).all() else None for column in best_sectors.T]
+    ideal_sectors = [(drivers[h], float(best_sectors[h, s])) if h is not None else (None, np.nan)
+                     for s, h in enumerate(holders)]
+    ideal_lap = sum(seconds for _, seconds in ideal_sectors)
+
+    table = pd.DataFrame({'Driver': drivers})
+    if 'Team' in frame:
+        table['Team'] = frame['Team'].to_numpy()[np.unique(group, return_index=True)[1]]
+    table['Laps'] = timed
+    table['BestLap'] = best_lap
+    for s in range(len(SECTOR_COLUMNS)):
+        table[f'BestS{s + 1}'] = best_sectors[:, s]
+    table['TheoreticalBest'] = theoretical
+    table['GapToTheoretical'] = best_lap - theoretical
+    table['GapToIdeal'] = best_lap - ideal_lap
+    for s in range(len(SECTOR_COLUMNS)):
+        table[f'RankS{s + 1}'] = _ranks(best_sectors[:, s])
+    table['RankTheoretical'] = _ranks(theoretical)
+
+    # 4. Speed-trap maxima over every lap
+    for trap in SPEED_TRAPS:
+        if trap in frame:
+            top = np.full(n_drivers, np.nan)
+            np.fmax.at(top, group, frame[trap].to_numpy(np.float64))
+            table[f'MaxSpeed{trap[5:]}'] = top
+
+    table = table.sort_values('BestLap', ignore_index=True, na_position='last')
+    table.attrs['ideal_lap'] = ideal_lap
+    table.attrs['ideal_sectors'] = ideal_sectors
+    return table
+
+def get_sector_table(session):
+    """
+    Sector table of a session, computed once and then served from memory.
+
+    Args:
+        session (Session): Session loaded with lap timing.
+
+    Returns:
+        DataFrame: See sector_table.
+    """
+    key = session_key(session)
+    with _sector_lock:
+        if key in _sector_cache:
+            _sector_cache.move_to_end(key)
+            return _sector_cache[key]
+
+    table = sector_table(session.laps)
+    with _sector_lock:
+        table = _sector_cache.setdefault(key, table)
+        _sector_cache.move_to_end(key)
+        if len(_sector_cache) > SECTOR_CACHE_SIZE:
+            _sector_cache.popitem(last=False)
+    return table
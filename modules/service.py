@@ -0,0 +1,372 @@
+"""
+F1 Telemetry Lab - Analysis Service Module
+Author: Sergio Gonzalez
+Description: Headless HTTP API (Flask) over the analysis modules: aligned
+             laps, deltas, sector comparisons, stint degradation and track
+             maps. Sessions live in one shared SessionCache, requests are
+             computed on a bounded worker pool and results are returned as
+             columnar binary payloads: an Arrow IPC stream by default, or a
+             NumPy .npz archive with ?format=npz. Every response reports its
+             latency (Server-Timing header) and /stats aggregates them.
+
+Reading a response:
+    table = pyarrow.ipc.open_stream(response.content).read_all()
+    arrays = numpy.load(io.BytesIO(response.content))      # ?format=npz
+"""
+
+import argparse
+import io
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from flask import Flask, Response, jsonify, request
+
+from modules import perf
+from modules.circuit import get_circuit_geometry
+from modules.degradation import DEG_MODELS, FUEL_EFFECT_S_PER_LAP, get_degradation_table
+from modules.f1_cache import enable_cache
+from modules.f1_utils import (ALIGNED_CHANNELS, align_laps, delta_calculator, ensure_telemetry, get_session_data,
+                              sector_comparison)
+from modules.sectors import get_sector_table
+from modules.session_cache import SessionCache
+from modules.track_heatmap import HEATMAP_METRICS, get_track_heatmap
+
+# Requests computed at the same time (the others wait in the pool's queue)
+SERVICE_WORKERS = 4
+
+# Memory budget of the sessions held by the service
+SERVICE_SESSION_BYTES = 4 * 1024 ** 3
+
+# Latest request latencies kept per endpoint for /stats
+LATENCY_WINDOW = 1000
+
+# Response format -> MIME type
+RESPONSE_FORMATS = {'arrow': 'application/vnd.apache.arrow.stream', 'npz': 'application/x-npz'}
+
+# Lap timing columns served by /laps (timedeltas are sent as seconds)
+LAP_COLUMNS = ['Driver', 'Team', 'LapNumber', 'Stint', 'Compound', 'TyreLife', 'LapTime',
+               'Sector1Time', 'Sector2Time', 'Sector3Time', 'IsPersonalBest']
+
+def frame_columns(frame):
+    """
+    Converts a DataFrame to NumPy columns: timedeltas become float seconds,
+    text columns become str arrays (missing values as '').
+
+    Args:
+        frame (DataFrame): Table to convert (the index is dropped).
+
+    Returns:
+        dict: Column name -> np.ndarray.
+    """
+    columns = {}
+    for name in frame.columns:
+        values = frame[name]
+        if pd.api.types.is_timedelta64_dtype(values):
+            columns[str(name)] = values.dt.total_seconds().to_numpy(np.float64)
+        elif pd.api.types.is_bool_dtype(values) or pd.api.types.is_numeric_dtype(values):
+            columns[str(name)] = values.to_numpy()
+        else:
+            columns[str(name)] = values.fillna('').astype(str).to_numpy(dtype=str)
+    return columns
+
+def encode_columns(columns, fmt='arrow', metadata=None):
+    """
+    Serializes equal-length columns into a binary payload.
+
+    Args:
+        columns (dict): Column name -> 1-D array.
+        fmt (str): Key of RESPONSE_FORMATS.
+        metadata (dict): JSON-serializable extras (Arrow schema metadata, or
+            the '_metadata' entry of the .npz archive).
+
+    Returns:
+        bytes: Arrow IPC stream or .npz archive.
+    """
+    metadata = json.dumps(metadata or {})
+    if fmt == 'arrow':
+        table = pa.table({name: np.asarray(values) for name, values in columns.items()},
+                         metadata={'metadata': metadata})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    if fmt == 'npz':
+        buffer = io.BytesIO()
+        np.savez(buffer, _metadata=np.array(metadata), **columns)
+        return buffer.getvalue()
+    raise ValueError(f"Unknown format '{fmt}'. Available: {', '.join(RESPONSE_FORMATS)}")
+
+def _drivers(count=None):
+    """Driver codes of the ?drivers=NOR,VER query argument."""
+    drivers = [d.strip().upper() for d in request.args.get('drivers', '').split(',') if d.strip()]
+    if count is not None and len(drivers) != count:
+        raise ValueError(f"Expected {count} driver codes in ?drivers=, got {len(drivers)}")
+    return drivers
+
+def _lap_selection(drivers):
+    """Lap numbers of ?laps=12,14 (one per driver, or one for all), [] for fastest laps."""
+    numbers = [int(n) for n in request.args.get('laps', '').split(',') if n.strip()]
+    if len(numbers) == 1:
+        numbers = numbers * len(drivers)
+    if numbers and len(numbers) != len(drivers):
+        raise ValueError("?laps= needs one lap number per driver, or a single one")
+    return numbers
+
+def _pick_laps(session, drivers, numbers):
+    """One lap per driver: the given lap numbers, each driver's fastest lap if none."""
+    laps = []
+    for i, driver in enumerate(drivers):
+        driver_laps = session.laps.pick_drivers(driver)
+        lap = driver_laps.pick_laps(numbers[i]) if numbers else driver_laps.pick_fastest()
+        if lap is None or len(lap) == 0:
+            raise ValueError(f"No {f'lap {numbers[i]}' if numbers else 'timed lap'} for {driver}")
+        laps.append(lap.iloc[0] if numbers else lap)
+    return laps
+
+def _lap_numbers(laps):
+    return [int(lap['LapNumber']) for lap in laps]
+
+class AnalysisService:
+    """
+    State shared by all requests: the session cache, the worker pool and the
+    latency log.
+
+    Args:
+        workers (int): Size of the worker pool.
+        max_bytes (int): Memory budget of the session cache.
+        loader (callable): (year, gp, session_type) -> session with lap
+            timing (default: get_session_data with the 'timing' profile).
+    """
+
+    def __init__(self, workers=SERVICE_WORKERS, max_bytes=SERVICE_SESSION_BYTES, loader=None):
+        self.sessions = SessionCache(max_bytes=max_bytes)
+        self.workers = workers
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='analysis')
+        self._loader = loader or (lambda y, g, s: get_session_data(y, g, s, profile='timing'))
+        self._latencies = {}
+        self._lock = threading.Lock()
+
+    def session(self, year, gp, session_type, telemetry=False):
+        """Shared session (telemetry added on first use, see ensure_telemetry)."""
+        key = (year, gp, session_type)
+        session = self.sessions.get(key, lambda: self._loader(year, gp, session_type))
+        if telemetry:
+            ensure_telemetry(session)
+        return session
+
+    def _compute(self, func, fmt, queued_at):
+        """Runs on a pool thread: computes and encodes, recording the stages."""
+        waited = time.perf_counter() - queued_at
+        perf.start_run()
+        try:
+            with perf.stage('compute'):
+                columns, metadata = func()
+            with perf.stage('encode'):
+                payload = encode_columns(columns, fmt, metadata)
+        finally:
+            records = perf.collect()
+        return payload, waited, records
+
+    def respond(self, endpoint, func):
+        """
+        Computes func() -> (columns, metadata) on the worker pool and wraps the
+        payload in a response with its latency breakdown.
+        """
+        start = time.perf_counter()
+        fmt = request.args.get('format', 'arrow')
+        if fmt not in RESPONSE_FORMATS:
+            raise ValueError(f"Unknown format '{fmt}'. Available: {', '.join(RESPONSE_FORMATS)}")
+        payload, waited, records = self._pool.submit(self._compute, func, fmt, start).result()
+        total = (time.perf_counter() - start) * 1e3
+        self._record(endpoint, total)
+
+        # Server-Timing: queue wait, then each recorded stage (nested ones included)
+        timings = [f'queue;dur={waited * 1e3:.1f}']
+        timings += [f'{s["stage"].split(" ")[0]};desc="{s["stage"]}";dur={s["ms"]:.1f}'
+                    for s in perf.summarize(records)]
+        timings.append(f'total;dur={total:.1f}')
+        response = Response(payload, mimetype=RESPONSE_FORMATS[fmt])
+        response.headers['Server-Timing'] = ', '.join(timings)
+        return response
+
+    def _record(self, endpoint, ms):
+        with self._lock:
+            self._latencies.setdefault(endpoint, deque(maxlen=LATENCY_WINDOW)).append(ms)
+
+    def stats(self):
+        """
+        Returns:
+            dict: 'endpoints' (per endpoint: requests, mean_ms, p50_ms, p95_ms
+            and max_ms over the last LATENCY_WINDOW requests), 'sessions'
+            (SessionCache.stats()) and 'workers'.
+        """
+        with self._lock:
+            latencies = {endpoint: np.array(values) for endpoint, values in self._latencies.items()}
+        endpoints = {}
+        for endpoint, values in latencies.items():
+            p50, p95 = np.percentile(values, [50, 95])
+            endpoints[endpoint] = {'requests': len(values), 'mean_ms': round(float(values.mean()), 2),
+                                   'p50_ms': round(float(p50), 2), 'p95_ms': round(float(p95), 2),
+                                   'max_ms': round(float(values.max()), 2)}
+        return {'endpoints': endpoints, 'sessions': self.sessions.stats(), 'workers': self.workers}
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+def create_app(service=None):
+    """
+    Builds the Flask application.
+
+    Routes (session routes live under /sessions/<year>/<gp>/<session_type>):
+        /laps                       lap timing table
+        /aligned?drivers=A,B        both laps on the common distance grid
+                 &laps=&channels=   ('Distance', 'Delta', '<channel> <driver>')
+        /delta?drivers=A,B&laps=    'Distance' and 'Delta' (delta_calculator)
+        /sectors?drivers=A,B&laps=  'Sector', one column per driver and 'Delta'
+                                    (no drivers: the whole-field sector table)
+        /stints?model=&fuel_effect= stint degradation table
+        /track?metric=&laps=        centreline ('Distance', 'X', 'Y') and, with
+               &drivers=            a metric, its heatmap 'Value' per point
+        /stats, /health             JSON
+
+    Args:
+        service (AnalysisService): Shared state (default: a new one).
+
+    Returns:
+        Flask: The application (service available as app.extensions['analysis']).
+    """
+    service = service or AnalysisService()
+    app = Flask(__name__)
+    app.extensions['analysis'] = service
+    base = '/sessions/<int:year>/<gp>/<session_type>'
+
+    @app.errorhandler(ValueError)
+    def bad_request(error):
+        return jsonify({'error': str(error)}), 400
+
+    @app.get('/health')
+    def health():
+        return jsonify({'status': 'ok'})
+
+    @app.get('/stats')
+    def stats():
+        return jsonify(service.stats())
+
+    @app.get(f'{base}/laps')
+    def laps(year, gp, session_type):
+        def compute():
+            table = service.session(year, gp, session_type).laps
+            return frame_columns(table[[c for c in LAP_COLUMNS if c in table.columns]]), {}
+        return service.respond('laps', compute)
+
+    @app.get(f'{base}/aligned')
+    def aligned(year, gp, session_type):
+        drivers = _drivers(2)
+        numbers = _lap_selection(drivers)
+        channels = [c for c in request.args.get('channels', '').split(',') if c] or ALIGNED_CHANNELS
+        unknown = set(channels) - set(ALIGNED_CHANNELS)
+        if unknown:
+            raise ValueError(f"Unknown channels {sorted(unknown)}. Available: {', '.join(ALIGNED_CHANNELS)}")
+
+        def compute():
+            lap1, lap2 = _pick_laps(service.session(year, gp, session_type, telemetry=True), drivers, numbers)
+            pair = align_laps(lap1, lap2)
+            columns = {'Distance': pair.distance, 'Delta': pair.delta}
+            for name in channels:
+                for driver, values in zip(drivers, pair.channel(name)):
+                    columns[f"{name} {driver}"] = values
+            return columns, {'drivers': drivers, 'laps': _lap_numbers([lap1, lap2])}
+        return service.respond('aligned', compute)
+
+    @app.get(f'{base}/delta')
+    def delta(year, gp, session_type):
+        drivers = _drivers(2)
+        numbers = _lap_selection(drivers)
+
+        def compute():
+            lap1, lap2 = _pick_laps(service.session(year, gp, session_type, telemetry=True), drivers, numbers)
+            distance, gap = delta_calculator(lap1, lap2)
+            return {'Distance': distance, 'Delta': gap}, {'drivers': drivers, 'laps': _lap_numbers([lap1, lap2])}
+        return service.respond('delta', compute)
+
+    @app.get(f'{base}/sectors')
+    def sectors(year, gp, session_type):
+        if not _drivers():
+            def field():
+                table = get_sector_table(service.session(year, gp, session_type))
+                return frame_columns(table), {'ideal_lap': table.attrs['ideal_lap'],
+                                              'ideal_sectors': table.attrs['ideal_sectors']}
+            return service.respond('sectors', field)
+
+        drivers = _drivers(2)
+        numbers = _lap_selection(drivers)
+
+        def compute():
+            lap1, lap2 = _pick_laps(service.session(year, gp, session_type), drivers, numbers)
+            rows = sector_comparison(lap1, lap2)
+            s1 = np.array([row[1] for row in rows])
+            s2 = np.array([row[2] for row in rows])
+            columns = {'Sector': np.array([row[0] for row in rows]), drivers[0]: s1, drivers[1]: s2,
+                       'Delta': s1 - s2}
+            return columns, {'drivers': drivers, 'laps': _lap_numbers([lap1, lap2])}
+        return service.respond('sectors', compute)
+
+    @app.get(f'{base}/stints')
+    def stints(year, gp, session_type):
+        model = request.args.get('model', 'linear')
+        if model not in DEG_MODELS:
+            raise ValueError(f"Unknown model '{model}'. Available: {', '.join(DEG_MODELS)}")
+        fuel_effect = float(request.args.get('fuel_effect', FUEL_EFFECT_S_PER_LAP))
+
+        def compute():
+            table = get_degradation_table(service.session(year, gp, session_type), model, fuel_effect)
+            return frame_columns(table), {'model': model, 'fuel_effect': fuel_effect}
+        return service.respond('stints', compute)
+
+    @app.get(f'{base}/track')
+    def track(year, gp, session_type):
+        metric = request.args.get('metric')
+        if metric is not None and metric not in HEATMAP_METRICS:
+            raise ValueError(f"Unknown metric '{metric}'. Available: {', '.join(HEATMAP_METRICS)}")
+        lap_selection = request.args.get('laps', 'fastest')
+        drivers = _drivers()
+
+        def compute():
+            session = service.session(year, gp, session_type, telemetry=True)
+            geometry = get_circuit_geometry(session)
+            columns = {'Distance': geometry.distance, 'X': geometry.x, 'Y': geometry.y}
+            metadata = {'circuit': geometry.name, 'length_m': geometry.length, 'rotation': geometry.rotation,
+                        'corners': geometry.corner_labels()}
+            if metric is not None:
+                columns['Value'], metadata['laps_aggregated'] = get_track_heatmap(
+                    session, geometry, drivers, lap_selection, metric)
+                metadata['label'] = HEATMAP_METRICS[metric][2]
+            return columns, metadata
+        return service.respond('track', compute)
+
+    return app
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve F1 Telemetry Lab analyses over HTTP.")
+    parser.add_argument('--host', default='127.0.0.1', help="interface to bind (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8050)
+    parser.add_argument('-j', '--workers', type=int, default=SERVICE_WORKERS,
+                        help=f"requests computed at once (default: {SERVICE_WORKERS})")
+    parser.add_argument('--memory-gb', type=float, default=SERVICE_SESSION_BYTES / 1024 ** 3,
+                        help="memory budget of cached sessions")
+    args = parser.parse_args(argv)
+
+    enable_cache()
+    service = AnalysisService(workers=args.workers, max_bytes=int(args.memory_gb * 1024 ** 3))
+    try:
+        # Threaded: each connection waits on its own thread, the pool bounds the work
+        create_app(service).run(host=args.host, port=args.port, threaded=True)
+    finally:
+        service.shutdown()
+    return 0
@@ -0,0 +1,144 @@
+"""
+F1 Telemetry Lab - Session Cache Module
+Author: Sergio Gonzalez
+Description: Process-wide cache of loaded sessions. Sessions are returned by
+             reference (no pickling or deep copies on a hit) and evicted in
+             least-recently-used order once their estimated memory footprint
+             exceeds a byte budget.
+"""
+
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Default memory budget for cached sessions (bytes)
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+# Session attributes holding the bulk of a session's memory
+_DATA_ATTRIBUTES = ['laps', 'car_data', 'pos_data', 'weather_data',
+                    'race_control_messages', 'results']
+
+def _frame_bytes(obj):
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, dict):
+        return sum(_frame_bytes(v) for v in obj.values())
+    return 0
+
+def estimate_session_bytes(session):
+    """
+    Estimates the memory held by a session's data frames.
+
+    Only data sets that are loaded are counted; memory-mapped lap-store
+    channels are left out because the OS page cache owns them.
+
+    Args:
+        session (Session): FastF1 session or LapStoreSession.
+
+    Returns:
+        int: Approximate size in bytes.
+    """
+    total = 0
+    for name in _DATA_ATTRIBUTES:
+        try:
+            total += _frame_bytes(getattr(session, name))
+        except Exception:
+            continue  # FastF1 raises when a data set was not loaded
+    return total
+
+class SessionCache:
+    """
+    LRU cache of sessions bounded by estimated memory, safe to share between
+    Streamlit script threads.
+
+    Args:
+        max_bytes (int): Memory budget. The most recently used session is
+            always kept, even if it alone exceeds the budget.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> [session, size, load_profile]
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def get(self, key, loader):
+        """
+        Returns the cached session for key, calling loader() on a miss.
+
+        Concurrent requests for the same key wait for a single load.
+
+        Args:
+            key (tuple): Session identifier, e.g. (year, gp, session_type).
+            loader (callable): Zero-argument function returning the session.
+
+        Returns:
+            Session: The shared session object (not a copy).
+        """
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                entry = self._entries[key]
+                if getattr(entry[0], 'load_profile', None) != entry[2]:
+                    # Telemetry was added lazily since the last measurement
+                    self._resize(key)
+                return entry[0]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            try:
+                with self._lock:
+                    if key in self._entries:  # Loaded by another thread meanwhile
+                        self.hits += 1
+                        self._entries.move_to_end(key)
+                        return self._entries[key][0]
+                    self.misses += 1
+
+                session = loader()
+
+                with self._lock:
+                    self._entries[key] = [session, 0, None]
+                    self._resize(key)
+            finally:
+                # Also when the loader raised: a failed load must not leave its lock behind
+                with self._lock:
+                    if self._key_locks.get(key) is key_lock:
+                        del self._key_locks[key]
+        return session
+
+    def _resize(self, key):
+        """Re-measures one entry and evicts LRU entries over budget (lock held)."""
+        entry = self._entries[key]
+        entry[1] = estimate_session_bytes(entry[0])
+        entry[2] = getattr(entry[0], 'load_profile', None)
+        while len(self._entries) > 1 and self.size_bytes > self.max_bytes:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    @property
+    def size_bytes(self):
+        return sum(entry[1] for entry in self._entries.values())
+
+    def stats(self):
+        """
+        Returns:
+            dict: hits, misses, evictions, entries, size_bytes and max_bytes.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'size_bytes': self.size_bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,259 @@
+"""
+F1 Telemetry Lab - Track Heatmap Module
+Author: Sergio Gonzalez
+Description: Track heatmaps aggregated over any number of laps. X/Y samples
+             are projected onto the circuit centreline and binned by track
+             distance; each bin is reduced with NumPy (mean, median, max,
+             min). The result is drawn as one image: a pixel raster of the
+             track band, built once per circuit, looks up its bin's value.
+             Drawing costs the same for one lap or a whole race.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from scipy import ndimage
+
+from modules.f1_utils import get_laps_telemetry, session_key
+from modules.minisectors import fastest_laps
+
+# Heatmap metric -> (channel, statistic per bin, label). Brake is 0/1, so its
+# mean is the share of samples braking at that point of the track.
+HEATMAP_METRICS = {
+    'mean_speed': ('Speed', 'mean', 'Mean speed (km/h)'),
+    'median_speed': ('Speed', 'median', 'Median speed (km/h)'),
+    'max_speed': ('Speed', 'max', 'Top speed (km/h)'),
+    'min_speed': ('Speed', 'min', 'Minimum speed (km/h)'),
+    'braking': ('Brake', 'mean', 'Braking frequency (%)'),
+}
+
+# Lap selections: each driver's fastest lap, quick laps (no slow laps under
+# yellow flags), or every lap that is not a pit in/out lap
+HEATMAP_LAPS = ['fastest', 'quick', 'all']
+
+# Long side of the track raster in pixels, and width of the drawn track band
+HEATMAP_PIXELS = 1000
+TRACK_WIDTH_M = 14.0
+
+# Circuit rasters and binned lap selections kept in memory (least recently used are dropped)
+RASTER_CACHE_SIZE = 8
+SAMPLES_CACHE_SIZE = 4
+
+_raster_cache = OrderedDict()
+_samples_cache = OrderedDict()
+# Guards both LRUs; held for the dict updates only, never while rasterizing or binning
+_cache_lock = threading.Lock()
+
+def select_heatmap_laps(session, drivers=None, laps='fastest'):
+    """
+    Laps a heatmap aggregates.
+
+    Args:
+        session (Session): Loaded FastF1 session.
+        drivers (list): Driver codes (None or empty: the whole field).
+        laps (str): One of HEATMAP_LAPS.
+
+    Returns:
+        Laps: Selected laps.
+    """
+    if laps not in HEATMAP_LAPS:
+        raise ValueError(f"Unknown lap selection '{laps}'. Available: {', '.join(HEATMAP_LAPS)}")
+    selection = session.laps.pick_drivers(drivers) if drivers else session.laps
+    if laps == 'fastest':
+        return fastest_laps(selection)
+    if laps == 'quick':
+        return selection.pick_quicklaps().pick_wo_box()
+    return selection.pick_wo_box()
+
+def aggregate_bins(bins, values, n_bins, stat='mean'):
+    """
+    Reduces values per bin without a Python loop.
+
+    The mean uses np.bincount; the order statistics sort once by (bin, value)
+    and read each bin's first, last or middle elements.
+
+    Args:
+        bins (np.ndarray): Bin of every sample (0..n_bins-1).
+        values (np.ndarray): Sample values.
+        n_bins (int): Number of bins.
+        stat (str): 'mean', 'median', 'max' or 'min'.
+
+    Returns:
+        tuple: (per-bin values with NaN for empty bins, per-bin sample counts)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    counts = np.bincount(bins, minlength=n_bins)
+    result = np.full(n_bins, np.nan)
+    filled = counts > 0
+
+    if stat == 'mean':
+        result[filled] = np.bincount(bins, weights=values, minlength=n_bins)[filled] / counts[filled]
+        return result, counts
+
+    ordered = values[np.lexsort((values, bins))]
+    starts = (np.cumsum(counts) - counts)[filled]
+    n = counts[filled]
+    if stat == 'min':
+        result[filled] = ordered[starts]
+    elif stat == 'max':
+        result[filled] = ordered[starts + n - 1]
+    elif stat == 'median':
+        result[filled] = (ordered[starts + (n - 1) // 2] + ordered[starts + n // 2]) / 2
+    else:
+        raise ValueError(f"Unknown statistic '{stat}'")
+    return result, counts
+
+def _fill_gaps(values):
+    """Fills empty bins by linear interpolation around the closed loop."""
+    filled = np.flatnonzero(~np.isnan(values))
+    if len(filled) == 0 or len(filled) == len(values):
+        return values
+    n = len(values)
+    return np.interp(np.arange(n), filled, values[filled], period=n)
+
+def bin_samples(geometry, tels):
+    """
+    Projects every sample of the laps onto the centreline.
+
+    Samples are placed by their X/Y position, so laps with slightly different
+    integrated distances still land on the same stretch of track.
+
+    Args:
+        geometry (CircuitGeometry): Circuit of the laps.
+        tels (list): LapTelemetry of the laps.
+
+    Returns:
+        dict: 'bins' (centreline point of every sample: bin i covers the
+        stretch closest to point i, as in nearest()) and one array per
+        channel of HEATMAP_METRICS.
+    """
+    x = np.concatenate([tel.x for tel in tels])
+    y = np.concatenate([tel.y for tel in tels])
+    n_bins = len(geometry.distance)
+    samples = {'bins': np.rint(geometry.project(x, y) / geometry.step).astype(np.int64) % n_bins}
+    for channel in {channel for channel, _, _ in HEATMAP_METRICS.values()}:
+        samples[channel] = np.concatenate([tel[channel] for tel in tels])
+    return samples
+
+def track_profile(samples, n_bins, metric='mean_speed'):
+    """
+    Aggregates binned samples: one value per centreline point.
+
+    Args:
+        samples (dict): Output of bin_samples().
+        n_bins (int): Number of centreline points.
+        metric (str): Key of HEATMAP_METRICS.
+
+    Returns:
+        tuple: (values per centreline point, sample counts per point). Points
+        no sample fell on are interpolated from their neighbours.
+    """
+    channel, stat, _ = HEATMAP_METRICS[metric]
+    profile, counts = aggregate_bins(samples['bins'], samples[channel], n_bins, stat)
+    return _fill_gaps(profile), counts
+
+def track_raster(geometry, pixels=HEATMAP_PIXELS, width_m=TRACK_WIDTH_M):
+    """
+    Pixel raster of the track band: the nearest centreline point of every
+    pixel within width_m / 2 of the centreline, -1 elsewhere. Built once per
+    circuit and size, then served from memory.
+
+    Args:
+        geometry (CircuitGeometry): Circuit to rasterize.
+        pixels (int): Pixels along the longer side of the track.
+        width_m (float): Width of the track band in meters.
+
+    Returns:
+        tuple: (index image (rows x cols, row 0 at the bottom), extent for imshow)
+    """
+    key = (geometry.name, len(geometry.distance), pixels, width_m)
+    with _cache_lock:
+        if key in _raster_cache:
+            _raster_cache.move_to_end(key)
+            return _raster_cache[key]
+
+    # FastF1 positions are in 1/10 m
+    half_width = width_m * 10 / 2
+    x0, x1 = geometry.x.min() - half_width, geometry.x.max() + half_width
+    y0, y1 = geometry.y.min() - half_width, geometry.y.max() + half_width
+    size = max(x1 - x0, y1 - y0) / pixels
+    cols, rows = int(np.ceil((x1 - x0) / size)), int(np.ceil((y1 - y0) / size))
+
+    # Only pixels near a centreline point can be on track: mark the pixels
+    # of the centreline, widen them by the band (plus the point spacing) and
+    # query the KD-tree for those alone (a few % of the image)
+    candidates = np.zeros((rows, cols), dtype=bool)
+    candidates[((geometry.y - y0) / size).astype(int), ((geometry.x - x0) / size).astype(int)] = True
+    radius = (half_width + geometry.step * 10) / size
+    rr, cc = np.nonzero(ndimage.distance_transform_edt(~candidates) <= radius)
+
+    index = np.full((rows, cols), -1, dtype=np.int32)
+    index[rr, cc] = geometry.nearest(x0 + (cc + 0.5) * size, y0 + (rr + 0.5) * size, max_offset=half_width)
+
+    raster = (index, (x0, x0 + cols * size, y0, y0 + rows * size))
+    with _cache_lock:
+        raster = _raster_cache.setdefault(key, raster)
+        _raster_cache.move_to_end(key)
+        if len(_raster_cache) > RASTER_CACHE_SIZE:
+            _raster_cache.popitem(last=False)
+    return raster
+
+def draw_track_image(ax, geometry, values, **imshow_kwargs):
+    """
+    Draws per-centreline-point values as a single image layer.
+
+    Args:
+        ax (Axes): Target axes.
+        geometry (CircuitGeometry): Circuit the values belong to.
+        values (np.ndarray): One value per centreline point (see track_profile()).
+        **imshow_kwargs: Passed to ax.imshow (cmap, norm, vmin, vmax...).
+
+    Returns:
+        AxesImage: The image, usable as a colorbar mappable.
+    """
+    index, extent = track_raster(geometry)
+    image = np.full(index.shape, np.nan)
+    inside = index >= 0
+    image[inside] = np.asarray(values, dtype=np.float64)[index[inside]]
+    return ax.imshow(np.ma.masked_invalid(image), origin='lower', extent=extent,
+                     interpolation='nearest', **imshow_kwargs)
+
+def get_track_heatmap(session, geometry, drivers=None, laps='fastest', metric='mean_speed', workers=None):
+    """
+    Heatmap values of a lap selection. The binned samples of a selection are
+    kept in memory, so switching metric only re-aggregates them (a race's
+    worth of laps does not fit in the telemetry cache).
+
+    Args:
+        session (Session): Loaded FastF1 session.
+        geometry (CircuitGeometry): Circuit of the session.
+        drivers (list): Driver codes (None or empty: the whole field).
+        laps (str): One of HEATMAP_LAPS.
+        metric (str): Key of HEATMAP_METRICS.
+        workers (int): Concurrent telemetry extractions (see get_laps_telemetry).
+
+    Returns:
+        tuple: (values per centreline point, number of laps aggregated)
+    """
+    key = (session_key(session), tuple(drivers or ()), laps, geometry.name)
+    with _cache_lock:
+        cached = _samples_cache.get(key)
+        if cached is not None:
+            _samples_cache.move_to_end(key)
+
+    if cached is None:
+        selection = select_heatmap_laps(session, drivers, laps)
+        if len(selection) == 0:
+            raise ValueError("No laps with telemetry in the heatmap selection.")
+        tels = get_laps_telemetry(selection, workers)
+        cached = (bin_samples(geometry, tels), len(tels))
+        with _cache_lock:
+            cached = _samples_cache.setdefault(key, cached)
+            _samples_cache.move_to_end(key)
+            if len(_samples_cache) > SAMPLES_CACHE_SIZE:
+                _samples_cache.popitem(last=False)
+
+    samples, n_laps = cached
+    values, _ = track_profile(samples, len(geometry.distance), metric)
+    return values, n_laps
@@ -0,0 +1,33 @@
+"""
+F1 Telemetry Lab - Level-of-Detail Tests
+Author: Sergio Gonzalez
+Description: Checks that pyramids of real-sized laps have coarse levels and
+             that the level served depends on the visible distance range.
+
+Usage: python -m pytest tests
+"""
+
+import numpy as np
+
+from benchmarks.synthetic import synthetic_telemetry
+from modules.f1_utils import LOD_CHANNELS, LapTelemetry
+from modules.lod import LOD_POINTS, build_pyramid, lod_budget
+
+def _level_of(pyramid, name, window):
+    """Index of the pyramid level a window was sliced from."""
+    return next(i for i, (dist, _) in enumerate(pyramid.levels[name]) if np.shares_memory(window[0], dist))
+
+def test_full_lap_window_is_coarser_than_zoom():
+    # A synthetic lap has about as many merged samples as a real one (~700)
+    tel = LapTelemetry.from_telemetry(synthetic_telemetry(0).add_distance())
+    pyramid = build_pyramid(tel, LOD_CHANNELS)
+    assert len(pyramid.levels['Speed']) > 1
+
+    full = pyramid.window('Speed', max_points=LOD_POINTS)
+    zoom = pyramid.window('Speed', 1000, 1200, max_points=LOD_POINTS)
+    assert len(full[0]) <= LOD_POINTS
+    assert _level_of(pyramid, 'Speed', full) > _level_of(pyramid, 'Speed', zoom) == 0
+
+def test_budget_follows_panel_width():
+    assert lod_budget(2000) > lod_budget(1000)
+    assert lod_budget(10) > 0
@@ -1,43 +1,31 @@
-import fastf1
-import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib.collections import LineCollection
 import os
+from modules import perf
 from modules.f1_utils import get_session_data
+from modules.report_plots import PLOTS_DIR, plot_filename, render_heatmap, report_figure_key, save_figure
 
 # --- Configuration ---
 year, gp, session_type = 2024, 'Spain', 'Q'
 driver = 'NOR'
+metric = 'mean_speed'  # 'mean_speed', 'median_speed', 'max_speed', 'min_speed' or 'braking'
+laps = 'fastest'  # 'fastest' lap, 'quick' laps or 'all' laps without pit in/out laps
+use_lap_store = False  # Read laps from the columnar lap store
+log_performance = False  # Append per-stage timings to performance.jsonl
 
-session = get_session_data(year, gp, session_type)
-session.load()
-lap = session.laps.pick_driver(driver).pick_fastest()
-tel = lap.get_telemetry()
+if log_performance:
+    perf.start_run()
+session = get_session_data(year, gp, session_type, lap_store=use_lap_store)
 
 # --- Plotting ONLY the Track ---
-plt.style.use('dark_background')
-fig, ax = plt.subplots(figsize=(10, 10))
+# The selected laps are binned along the centreline and drawn as one image
+options = {} if (metric, laps) == ('mean_speed', 'fastest') else {'metric': metric, 'laps': laps}
+fig = render_heatmap(session, [driver], year, gp, **options)
 
-points = np.array([tel['X'], tel['Y']]).T.reshape(-1, 1, 2)
-segments = np.concatenate([points[:-1], points[1:]], axis=1)
-
-# Plasma colormap is standard for absolute speed
-lc = LineCollection(segments, cmap='plasma', linewidth=6)
-lc.set_array(tel['Speed'])
-
-ax.add_collection(lc)
-ax.set_aspect('equal')
-ax.autoscale_view()
-ax.axis('off')
-
-ax.set_title(f"ABSOLUTE SPEED: {driver}", size=15, weight='bold', pad=20)
-
-cbar = plt.colorbar(lc, ax=ax, shrink=0.5)
-cbar.set_label('Speed (km/h)', size=10)
-
-
-# --- 8. Export & Display ---
+# --- Export & Display ---
 # Save the figure with high resolution (300 DPI) BEFORE showing it
-file_name = f"{year}_{gp}_{session_type}_{driver}_heatmap.png"
-plt.savefig(f"plots/{file_name}", dpi=300, bbox_inches='tight', facecolor='black')
-plt.show()
\ No newline at end of file
+file_name = plot_filename(year, gp, session_type, 'heatmap', [driver])
+save_figure(fig, os.path.join(PLOTS_DIR, file_name),
+            cache_key=report_figure_key(session, 'heatmap', [driver], **options))
+if log_performance:
+    perf.log_run('track_speed_heatmap', year=year, gp=gp, session=session_type)
+plt.show()